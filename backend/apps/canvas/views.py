@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from datetime import datetime
+from apps.common.conditional import make_etag, not_modified, with_validators
+from apps.common.permissions import workspace_access_denied
 from .models import Canvas
 from .serializers import CanvasSerializer
 
@@ -23,6 +25,9 @@ class CanvasCreateView(APIView):
         try:
             serializer = CanvasSerializer(data=request.data)
             if serializer.is_valid():
+                denied = workspace_access_denied(request, serializer.validated_data["project"].workspace_id)
+                if denied is not None:
+                    return denied
                 canvas = serializer.save(created_day=datetime.now())
                 success_message = f"Canvas '{getattr(canvas, 'name', '')}' đã được tạo thành công"
                 
@@ -51,11 +56,22 @@ class CanvasDetailView(APIView):
     def get(self, request, id):
         logger.info("[CANVAS DETAIL] Yêu cầu lấy thông tin canvas id=%s", id)
         try:
-            canvas = get_object_or_404(Canvas, id=id)
+            # Lấy kèm project (cùng truy vấn) để biết workspace khi phân quyền
+            canvas = get_object_or_404(Canvas.objects.select_related("project"), id=id)
+            denied = workspace_access_denied(request, canvas.project.workspace_id)
+            if denied is not None:
+                return denied
+            etag = make_etag("canvas", canvas.id, canvas.updated_day.isoformat())
+            cached = not_modified(request, etag, canvas.updated_day)
+            if cached is not None:
+                logger.info("[CANVAS DETAIL] Canvas(id=%s) không đổi, trả về 304", canvas.id)
+                return cached
+
             serializer = CanvasSerializer(canvas)
             logger.info("[CANVAS DETAIL] Canvas(id=%s, name='%s') lấy thành công",
                         canvas.id, getattr(canvas, "name", ""))
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK),
+                                   etag, canvas.updated_day)
         except Exception as e:
             logger.exception("[CANVAS DETAIL] Lỗi khi lấy canvas id=%s: %s", id, str(e))
             return Response({"error": f"Lỗi khi lấy canvas: {str(e)}"},
@@ -65,9 +81,17 @@ class CanvasDetailView(APIView):
     def put(self, request, id):
         logger.info("[CANVAS UPDATE] Yêu cầu cập nhật canvas id=%s", id)
         try:
-            canvas = get_object_or_404(Canvas, id=id)
+            canvas = get_object_or_404(Canvas.objects.select_related("project"), id=id)
+            denied = workspace_access_denied(request, canvas.project.workspace_id)
+            if denied is not None:
+                return denied
             serializer = CanvasSerializer(canvas, data=request.data, partial=True)
             if serializer.is_valid():
+                target = serializer.validated_data.get("project")
+                if target is not None and target.workspace_id != canvas.project.workspace_id:
+                    denied = workspace_access_denied(request, target.workspace_id)
+                    if denied is not None:
+                        return denied
                 updated = serializer.save()
                 logger.info("[CANVAS UPDATE] Canvas(id=%s, name='%s') đã cập nhật thành công",
                             updated.id, getattr(updated, "name", ""))
@@ -86,7 +110,10 @@ class CanvasDetailView(APIView):
     def delete(self, request, id):
         logger.info("[CANVAS DELETE] Yêu cầu xóa canvas id=%s", id)
         try:
-            canvas = get_object_or_404(Canvas, id=id)
+            canvas = get_object_or_404(Canvas.objects.select_related("project"), id=id)
+            denied = workspace_access_denied(request, canvas.project.workspace_id)
+            if denied is not None:
+                return denied
             canvas_name = getattr(canvas, "name", "")
             canvas.delete()
             logger.info("[CANVAS DELETE] Canvas(id=%s, name='%s') đã được xóa thành công",
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Comment
+from .models import Comment, CommentMention
 
 # Register your models here.
 @admin.register(Comment)
@@ -23,3 +23,10 @@ class CommentAdmin(admin.ModelAdmin):
     def short_content(self, obj):
         return (obj.content[:50] + '...') if len(obj.content) > 50 else obj.content
     short_content.short_description = 'Content Preview'
+
+
+@admin.register(CommentMention)
+class CommentMentionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'comment_id', 'user_id', 'created_day')
+    search_fields = ('user__id', 'comment__id')
+    ordering = ('-created_day',)
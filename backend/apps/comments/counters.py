@@ -0,0 +1,73 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from apps.feedbacksessions.models import FeedbackSession
+from .models import Comment, SessionCommenter
+
+
+# Bộ đếm phi chuẩn hoá trên FeedbackSession (comment_count, commenter_count,
+# last_comment_day). Các hàm này được gọi trong cùng transaction với lệnh ghi bình luận
+
+
+def session_comments():
+    return Comment.objects.filter(session_id=OuterRef("pk")).order_by().values("session_id")
+
+
+# Đếm lại số người bình luận từ bảng comments (chỉ dùng khi tính lại toàn bộ)
+def commenter_count():
+    return Coalesce(Subquery(session_comments().annotate(value=Count("user_id", distinct=True)).values("value"),
+                             output_field=IntegerField()), 0)
+
+
+def record_comments_created(comments):
+    """Cộng dồn bộ đếm cho các bình luận vừa được thêm (đã có trong database)."""
+    added = Counter()
+    last_day = {}
+    for comment in comments:
+        added[comment.session_id] += 1
+        last_day[comment.session_id] = max(filter(None, (last_day.get(comment.session_id), comment.created_day)))
+
+    with transaction.atomic(savepoint=False):
+        # Khoá các session trước khi xem ai đã bình luận: hai request song song của cùng một
+        # người mới thì request sau chỉ đọc session_commenters khi request trước đã commit
+        list(FeedbackSession.objects.select_for_update().filter(pk__in=added).order_by("pk").values_list("pk"))
+        pairs = {(comment.session_id, comment.user_id) for comment in comments}
+        known = set(SessionCommenter.objects
+                    .filter(session_id__in=added, user_id__in={user_id for _, user_id in pairs})
+                    .values_list("session_id", "user_id"))
+        new_pairs = pairs - known
+        SessionCommenter.objects.bulk_create(
+            [SessionCommenter(session_id=session_id, user_id=user_id) for session_id, user_id in new_pairs],
+            ignore_conflicts=True,
+        )
+        new_commenters = Counter(session_id for session_id, _ in new_pairs)
+
+        for session_id, count in added.items():
+            FeedbackSession.objects.filter(pk=session_id).update(
+                comment_count=F("comment_count") + count,
+                commenter_count=F("commenter_count") + new_commenters[session_id],
+                last_comment_day=last_day[session_id],
+            )
+
+
+def refresh_session_stats(session_ids):
+    """Tính lại toàn bộ bộ đếm (và session_commenters) từ bảng comments.
+
+    Dùng khi xoá, khi chuyển session và khi sửa lệch.
+    """
+    session_ids = list(session_ids)
+    comments = session_comments()
+    with transaction.atomic(savepoint=False):
+        SessionCommenter.objects.filter(session_id__in=session_ids).delete()
+        SessionCommenter.objects.bulk_create([
+            SessionCommenter(session_id=session_id, user_id=user_id)
+            for session_id, user_id in Comment.objects.filter(session_id__in=session_ids).order_by()
+            .values_list("session_id", "user_id").distinct()
+        ])
+        FeedbackSession.objects.filter(pk__in=session_ids).update(
+            comment_count=Coalesce(Subquery(comments.annotate(value=Count("id")).values("value"),
+                                            output_field=IntegerField()), 0),
+            commenter_count=commenter_count(),
+            last_comment_day=Subquery(comments.annotate(value=Max("created_day")).values("value")),
+        )
@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.comments.models import CommentTombstone
+
+
+# Dọn tombstone của bình luận đã xoá: client đồng bộ bằng token cũ hơn --days ngày sẽ phải tải lại từ đầu
+class Command(BaseCommand):
+    help = "Xoá comment_tombstones cũ hơn --days ngày (mặc định COMMENT_TOMBSTONE_RETENTION_DAYS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.COMMENT_TOMBSTONE_RETENTION_DAYS,
+                            help="Giữ tombstone trong chừng ấy ngày gần nhất")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = CommentTombstone.purge(before, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Đã xoá {deleted} tombstone bình luận trước {before}"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.feedbacksessions.models import FeedbackSession
+from apps.comments.counters import refresh_session_stats
+
+
+# Tính lại bộ đếm bình luận của các phiên phản hồi từ bảng comments
+class Command(BaseCommand):
+    help = "Tính lại comment_count, commenter_count, last_comment_day của FeedbackSession"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, action="append", help="Chỉ tính lại các session id này")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        session_ids = options["session"]
+        if session_ids is None:
+            session_ids = (FeedbackSession.objects.order_by("id").values_list("id", flat=True)
+                           .iterator(chunk_size=options["chunk_size"]))
+
+        chunk = []
+        total = 0
+        for session_id in session_ids:
+            chunk.append(session_id)
+            if len(chunk) >= options["chunk_size"]:
+                refresh_session_stats(chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            refresh_session_stats(chunk)
+            total += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Đã tính lại bộ đếm cho {total} phiên phản hồi"))
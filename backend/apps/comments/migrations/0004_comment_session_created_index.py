@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0003_comment_updated_day'),
+        ('feedbacksessions', '0002_feedbacksession_user'),
+        ('users', '0002_alter_user_avatar_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['session', 'created_day', 'id'], name='comments_session_created_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+import math
+from django.db import migrations, models
+
+
+TILE_SIZE = 256
+
+
+def backfill_tile_key(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    batch = []
+    pins = Comment.objects.filter(position_x__isnull=False, position_y__isnull=False)
+    for comment in pins.only('id', 'position_x', 'position_y').iterator(chunk_size=2000):
+        comment.tile_key = f"{math.floor(comment.position_x / TILE_SIZE)}:{math.floor(comment.position_y / TILE_SIZE)}"
+        batch.append(comment)
+        if len(batch) >= 2000:
+            Comment.objects.bulk_update(batch, ['tile_key'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['tile_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0004_comment_session_created_index'),
+        ('feedbacksessions', '0002_feedbacksession_user'),
+        ('users', '0002_alter_user_avatar_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='tile_key',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['session', 'tile_key'], name='comments_session_tile_idx'),
+        ),
+        migrations.RunPython(backfill_tile_key, migrations.RunPython.noop),
+    ]
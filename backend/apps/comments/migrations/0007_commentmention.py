@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_mentions(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    CommentMention = apps.get_model('comments', 'CommentMention')
+    User = apps.get_model('users', 'User')
+    user_ids = set(User.objects.values_list('id', flat=True))
+
+    rows = []
+    comments = Comment.objects.filter(models.Q(mention_user__isnull=False) | models.Q(tag_user__isnull=False))
+    for comment in comments.only('id', 'mention_user', 'tag_user').iterator(chunk_size=2000):
+        values = comment.mention_user if isinstance(comment.mention_user, list) else [comment.mention_user]
+        mentioned = set()
+        for value in [*values, comment.tag_user]:
+            try:
+                mentioned.add(int(value))
+            except (TypeError, ValueError):
+                continue
+        rows.extend(CommentMention(comment_id=comment.id, user_id=user_id)
+                    for user_id in mentioned & user_ids)
+        if len(rows) >= 2000:
+            CommentMention.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        CommentMention.objects.bulk_create(rows, ignore_conflicts=True)
+
+    # auto_now_add gán thời điểm chạy migration: lấy lại ngày tạo của bình luận bằng một UPDATE
+    # (bảng vừa được tạo nên mọi dòng đều là dòng backfill)
+    CommentMention.objects.update(created_day=models.Subquery(
+        Comment.objects.filter(pk=models.OuterRef('comment_id')).values('created_day')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0006_comment_parent_root_depth'),
+        ('users', '0002_alter_user_avatar_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentMention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_day', models.DateTimeField(auto_now_add=True)),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='comments.comment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='users.user')),
+            ],
+            options={
+                'db_table': 'comment_mentions',
+                'indexes': [models.Index(fields=['user', 'created_day', 'id'], name='comment_mentions_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('comment', 'user'), name='comment_mentions_comment_user_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_mentions, migrations.RunPython.noop),
+    ]
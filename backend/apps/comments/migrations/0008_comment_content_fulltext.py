@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+# Index FULLTEXT chỉ có trên MySQL; database khác dùng inverted index trong tiến trình
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE comments ADD FULLTEXT INDEX comments_content_ft (content)")
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE comments DROP INDEX comments_content_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0007_commentmention'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0008_comment_content_fulltext'),
+        ('feedbacksessions', '0002_feedbacksession_user'),
+        ('users', '0002_alter_user_avatar_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment_id', models.BigIntegerField()),
+                ('session_id', models.BigIntegerField()),
+                ('deleted_day', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'comment_tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['session', 'updated_day', 'id'], name='comments_session_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commenttombstone',
+            index=models.Index(fields=['session_id', 'deleted_day', 'id'], name='comment_tombstones_session_idx'),
+        ),
+    ]
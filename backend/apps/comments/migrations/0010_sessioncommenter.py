@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_session_commenters(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    SessionCommenter = apps.get_model('comments', 'SessionCommenter')
+    batch = []
+    pairs = Comment.objects.order_by().values_list('session_id', 'user_id').distinct()
+    for session_id, user_id in pairs.iterator(chunk_size=2000):
+        batch.append(SessionCommenter(session_id=session_id, user_id=user_id))
+        if len(batch) >= 2000:
+            SessionCommenter.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SessionCommenter.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0009_commenttombstone'),
+        ('feedbacksessions', '0003_feedbacksession_comment_counters'),
+        ('users', '0003_user_updated_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionCommenter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commenters', to='feedbacksessions.feedbacksession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commented_sessions', to='users.user')),
+            ],
+            options={
+                'db_table': 'session_commenters',
+                'constraints': [models.UniqueConstraint(fields=('session', 'user'), name='session_commenters_session_user_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_session_commenters, migrations.RunPython.noop),
+    ]
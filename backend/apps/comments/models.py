@@ -1,14 +1,31 @@
+import math
+from datetime import timedelta
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from apps.feedbacksessions.models import FeedbackSession
 from apps.users.models import User
 
 # Create your models here.
 class Comment(models.Model):
+    # Kích thước một ô lưới (đơn vị toạ độ canvas)
+    TILE_SIZE = 256
+    # Viewport phủ quá nhiều ô thì bỏ lọc theo ô, chỉ lọc theo toạ độ
+    MAX_BBOX_TILES = 400
+
     session = models.ForeignKey(FeedbackSession, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
+    # Quan hệ trả lời: parent là bình luận được trả lời trực tiếp,
+    # root là bình luận gốc của thread (null với bình luận gốc), depth là độ sâu
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    root = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='thread_comments', editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
     content = models.CharField(max_length=1000)
     position_x = models.FloatField(null=True, blank=True)
     position_y = models.FloatField(null=True, blank=True)
+    # Ô lưới chứa pin "tx:ty", tính lại mỗi lần save để truy vấn viewport đi qua index
+    tile_key = models.CharField(max_length=32, null=True, blank=True, editable=False)
     tag_user = models.IntegerField(null=True, blank=True)  # Nếu chỉ tag 1 người, dùng IntegerField
     mention_user = models.JSONField(null=True, blank=True)  # Nếu tag nhiều người, dùng JSON
     attachment_url = models.TextField(null=True, blank=True)
@@ -17,6 +34,166 @@ class Comment(models.Model):
 
     class Meta:
         db_table = 'comments'
+        indexes = [
+            # Phục vụ phân trang keyset của SessionCommentListView
+            models.Index(fields=['session', 'created_day', 'id'], name='comments_session_created_idx'),
+            # Phục vụ truy vấn viewport (?bbox=) theo ô lưới
+            models.Index(fields=['session', 'tile_key'], name='comments_session_tile_idx'),
+            # Lấy cả thread bằng một truy vấn theo root
+            models.Index(fields=['root', 'created_day'], name='comments_root_created_idx'),
+            # Phục vụ chế độ đồng bộ thay đổi (?since=) của SessionCommentListView
+            models.Index(fields=['session', 'updated_day', 'id'], name='comments_session_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} commented on session {self.session.id}"
+
+    @property
+    def thread_root_id(self):
+        return self.root_id or self.id
+
+    def save(self, *args, **kwargs):
+        if self.parent_id:
+            self.root_id = self.parent.thread_root_id
+            self.depth = self.parent.depth + 1
+        else:
+            self.root_id = None
+            self.depth = 0
+        self.tile_key = self.compute_tile_key(self.position_x, self.position_y)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'position_x', 'position_y'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'tile_key'}
+        super().save(*args, **kwargs)
+
+    def mentioned_user_ids(self):
+        """Tập id người dùng được nhắc qua mention_user (danh sách id) và tag_user."""
+        values = self.mention_user if isinstance(self.mention_user, list) else [self.mention_user]
+        if self.tag_user is not None:
+            values = [*values, self.tag_user]
+        user_ids = set()
+        for value in values:
+            try:
+                user_ids.add(int(value))
+            except (TypeError, ValueError):
+                continue
+        return user_ids
+
+    @classmethod
+    def compute_tile_key(cls, x, y):
+        if x is None or y is None:
+            return None
+        return f"{math.floor(x / cls.TILE_SIZE)}:{math.floor(y / cls.TILE_SIZE)}"
+
+    @classmethod
+    def tile_keys_for_bbox(cls, x0, y0, x1, y1):
+        """Danh sách ô lưới phủ viewport, hoặc None nếu vượt quá MAX_BBOX_TILES."""
+        tx0, tx1 = math.floor(x0 / cls.TILE_SIZE), math.floor(x1 / cls.TILE_SIZE)
+        ty0, ty1 = math.floor(y0 / cls.TILE_SIZE), math.floor(y1 / cls.TILE_SIZE)
+        if (tx1 - tx0 + 1) * (ty1 - ty0 + 1) > cls.MAX_BBOX_TILES:
+            return None
+        return [f"{tx}:{ty}" for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)]
+
+
+# Bảng mention chuẩn hoá: mỗi dòng là một người dùng được nhắc trong một bình luận,
+# index (user, created_day) phục vụ hộp thư "mentions of me"
+class CommentMention(models.Model):
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='mentions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mentions')
+    created_day = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'comment_mentions'
+        constraints = [
+            models.UniqueConstraint(fields=['comment', 'user'], name='comment_mentions_comment_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_day', 'id'], name='comment_mentions_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"User {self.user_id} mentioned in comment {self.comment_id}"
+
+    @classmethod
+    def sync_for(cls, comments, created=False):
+        """Đồng bộ bảng mention theo mention_user/tag_user của các bình luận.
+
+        created=True khi các bình luận vừa được tạo, bỏ qua bước đọc mention cũ.
+        """
+        comments = [comment for comment in comments if comment.pk]
+        if not comments:
+            return
+        wanted = {(comment.pk, user_id) for comment in comments for user_id in comment.mentioned_user_ids()}
+        if wanted:
+            # Bỏ các id không tồn tại để không vi phạm khoá ngoại
+            valid_users = set(User.objects.filter(id__in={user_id for _, user_id in wanted})
+                              .values_list('id', flat=True))
+            wanted = {pair for pair in wanted if pair[1] in valid_users}
+
+        existing = set()
+        if not created:
+            existing = set(cls.objects.filter(comment_id__in=[comment.pk for comment in comments])
+                           .values_list('comment_id', 'user_id'))
+
+        stale = existing - wanted
+        if stale:
+            condition = models.Q()
+            for comment_id, user_id in stale:
+                condition |= models.Q(comment_id=comment_id, user_id=user_id)
+            cls.objects.filter(condition).delete()
+
+        missing = wanted - existing
+        if missing:
+            cls.objects.bulk_create(
+                [cls(comment_id=comment_id, user_id=user_id) for comment_id, user_id in missing],
+                ignore_conflicts=True,
+            )
+
+
+# Dấu vết của bình luận đã xoá để client đồng bộ (?since=) biết cần gỡ bình luận nào.
+# Chỉ lưu id thô (không khoá ngoại) vì bình luận và có thể cả session đã bị xoá
+class CommentTombstone(models.Model):
+    comment_id = models.BigIntegerField()
+    session_id = models.BigIntegerField()
+    deleted_day = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'comment_tombstones'
+        indexes = [
+            models.Index(fields=['session_id', 'deleted_day', 'id'], name='comment_tombstones_session_idx'),
+        ]
+
+    def __str__(self):
+        return f"Comment {self.comment_id} deleted from session {self.session_id}"
+
+    # Tombstone cũ hơn mốc này có thể đã bị dọn
+    @classmethod
+    def retention_cutoff(cls):
+        return timezone.now() - timedelta(days=settings.COMMENT_TOMBSTONE_RETENTION_DAYS)
+
+    @classmethod
+    def purge(cls, before, chunk_size=1000):
+        """Xoá tombstone trước `before` theo từng khối, trả về số dòng đã xoá."""
+        total = 0
+        while True:
+            ids = list(cls.objects.filter(deleted_day__lt=before).order_by('deleted_day', 'id')
+                       .values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return total
+            deleted, _ = cls.objects.filter(id__in=ids).delete()
+            total += deleted
+
+
+# Người đã bình luận trong một phiên, mỗi cặp (session, user) một dòng: thêm bình luận chỉ
+# cộng commenter_count khi cặp này chưa có, không phải COUNT DISTINCT lại bảng comments
+class SessionCommenter(models.Model):
+    session = models.ForeignKey(FeedbackSession, on_delete=models.CASCADE, related_name='commenters')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='commented_sessions')
+
+    class Meta:
+        db_table = 'session_commenters'
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'user'], name='session_commenters_session_user_uniq'),
+        ]
 
     def __str__(self):
-        return f"{self.user.email} commented on session {self.session.id}"
\ No newline at end of file
+        return f"User {self.user_id} commented in session {self.session_id}"
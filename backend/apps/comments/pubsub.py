@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# Một kết nối đang nghe: hàng đợi asyncio gắn với event loop của kết nối đó
+class Subscription:
+    def __init__(self, channel, maxsize=100):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        # Chạy trên event loop của subscriber; client quá chậm thì bỏ tin cũ nhất
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+# Backend pub/sub trong tiến trình: publish một lần, phát tới mọi subscriber của channel.
+# Chỉ phục vụ các kết nối cùng tiến trình; chạy nhiều worker thì cấu hình
+# COMMENT_PUBSUB_BACKEND trỏ tới một backend dùng chung (cùng interface
+# subscribe/unsubscribe/publish)
+class InMemoryBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Event loop đã đóng: kết nối chết, gỡ khỏi danh sách
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, "COMMENT_PUBSUB_BACKEND", "apps.comments.pubsub.InMemoryBroker")
+                _broker = import_string(backend)()
+    return _broker
+
+
+def session_channel(session_id):
+    return f"session:{session_id}"
+
+
+def publish_comment_event(session_id, event_type, comment):
+    """Phát sự kiện created/updated/deleted của bình luận sau khi transaction commit."""
+    message = {"type": event_type, "session": session_id, "comment": comment}
+
+    def send():
+        try:
+            receivers = get_broker().publish(session_channel(session_id), message)
+            logger.debug("[COMMENT STREAM] Phát sự kiện %s của session id=%s tới %s kết nối",
+                         event_type, session_id, receivers)
+        except Exception as e:
+            logger.exception("[COMMENT STREAM] Lỗi khi phát sự kiện của session id=%s: %s", session_id, str(e))
+
+    transaction.on_commit(send)
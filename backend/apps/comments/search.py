@@ -0,0 +1,117 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from .models import Comment
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or "").lower()) if len(token) > 1]
+
+
+def use_fulltext():
+    # Production chạy MySQL với index FULLTEXT (migration 0008); các database khác
+    # (SQLite khi chạy test) dùng inverted index trong tiến trình bên dưới
+    return connection.vendor == "mysql"
+
+
+# Inverted index trong bộ nhớ: token -> {comment_id: tần suất}. Được nạp lười từ
+# bảng comments ở lần tìm kiếm đầu tiên, sau đó cập nhật theo signal save/delete
+class InvertedIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._primed = False
+
+    def _add(self, comment_id, text):
+        self._remove(comment_id)
+        counts = Counter(tokenize(text))
+        self._documents[comment_id] = counts
+        for token, count in counts.items():
+            self._postings[token][comment_id] = count
+
+    def _remove(self, comment_id):
+        for token in self._documents.pop(comment_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(comment_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _prime(self):
+        if self._primed:
+            return
+        for comment_id, content in Comment.objects.values_list("id", "content").iterator(chunk_size=2000):
+            self._add(comment_id, content)
+        self._primed = True
+
+    def add(self, comment_id, text):
+        with self._lock:
+            # Chưa nạp thì bỏ qua: lần nạp đầu sẽ đọc bản mới nhất từ database
+            if self._primed:
+                self._add(comment_id, text)
+
+    def remove(self, comment_id):
+        with self._lock:
+            if self._primed:
+                self._remove(comment_id)
+
+    def reset(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._primed = False
+
+    def score(self, query):
+        """Điểm TF-IDF của các comment chứa ít nhất một token của câu truy vấn."""
+        with self._lock:
+            self._prime()
+            total = len(self._documents) or 1
+            scores = defaultdict(float)
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for comment_id, count in postings.items():
+                    scores[comment_id] += count * idf
+            return dict(scores)
+
+
+search_index = InvertedIndex()
+
+
+def index_comments(comments):
+    """Cập nhật index fallback cho các bình luận được ghi không qua save() (bulk_create)."""
+    if use_fulltext():
+        return
+    for comment in comments:
+        if comment.pk:
+            search_index.add(comment.pk, comment.content)
+
+
+def search_comments(queryset, query, offset, limit):
+    """Tìm trong queryset, trả về ([(comment, score)], has_more) xếp theo độ liên quan."""
+    if use_fulltext():
+        matches = (queryset
+                   .annotate(score=RawSQL("MATCH(comments.content) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+                                          (query,)))
+                   .filter(score__gt=0)
+                   .order_by("-score", "-id"))
+        rows = list(matches[offset:offset + limit + 1])
+        return [(comment, comment.score) for comment in rows[:limit]], len(rows) > limit
+
+    scores = search_index.score(query)
+    if not scores:
+        return [], False
+    in_scope = set(queryset.filter(id__in=list(scores)).values_list("id", flat=True))
+    ranked = sorted(in_scope, key=lambda comment_id: (-scores[comment_id], -comment_id))
+    page_ids = ranked[offset:offset + limit]
+    comments = queryset.in_bulk(page_ids)
+    return ([(comments[comment_id], scores[comment_id]) for comment_id in page_ids if comment_id in comments],
+            len(ranked) > offset + limit)
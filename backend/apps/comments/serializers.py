@@ -4,4 +4,25 @@ from .models import Comment
 class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        if self.instance is not None and 'parent' in attrs and parent != self.instance.parent:
+            raise serializers.ValidationError({'parent': 'Không thể đổi bình luận cha của một bình luận'})
+        if parent is not None:
+            session = attrs.get('session') or getattr(self.instance, 'session', None)
+            if session is not None and parent.session_id != session.id:
+                raise serializers.ValidationError({'parent': 'Bình luận cha phải thuộc cùng phiên phản hồi'})
+        return attrs
+
+# Một phần tử của request tạo bình luận hàng loạt: session/user nhận id thô,
+# view sẽ kiểm tra tồn tại bằng một truy vấn cho cả lô thay vì từng phần tử
+class CommentBatchItemSerializer(serializers.ModelSerializer):
+    session = serializers.IntegerField()
+    user = serializers.IntegerField()
+
+    class Meta:
+        model = Comment
+        fields = ['session', 'user', 'content', 'position_x', 'position_y',
+                  'tag_user', 'mention_user', 'attachment_url']
@@ -0,0 +1,84 @@
+import contextvars
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from apps.feedbacksessions.models import FeedbackSession
+from .counters import record_comments_created, refresh_session_stats
+from .models import Comment, CommentTombstone
+from .search import search_index, use_fulltext
+
+
+# Giữ inverted index fallback đồng bộ với bảng comments (sau khi transaction commit)
+@receiver(post_save, sender=Comment)
+def index_saved_comment(sender, instance, **kwargs):
+    if not use_fulltext():
+        comment_id, content = instance.pk, instance.content
+        transaction.on_commit(lambda: search_index.add(comment_id, content))
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_deleted_comment(sender, instance, **kwargs):
+    if not use_fulltext():
+        comment_id = instance.pk
+        transaction.on_commit(lambda: search_index.remove(comment_id))
+
+
+# Bộ đếm của FeedbackSession: cộng khi thêm, tính lại khi xoá
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, **kwargs):
+    if created:
+        record_comments_created([instance])
+
+
+# Xoá bình luận: ghi tombstone (kể cả reply bị xoá dây chuyền theo bình luận cha) và tính lại
+# bộ đếm của session. Một lần delete() phát pre_delete cho mọi đối tượng trước rồi mới
+# post_delete từng cái, nên các bình luận được gom theo lần xoá (origin): tombstone ghi bằng
+# một bulk INSERT và mỗi session chỉ tính lại một lần, sau post_delete cuối cùng của lần xoá.
+# Bình luận của session đang bị xoá cùng lượt thì bỏ qua cả hai
+class PendingDeletion:
+    def __init__(self, origin):
+        self.origin = origin
+        self.waiting = set()
+        self.deleted_sessions = set()
+        self.tombstones = []
+
+
+_pending = contextvars.ContextVar('comment_pending_deletion', default=None)
+
+
+def _pending_for(origin):
+    pending = _pending.get()
+    # Lần xoá trước bị lỗi giữa chừng (đã rollback) thì bỏ trạng thái cũ
+    if pending is None or pending.origin is not origin:
+        pending = PendingDeletion(origin)
+        _pending.set(pending)
+    return pending
+
+
+@receiver(pre_delete, sender=FeedbackSession)
+@receiver(pre_delete, sender=Comment)
+def remember_pending_deletion(sender, instance, origin=None, **kwargs):
+    pending = _pending_for(origin)
+    pending.waiting.add((sender, instance.pk))
+    if sender is FeedbackSession:
+        pending.deleted_sessions.add(instance.pk)
+
+
+@receiver(post_delete, sender=FeedbackSession)
+@receiver(post_delete, sender=Comment)
+def record_deleted_comments(sender, instance, origin=None, **kwargs):
+    pending = _pending.get()
+    if pending is not None and pending.origin is origin and (sender, instance.pk) in pending.waiting:
+        pending.waiting.discard((sender, instance.pk))
+        if not pending.waiting:
+            _pending.set(None)
+    else:
+        # Không đi qua pre_delete: xử lý riêng bình luận này
+        pending = PendingDeletion(origin)
+    if sender is Comment and instance.session_id not in pending.deleted_sessions:
+        pending.tombstones.append(CommentTombstone(comment_id=instance.pk, session_id=instance.session_id))
+    if pending.waiting:
+        return
+    if pending.tombstones:
+        CommentTombstone.objects.bulk_create(pending.tombstones)
+        refresh_session_stats({tombstone.session_id for tombstone in pending.tombstones})
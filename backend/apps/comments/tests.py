@@ -1,3 +1,217 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.canvas.models import Canvas
+from apps.feedbacksessions.models import FeedbackSession
+from apps.projects.models import Project
+from apps.users.models import User
+from apps.webhooks.events import collect_events
+from apps.workspaces.models import Workspace
+from .counters import record_comments_created
+from .models import Comment, CommentMention, CommentTombstone, SessionCommenter
 
-# Create your tests here.
+
+# Xoá dây chuyền: tombstone ghi gộp, bộ đếm tính lại một lần cho mỗi session
+class CascadeDeleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="User", email="user@example.com")
+        workspace = Workspace.objects.create(name="ws", owner=self.user)
+        project = Project.objects.create(workspace=workspace, name="p")
+        self.canvas = Canvas.objects.create(project=project)
+        self.session = FeedbackSession.objects.create(canvas=self.canvas, user=self.user)
+
+    def add_thread(self, session, replies):
+        root = Comment.objects.create(session=session, user=self.user, content="root")
+        for i in range(replies):
+            Comment.objects.create(session=session, user=self.user, content=f"reply {i}", parent=root)
+        return root
+
+    def delete_queries(self, instance):
+        # Như trong một request: WebhookEventMiddleware gom sự kiện và nhớ workspace đã tra
+        with CaptureQueriesContext(connection) as queries, collect_events():
+            instance.delete()
+        return len(queries)
+
+    def test_thread_delete_does_not_scale_with_replies(self):
+        small = self.delete_queries(self.add_thread(self.session, 9))
+        large = self.delete_queries(self.add_thread(self.session, 99))
+        self.assertEqual(small, large)
+        self.assertEqual(CommentTombstone.objects.filter(session_id=self.session.id).count(), 110)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.comment_count, 0)
+
+    def test_session_delete_skips_tombstones_and_recount(self):
+        self.add_thread(self.session, 9)
+        other = FeedbackSession.objects.create(canvas=self.canvas, user=self.user)
+        self.add_thread(other, 1)
+        self.assertEqual(self.delete_queries(self.session), self.delete_queries(other))
+        self.assertFalse(CommentTombstone.objects.exists())
+
+    def test_queryset_delete_recounts_each_session(self):
+        other = FeedbackSession.objects.create(canvas=self.canvas, user=self.user)
+        self.add_thread(self.session, 2)
+        keep = Comment.objects.create(session=other, user=self.user, content="keep")
+        Comment.objects.create(session=other, user=self.user, content="drop")
+        Comment.objects.exclude(pk=keep.pk).delete()
+        self.session.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.session.comment_count, other.comment_count), (0, 1))
+        self.assertEqual(CommentTombstone.objects.count(), 4)
+
+
+# Database không trả id sau bulk insert (MySQL): id vẫn có trong kết quả, mention và sự kiện
+class BatchCreateWithoutReturningTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="User", email="user@example.com")
+        self.other = User.objects.create(name="Other", email="other@example.com")
+        workspace = Workspace.objects.create(name="ws", owner=self.user)
+        project = Project.objects.create(workspace=workspace, name="p")
+        self.session = FeedbackSession.objects.create(canvas=Canvas.objects.create(project=project), user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def test_ids_are_fetched_back(self):
+        Comment.objects.create(session=self.session, user=self.user, content="same")
+        items = [{"session": self.session.id, "user": self.user.id, "content": "same"},
+                 {"session": self.session.id, "user": self.user.id, "content": "same",
+                  "mention_user": [self.other.id]},
+                 {"session": self.session.id, "user": self.other.id, "content": "other"}]
+        published = []
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False), \
+                mock.patch("apps.comments.views.publish_comment_event",
+                           side_effect=lambda session_id, kind, data: published.append(data["id"])):
+            response = self.client.post("/api/comments/batch/", items, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        ids = [result["id"] for result in response.data["results"]]
+        self.assertNotIn(None, ids)
+        self.assertEqual(published, ids)
+        created = Comment.objects.in_bulk(ids)
+        self.assertEqual([created[i].content for i in ids], ["same", "same", "other"])
+        self.assertEqual(list(CommentMention.objects.values_list("comment_id", flat=True)), [ids[1]])
+
+
+# Luồng SSE chỉ chạy dưới ASGI; xác thực trước khi tra session
+class CommentStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="User", email="user@example.com")
+        self.token = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def test_wsgi_is_not_supported(self):
+        response = self.client.get("/api/sessions/999/comments/stream/", HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(response.status_code, 501)
+
+    async def test_anonymous_cannot_probe_sessions(self):
+        response = await AsyncClient().get("/api/sessions/999/comments/stream/")
+        self.assertEqual(response.status_code, 401)
+        response = await AsyncClient().get("/api/sessions/999/comments/stream/",
+                                           headers={"Authorization": self.token})
+        self.assertEqual(response.status_code, 404)
+
+
+# Bộ đếm của session: chỉ cộng người bình luận mới, chuyển session thì tính lại cả hai
+class SessionCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="User", email="user@example.com")
+        self.other = User.objects.create(name="Other", email="other@example.com")
+        workspace = Workspace.objects.create(name="ws", owner=self.user)
+        canvas = Canvas.objects.create(project=Project.objects.create(workspace=workspace, name="p"))
+        self.session = FeedbackSession.objects.create(canvas=canvas, user=self.user)
+        self.target = FeedbackSession.objects.create(canvas=canvas, user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def counters(self, session):
+        session.refresh_from_db()
+        return session.comment_count, session.commenter_count
+
+    def test_concurrent_first_comments_count_the_commenter(self):
+        # Hai request song song của cùng một người mới: cả hai dòng đã có trước khi ai kịp cộng bộ đếm
+        first, second = Comment.objects.bulk_create([
+            Comment(session=self.session, user=self.other, content="a"),
+            Comment(session=self.session, user=self.other, content="b"),
+        ])
+        record_comments_created([first])
+        record_comments_created([second])
+        self.assertEqual(self.counters(self.session), (2, 1))
+
+    def test_only_a_new_commenter_is_counted(self):
+        Comment.objects.create(session=self.session, user=self.user, content="a")
+        Comment.objects.create(session=self.session, user=self.user, content="b")
+        self.assertEqual(self.counters(self.session), (2, 1))
+        self.assertEqual(SessionCommenter.objects.filter(session=self.session).count(), 1)
+
+    def test_moved_away_commenter_is_counted_again(self):
+        moving = Comment.objects.create(session=self.session, user=self.other, content="move")
+        self.client.put(f"/api/comments/{moving.id}/detail/", {"session": self.target.id}, format="json")
+        Comment.objects.create(session=self.session, user=self.other, content="back")
+        self.assertEqual(self.counters(self.session), (1, 1))
+        self.assertEqual(self.counters(self.target), (1, 1))
+
+    def test_moving_a_comment_recounts_both_sessions(self):
+        Comment.objects.create(session=self.session, user=self.user, content="stay")
+        moving = Comment.objects.create(session=self.session, user=self.other, content="move")
+        response = self.client.put(f"/api/comments/{moving.id}/detail/", {"session": self.target.id}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.counters(self.session), (1, 1))
+        self.assertEqual(self.counters(self.target), (1, 1))
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.last_comment_day, Comment.objects.get(pk=moving.pk).created_day)
+
+
+# Đồng bộ ?since=: bình luận chuyển sang session khác là "bị xoá" ở session cũ; token cũ hơn
+# thời hạn giữ tombstone thì đồng bộ lại từ đầu
+class CommentSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name="User", email="user@example.com")
+        workspace = Workspace.objects.create(name="ws", owner=self.user)
+        canvas = Canvas.objects.create(project=Project.objects.create(workspace=workspace, name="p"))
+        self.session = FeedbackSession.objects.create(canvas=canvas, user=self.user)
+        self.target = FeedbackSession.objects.create(canvas=canvas, user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def sync(self, session, since):
+        response = self.client.get(f"/api/sessions/{session.id}/comments/", {"since": since})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_move_is_a_deletion_in_the_old_session(self):
+        moving = Comment.objects.create(session=self.session, user=self.user, content="move")
+        since = self.sync(self.session, "2000-01-01T00:00:00Z")["next_since"]
+        target_since = self.sync(self.target, "2000-01-01T00:00:00Z")["next_since"]
+        self.client.put(f"/api/comments/{moving.id}/detail/", {"session": self.target.id}, format="json")
+
+        old = self.sync(self.session, since)
+        self.assertEqual((old["changes"], old["deleted"]), ([], [moving.id]))
+        new = self.sync(self.target, target_since)
+        self.assertEqual(([c["id"] for c in new["changes"]], new["deleted"]), ([moving.id], []))
+
+        # Chuyển về lại: tombstone ở session cũ không còn che bình luận
+        self.client.put(f"/api/comments/{moving.id}/detail/", {"session": self.session.id}, format="json")
+        back = self.sync(self.session, since)
+        self.assertEqual(([c["id"] for c in back["changes"]], back["deleted"]), ([moving.id], []))
+
+    @override_settings(COMMENT_TOMBSTONE_RETENTION_DAYS=30)
+    def test_token_older_than_retention_resyncs(self):
+        keep = Comment.objects.create(session=self.session, user=self.user, content="keep")
+        gone = Comment.objects.create(session=self.session, user=self.user, content="gone")
+        since = self.sync(self.session, (timezone.now() - timedelta(days=1)).isoformat())["next_since"]
+        gone.delete()
+        CommentTombstone.objects.update(deleted_day=timezone.now() - timedelta(days=40))
+        call_command("purge_comment_tombstones", stdout=StringIO())
+        self.assertFalse(CommentTombstone.objects.exists())
+
+        recent = self.sync(self.session, since)
+        self.assertFalse(recent["reset"])
+        stale = self.sync(self.session, (timezone.now() - timedelta(days=31)).isoformat())
+        self.assertTrue(stale["reset"])
+        self.assertEqual(([c["id"] for c in stale["changes"]], stale["deleted"]), ([keep.id], []))
+        again = self.sync(self.session, stale["next_since"])
+        self.assertEqual((again["reset"], again["changes"], again["deleted"]), (False, [], []))
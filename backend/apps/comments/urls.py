@@ -9,16 +9,26 @@
 from django.urls import path
 from .views import (
     CommentCreateView,
+    CommentBatchCreateView,
     CommentDetailView,
     CommentReplyView,
+    CommentThreadView,
     CommentMentionView,
-    SessionCommentListView
+    CommentSearchView,
+    SessionCommentListView,
+    SessionCommentStreamView,
+    UserMentionListView
 )
 
 urlpatterns = [
     path('comments/create/', CommentCreateView.as_view(), name='comment-create'),
+    path('comments/batch/', CommentBatchCreateView.as_view(), name='comment-batch-create'),
+    path('comments/search/', CommentSearchView.as_view(), name='comment-search'),
     path('comments/<int:id>/detail/', CommentDetailView.as_view(), name='comment-detail'),
     path('comments/<int:id>/reply/', CommentReplyView.as_view(), name='comment-reply'),   
+    path('comments/<int:id>/thread/', CommentThreadView.as_view(), name='comment-thread'),
     path('comments/<int:id>/mention/', CommentMentionView.as_view(), name='comment-mention'),
     path('sessions/<int:id>/comments/', SessionCommentListView.as_view(), name='session-comments'),
+    path('sessions/<int:id>/comments/stream/', SessionCommentStreamView.as_view(), name='session-comments-stream'),
+    path('users/<int:id>/mentions/', UserMentionListView.as_view(), name='user-mentions'),
 ]
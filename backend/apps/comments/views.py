@@ -1,13 +1,37 @@
 # from django.shortcuts import render
 # from rest_framework import viewsets
+import asyncio
+import json
 import logging
+import math
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views import View
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db import connection, transaction
+from django.db.models import Max, Q
 from datetime import datetime
-from .models import Comment
-from .serializers import CommentSerializer
+from asgiref.sync import sync_to_async
+from apps.common.auth import get_request_user_id
+from apps.common.conditional import make_etag, not_modified, with_validators
+from apps.common.permissions import get_workspace_role, workspace_access_denied
+from apps.common.pagination import KeysetPagination, decode_cursor, encode_cursor
+from apps.feedbacksessions.models import FeedbackSession
+from apps.projects.models import Project
+from apps.workspacemembers.membership import member_workspace_ids
+from apps.webhooks.events import emit_many
+from .counters import record_comments_created, refresh_session_stats
+from .models import Comment, CommentMention, CommentTombstone
+from .pubsub import get_broker, publish_comment_event, session_channel
+from .search import index_comments, search_comments
+from apps.users.models import User
+from .serializers import CommentSerializer, CommentBatchItemSerializer
 
 # Create your views here.
 # class CommentViewSet(viewsets.ModelViewSet):
@@ -16,6 +40,40 @@ from .serializers import CommentSerializer
 
 logger = logging.getLogger(__name__)
 
+
+# Workspace chứa một phiên phản hồi (None nếu phiên không tồn tại), một truy vấn JOIN
+def session_workspace_id(session_id):
+    return (FeedbackSession.objects.filter(id=session_id)
+            .values_list("canvas__project__workspace_id", flat=True).first())
+
+
+# Bình luận kèm session -> canvas -> project trong cùng truy vấn để phân quyền theo workspace
+def comments_with_workspace():
+    return Comment.objects.select_related("session__canvas__project")
+
+
+def comment_workspace_id(comment):
+    return comment.session.canvas.project.workspace_id
+
+
+# Database không trả id sau bulk insert (MySQL): đọc lại id của các dòng vừa chèn trong cùng
+# transaction, khớp theo (session, user, parent, nội dung, created_day). Các dòng trùng khoá
+# trong lô được chèn theo thứ tự nên nhận id tăng dần theo đúng thứ tự đó
+def assign_inserted_ids(comments):
+    inserted = {}
+    rows = (Comment.objects
+            .filter(session_id__in={c.session_id for c in comments},
+                    created_day__gte=min(c.created_day for c in comments))
+            .order_by("id")
+            .values_list("id", "session_id", "user_id", "parent_id", "content", "created_day"))
+    for comment_id, *key in rows:
+        inserted.setdefault(tuple(key), []).append(comment_id)
+    for comment in comments:
+        ids = inserted.get((comment.session_id, comment.user_id, comment.parent_id,
+                            comment.content, comment.created_day))
+        comment.pk = ids.pop(0)
+
+
 # Tạo bình luận mới
 class CommentCreateView(APIView):
     def post(self, request):
@@ -23,7 +81,13 @@ class CommentCreateView(APIView):
         try:
             serializer = CommentSerializer(data=request.data)
             if serializer.is_valid():
-                comment = serializer.save(created_day=datetime.now())
+                denied = workspace_access_denied(request, session_workspace_id(serializer.validated_data["session"].id))
+                if denied is not None:
+                    return denied
+                with transaction.atomic():
+                    comment = serializer.save(created_day=datetime.now())
+                    CommentMention.sync_for([comment], created=True)
+                    publish_comment_event(comment.session_id, "created", serializer.data)
                 logger.info("[COMMENT CREATE] Bình luận(id=%s) đã được tạo thành công",
                             comment.id)
                 return Response(
@@ -43,15 +107,118 @@ class CommentCreateView(APIView):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Tạo nhiều bình luận trong một request (extension phát lại các pin tạo khi offline)
+class CommentBatchCreateView(APIView):
+    MAX_BATCH_SIZE = 500
+
+    def post(self, request):
+        items = request.data.get("comments") if isinstance(request.data, dict) else request.data
+        logger.info("[COMMENT BATCH] Bắt đầu tạo bình luận hàng loạt")
+        if not isinstance(items, list) or not items:
+            logger.warning("[COMMENT BATCH] Dữ liệu không phải danh sách bình luận")
+            return Response({"error": "Cần một danh sách bình luận"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_BATCH_SIZE:
+            logger.warning("[COMMENT BATCH] Lô quá lớn: %s bình luận", len(items))
+            return Response({"error": f"Tối đa {self.MAX_BATCH_SIZE} bình luận mỗi lần"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if get_request_user_id(request) is None:
+            return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            serializers = [CommentBatchItemSerializer(data=item) for item in items]
+            valid = [serializer.is_valid() for serializer in serializers]
+
+            # Kiểm tra khoá ngoại cho cả lô: mỗi bảng một truy vấn
+            session_ids = {s.validated_data["session"] for s, ok in zip(serializers, valid) if ok}
+            user_ids = {s.validated_data["user"] for s, ok in zip(serializers, valid) if ok}
+            session_workspaces = dict(FeedbackSession.objects.filter(id__in=session_ids)
+                                      .values_list("id", "canvas__project__workspace_id"))
+            existing_users = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+
+            results = []
+            pending = []
+            for index, (serializer, ok) in enumerate(zip(serializers, valid)):
+                if not ok:
+                    results.append({"index": index, "errors": serializer.errors})
+                    continue
+
+                data = dict(serializer.validated_data)
+                errors = {}
+                if data["session"] not in session_workspaces:
+                    errors["session"] = [f"Phiên phản hồi id={data['session']} không tồn tại"]
+                elif get_workspace_role(request, session_workspaces[data["session"]]) is None:
+                    errors["session"] = [f"Không có quyền bình luận trong phiên id={data['session']}"]
+                if data["user"] not in existing_users:
+                    errors["user"] = [f"Người dùng id={data['user']} không tồn tại"]
+                if errors:
+                    results.append({"index": index, "errors": errors})
+                    continue
+
+                data["session_id"] = data.pop("session")
+                data["user_id"] = data.pop("user")
+                # bulk_create không gọi save() nên phải tự tính ô lưới
+                data["tile_key"] = Comment.compute_tile_key(data.get("position_x"), data.get("position_y"))
+                result = {"index": index}
+                results.append(result)
+                pending.append((result, Comment(**data)))
+
+            if pending:
+                comments = [comment for _, comment in pending]
+                with transaction.atomic():
+                    Comment.objects.bulk_create(comments)
+                    if not connection.features.can_return_rows_from_bulk_insert:
+                        assign_inserted_ids(comments)
+                    # bulk_create không phát signal nên tự cập nhật bộ đếm của session
+                    # và tự phát sự kiện webhook
+                    record_comments_created(comments)
+                    emit_many("comment", "create", comments)
+                    CommentMention.sync_for(comments, created=True)
+                    transaction.on_commit(lambda: index_comments(comments))
+                    for comment, data in zip(comments, CommentSerializer(comments, many=True).data):
+                        publish_comment_event(comment.session_id, "created", data)
+                for result, comment in pending:
+                    result["id"] = comment.pk
+
+            failed = len(results) - len(pending)
+            logger.info("[COMMENT BATCH] Đã tạo %s/%s bình luận (%s lỗi)",
+                        len(pending), len(items), failed)
+
+            if not pending:
+                response_status = status.HTTP_400_BAD_REQUEST
+            elif failed:
+                response_status = status.HTTP_207_MULTI_STATUS
+            else:
+                response_status = status.HTTP_201_CREATED
+            return Response({"created": len(pending), "failed": failed, "results": results},
+                            status=response_status)
+
+        except Exception as e:
+            logger.exception("[COMMENT BATCH] Lỗi khi tạo bình luận hàng loạt: %s", str(e))
+            return Response({"error": f"Lỗi khi tạo bình luận hàng loạt: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class CommentDetailView(APIView):
     # Lấy chi tiết bình luận
     def get(self, request, id):
         logger.info("[COMMENT DETAIL] Yêu cầu lấy thông tin bình luận id=%s", id)
         try:
-            comment = get_object_or_404(Comment, id=id)
+            comment = get_object_or_404(comments_with_workspace(), id=id)
+            denied = workspace_access_denied(request, comment_workspace_id(comment))
+            if denied is not None:
+                return denied
+            etag = make_etag("comment", comment.id, comment.updated_day.isoformat())
+            cached = not_modified(request, etag, comment.updated_day)
+            if cached is not None:
+                logger.info("[COMMENT DETAIL] Bình luận(id=%s) không đổi, trả về 304", comment.id)
+                return cached
+
             serializer = CommentSerializer(comment, context={"request": request})
             logger.info("[COMMENT DETAIL] Bình luận(id=%s) lấy thành công", comment.id)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK),
+                                   etag, comment.updated_day)
         except Exception as e:
             logger.exception("[COMMENT DETAIL] Lỗi khi lấy bình luận id=%s: %s", id, str(e))
             return Response({"error": f"Lỗi khi lấy bình luận: {str(e)}"},
@@ -61,10 +228,31 @@ class CommentDetailView(APIView):
     def put(self, request, id):
         logger.info("[COMMENT UPDATE] Yêu cầu cập nhật bình luận id=%s", id)
         try:
-            comment = get_object_or_404(Comment, id=id)
+            comment = get_object_or_404(comments_with_workspace(), id=id)
+            denied = workspace_access_denied(request, comment_workspace_id(comment))
+            if denied is not None:
+                return denied
             serializer = CommentSerializer(comment, data=request.data, partial=True)
             if serializer.is_valid():
-                updated = serializer.save()
+                target = serializer.validated_data.get("session")
+                if target is not None and target.id != comment.session_id:
+                    denied = workspace_access_denied(request, session_workspace_id(target.id))
+                    if denied is not None:
+                        return denied
+                previous_session_id = comment.session_id
+                with transaction.atomic():
+                    updated = serializer.save()
+                    if updated.session_id != previous_session_id:
+                        # Bình luận chuyển sang session khác: với session cũ nó như bị xoá (ghi
+                        # tombstone cho ?since=), tombstone cũ ở session mới (nếu từng chuyển đi
+                        # rồi quay lại) được bỏ; tính lại bộ đếm của cả hai
+                        CommentTombstone.objects.create(comment_id=updated.id, session_id=previous_session_id)
+                        CommentTombstone.objects.filter(comment_id=updated.id,
+                                                        session_id=updated.session_id).delete()
+                        refresh_session_stats([previous_session_id, updated.session_id])
+                    if {"mention_user", "tag_user"} & set(serializer.validated_data):
+                        CommentMention.sync_for([updated])
+                    publish_comment_event(updated.session_id, "updated", serializer.data)
                 logger.info("[COMMENT UPDATE] Bình luận(id=%s) đã cập nhật thành công", updated.id)
                 return Response(
                     {"message": "Bình luận đã được cập nhật thành công", **serializer.data},
@@ -81,8 +269,13 @@ class CommentDetailView(APIView):
     def delete(self, request, id):
         logger.info("[COMMENT DELETE] Yêu cầu xóa bình luận id=%s", id)
         try:
-            comment = get_object_or_404(Comment, id=id)
-            comment.delete()
+            comment = get_object_or_404(comments_with_workspace(), id=id)
+            denied = workspace_access_denied(request, comment_workspace_id(comment))
+            if denied is not None:
+                return denied
+            with transaction.atomic():
+                comment.delete()
+                publish_comment_event(comment.session_id, "deleted", {"id": id})
             logger.info("[COMMENT DELETE] Bình luận(id=%s) đã được xóa thành công", id)
             return Response({"message": f"Bình luận id={id} đã được xóa thành công"},
                             status=status.HTTP_204_NO_CONTENT)
@@ -97,18 +290,24 @@ class CommentReplyView(APIView):
     def post(self, request, id):
         logger.info("[COMMENT REPLY] Yêu cầu trả lời bình luận cha id=%s", id)
         try:
-            parent_comment = get_object_or_404(Comment, id=id)
+            parent_comment = get_object_or_404(comments_with_workspace(), id=id)
+            denied = workspace_access_denied(request, comment_workspace_id(parent_comment))
+            if denied is not None:
+                return denied
             data = request.data.copy()
 
             # Gán session từ bình luận cha
-            data["session_id"] = parent_comment.session_id
+            data["session"] = parent_comment.session_id
             data["created_day"] = datetime.now()
-            # lưu quan hệ cha-con:
-            data["parent_id"] = parent_comment.id  
+            # lưu quan hệ cha-con (root/depth được tính khi save)
+            data["parent"] = parent_comment.id
 
             serializer = CommentSerializer(data=data)
             if serializer.is_valid():
-                reply = serializer.save()
+                with transaction.atomic():
+                    reply = serializer.save()
+                    CommentMention.sync_for([reply], created=True)
+                    publish_comment_event(reply.session_id, "created", serializer.data)
                 logger.info("[COMMENT REPLY] Bình luận con(id=%s) đã được tạo thành công, thuộc bình luận cha id=%s",
                             reply.id, parent_comment.id)
                 return Response(
@@ -129,26 +328,85 @@ class CommentReplyView(APIView):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Lấy toàn bộ thread chứa một bình luận, dựng thành cây
+class CommentThreadView(APIView):
+    def get(self, request, id):
+        logger.info("[COMMENT THREAD] Yêu cầu lấy thread của bình luận id=%s", id)
+        try:
+            row = (Comment.objects.filter(id=id)
+                   .values_list("id", "root_id", "session__canvas__project__workspace_id").first())
+            if row is None:
+                logger.warning("[COMMENT THREAD] Không tìm thấy bình luận id=%s", id)
+                return Response({"error": "Không tìm thấy bình luận"}, status=status.HTTP_404_NOT_FOUND)
+            denied = workspace_access_denied(request, row[2])
+            if denied is not None:
+                return denied
+            root_id = row[1] or row[0]
+
+            # Một truy vấn theo index (root, created_day) cho cả thread
+            comments = (Comment.objects.filter(Q(id=root_id) | Q(root_id=root_id))
+                        .order_by("created_day", "id"))
+            serializer = CommentSerializer(comments, many=True, context={"request": request})
+
+            # Dựng cây trong một lượt duyệt, không phụ thuộc thứ tự cha/con
+            nodes = {}
+            tree = None
+            for item in serializer.data:
+                node = nodes.setdefault(item["id"], {"replies": []})
+                node.update(item)
+                if item["id"] == root_id:
+                    tree = node
+                else:
+                    nodes.setdefault(item["parent"], {"replies": []})["replies"].append(node)
+
+            logger.info("[COMMENT THREAD] Thread gốc id=%s có %s bình luận", root_id, len(nodes))
+            return Response(tree, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.exception("[COMMENT THREAD] Lỗi khi lấy thread của bình luận id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi lấy thread: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # Mention người dùng khác
 class CommentMentionView(APIView):
     def post(self, request, id):
         logger.info("[COMMENT MENTION] Yêu cầu mention user trong bình luận id=%s", id)
         try:
-            comment = get_object_or_404(Comment, id=id)
-            mentioned_user = request.data.get("user")
+            comment = get_object_or_404(comments_with_workspace(), id=id)
+            denied = workspace_access_denied(request, comment_workspace_id(comment))
+            if denied is not None:
+                return denied
+            # Nhận một user ("user") hoặc danh sách ("mention_user")
+            mentioned = request.data.get("user") or request.data.get("mention_user")
+            mentioned_users = mentioned if isinstance(mentioned, list) else [mentioned]
+            try:
+                mentioned_users = [int(user_id) for user_id in mentioned_users if user_id not in (None, "")]
+            except (TypeError, ValueError):
+                mentioned_users = []
 
-            if not mentioned_user:
+            if not mentioned_users:
                 logger.warning("[COMMENT MENTION] Thiếu user_id khi mention trong comment id=%s", id)
                 return Response(
                     {"error": "Thiếu user_id để mention"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+            # Ghi vào mention_user rồi đồng bộ bảng mention
+            current = comment.mention_user if isinstance(comment.mention_user, list) else []
+            comment.mention_user = current + [user_id for user_id in mentioned_users if user_id not in current]
+            with transaction.atomic():
+                comment.save(update_fields=["mention_user", "updated_day"])
+                CommentMention.sync_for([comment])
+
             logger.info("[COMMENT MENTION] User id=%s đã được mention trong comment id=%s",
-                        mentioned_user, comment.id)
+                        mentioned_users, comment.id)
 
             return Response(
-                {"message": f"Đã mention user {mentioned_user} trong comment {comment.id}"},
+                {
+                    "message": f"Đã mention user {mentioned_users} trong comment {comment.id}",
+                    "mention_user": comment.mention_user
+                },
                 status=status.HTTP_200_OK
             )
 
@@ -160,29 +418,286 @@ class CommentMentionView(APIView):
             )
 
 
-# Lấy tất cả bình luận của một phiên
+# Hộp thư mention của một người dùng (mới nhất trước, phân trang theo con trỏ)
+class UserMentionListView(APIView):
+    pagination = KeysetPagination(ordering=("-created_day", "-id"))
+
+    def get(self, request, id):
+        logger.info("[USER MENTIONS] Yêu cầu lấy mention của user id=%s", id)
+        try:
+            # Hộp thư mention chỉ chủ nhân đọc được
+            user_id = get_request_user_id(request)
+            if user_id is None:
+                return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+            if user_id != id:
+                return Response({"error": "Không có quyền xem mention của người dùng khác"},
+                                status=status.HTTP_403_FORBIDDEN)
+
+            # Chỉ giữ mention trong các workspace người gọi còn thuộc về (sở hữu hoặc là thành viên)
+            workspace_field = "comment__session__canvas__project__workspace"
+            mentions = (CommentMention.objects.filter(user_id=id)
+                        .filter(Q(**{f"{workspace_field}__owner_id": user_id})
+                                | Q(**{f"{workspace_field}_id__in": member_workspace_ids(user_id)}))
+                        .select_related("comment"))
+            try:
+                page, next_cursor = self.pagination.paginate(mentions, request)
+            except ValueError as e:
+                logger.warning("[USER MENTIONS] Tham số phân trang không hợp lệ: %s", str(e))
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            comments = CommentSerializer([mention.comment for mention in page], many=True,
+                                         context={"request": request}).data
+            results = [
+                {"mentioned_day": mention.created_day, "comment": comment}
+                for mention, comment in zip(page, comments)
+            ]
+            logger.info("[USER MENTIONS] Trả về %s mention cho user id=%s", len(results), id)
+            return Response({"results": results, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.exception("[USER MENTIONS] Lỗi khi lấy mention của user id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi lấy mention: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Tìm kiếm bình luận theo từ khoá trong một session/project/workspace
+class CommentSearchView(APIView):
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+    SCOPES = {
+        "session": "session_id",
+        "project": "session__canvas__project_id",
+        "workspace": "session__canvas__project__workspace_id",
+    }
+
+    def get(self, request):
+        query = (request.query_params.get("q") or "").strip()
+        logger.info("[COMMENT SEARCH] Yêu cầu tìm bình luận: q='%s'", query)
+        if not query:
+            return Response({"error": "Thiếu từ khoá tìm kiếm (q)"}, status=status.HTTP_400_BAD_REQUEST)
+
+        scope = {field: request.query_params.get(param)
+                 for param, field in self.SCOPES.items() if request.query_params.get(param)}
+        if not scope:
+            return Response({"error": "Cần ít nhất một trong session, project, workspace"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            offset = int(request.query_params.get("offset", 0))
+            limit = min(int(request.query_params.get("limit", self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+            scope = {field: int(value) for field, value in scope.items()}
+        except ValueError:
+            return Response({"error": "offset, limit và phạm vi tìm kiếm phải là số nguyên"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if offset < 0 or limit < 1:
+            return Response({"error": "offset phải >= 0 và limit phải > 0"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Kết quả phải thoả mọi điều kiện phạm vi, nên chỉ cần quyền trên workspace của một trong số đó
+            if "session__canvas__project__workspace_id" in scope:
+                workspace_id = scope["session__canvas__project__workspace_id"]
+            elif "session__canvas__project_id" in scope:
+                workspace_id = (Project.objects.filter(id=scope["session__canvas__project_id"])
+                                .values_list("workspace_id", flat=True).first())
+            else:
+                workspace_id = session_workspace_id(scope["session_id"])
+            denied = workspace_access_denied(request, workspace_id)
+            if denied is not None:
+                return denied
+
+            matches, has_more = search_comments(Comment.objects.filter(**scope), query, offset, limit)
+            comments = CommentSerializer([comment for comment, _ in matches], many=True,
+                                         context={"request": request}).data
+            results = [{"score": score, "comment": comment}
+                       for (_, score), comment in zip(matches, comments)]
+            logger.info("[COMMENT SEARCH] Tìm thấy %s kết quả cho q='%s' (%s)", len(results), query, scope)
+            return Response({"results": results, "next_offset": offset + limit if has_more else None},
+                            status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.exception("[COMMENT SEARCH] Lỗi khi tìm bình luận q='%s': %s", query, str(e))
+            return Response({"error": f"Lỗi khi tìm bình luận: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Đọc tham số bbox=x0,y0,x1,y1 thành (x0, y0, x1, y1) đã chuẩn hoá min/max
+def parse_bbox(raw):
+    try:
+        x0, y0, x1, y1 = (float(v) for v in raw.split(","))
+    except ValueError:
+        raise ValueError("bbox phải có dạng x0,y0,x1,y1")
+    if not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+        raise ValueError("bbox phải có dạng x0,y0,x1,y1")
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+# Đọc tham số since: thời điểm ISO (updated_day) hoặc token next_since của lần đồng bộ trước.
+# Token gồm vị trí (updated_day, id) trong bình luận và (deleted_day, id) trong tombstone
+def parse_since(raw):
+    moment = parse_datetime(raw)
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return [moment, 0], [moment, 0]
+    values = decode_cursor(raw, 4)
+    if not isinstance(values[0], datetime) or not isinstance(values[2], datetime):
+        raise ValueError("since không hợp lệ")
+    return values[:2], values[2:]
+
+
+# Lấy bình luận của một phiên (phân trang theo con trỏ)
 class SessionCommentListView(APIView):
+    pagination = KeysetPagination(ordering=("-created_day", "-id"))
+    changes = KeysetPagination(ordering=("updated_day", "id"), default_limit=200, max_limit=1000)
+    deletions = KeysetPagination(ordering=("deleted_day", "id"), default_limit=200, max_limit=1000)
+
+    # Chế độ đồng bộ: chỉ trả bình luận tạo/sửa và id bị xoá kể từ token since. Token cũ hơn
+    # thời hạn giữ tombstone thì không biết hết những gì đã bị xoá: trả reset=true và đồng bộ lại
+    # từ đầu (client bỏ dữ liệu cũ), phần xoá tính từ thời điểm hiện tại
+    def get_changes(self, request, id, since):
+        changed_after, deleted_after = parse_since(since)
+        reset = deleted_after[0] < CommentTombstone.retention_cutoff()
+        if reset:
+            changed_after, deleted_after = None, [timezone.now(), 0]
+        limit = self.changes.get_limit(request)
+
+        comments = Comment.objects.filter(session_id=id)
+        if changed_after is not None:
+            comments = self.changes.filter_after(comments, changed_after)
+        changed = list(comments.order_by(*self.changes.ordering)[:limit + 1])
+        deleted = list(self.deletions.filter_after(CommentTombstone.objects.filter(session_id=id), deleted_after)
+                       .order_by(*self.deletions.ordering)[:limit + 1])
+        has_more = len(changed) > limit or len(deleted) > limit
+        changed, deleted = changed[:limit], deleted[:limit]
+
+        if changed:
+            changed_after = self.changes.position(changed[-1])
+        elif changed_after is None:
+            changed_after = [deleted_after[0], 0]
+        if deleted:
+            deleted_after = self.deletions.position(deleted[-1])
+
+        serializer = CommentSerializer(changed, many=True, context={"request": request})
+        logger.info("[SESSION COMMENTS] Đồng bộ session id=%s: %s thay đổi, %s bị xoá",
+                    id, len(changed), len(deleted))
+        return Response(
+            {
+                "changes": serializer.data,
+                "deleted": [tombstone.comment_id for tombstone in deleted],
+                "next_since": encode_cursor([*changed_after, *deleted_after]),
+                "has_more": has_more,
+                "reset": reset
+            },
+            status=status.HTTP_200_OK
+        )
+
+    # Chỉ giữ các pin nằm trong viewport: lọc theo ô lưới (index) rồi theo toạ độ chính xác
+    def filter_bbox(self, queryset, raw):
+        x0, y0, x1, y1 = parse_bbox(raw)
+        tile_keys = Comment.tile_keys_for_bbox(x0, y0, x1, y1)
+        if tile_keys is not None:
+            queryset = queryset.filter(tile_key__in=tile_keys)
+        return queryset.filter(position_x__gte=x0, position_x__lte=x1,
+                               position_y__gte=y0, position_y__lte=y1)
+
     def get(self, request, id):
-        logger.info("[SESSION COMMENTS] Yêu cầu lấy tất cả bình luận của session id=%s", id)
+        logger.info("[SESSION COMMENTS] Yêu cầu lấy bình luận của session id=%s", id)
         try:
-            # Kiểm tra session tồn tại
-            session = get_object_or_404(Comment, id=id)
-            logger.info("[SESSION COMMENTS] Session(id=%s, title='%s') tồn tại",
-                        session.id, getattr(session, "title", ""))
+            # Kiểm tra session tồn tại và lấy workspace của nó để phân quyền
+            workspace_id = session_workspace_id(id)
+            if workspace_id is None:
+                logger.warning("[SESSION COMMENTS] Không tìm thấy session id=%s", id)
+                return Response({"error": "Không tìm thấy phiên phản hồi"},
+                                status=status.HTTP_404_NOT_FOUND)
+            denied = workspace_access_denied(request, workspace_id)
+            if denied is not None:
+                return denied
 
-            # Lấy tất cả comment thuộc session
-            comments = Comment.objects.filter(session_id=id).order_by("-created_day")
-            logger.info("[SESSION COMMENTS] Tìm thấy %s bình luận trong session id=%s",
-                        comments.count(), id)
+            # Validator của danh sách: lần sửa và lần xoá gần nhất trong session
+            # (hai truy vấn MAX trên index, không serialize, không COUNT)
+            last_updated = Comment.objects.filter(session_id=id).aggregate(value=Max("updated_day"))["value"]
+            last_deleted = (CommentTombstone.objects.filter(session_id=id)
+                            .aggregate(value=Max("deleted_day"))["value"])
+            last_modified = max(filter(None, (last_updated, last_deleted)), default=None)
+            etag = make_etag("session-comments", id, last_updated, last_deleted, request.get_full_path())
+            cached = not_modified(request, etag, last_modified)
+            if cached is not None:
+                logger.info("[SESSION COMMENTS] Bình luận của session id=%s không đổi, trả về 304", id)
+                return cached
 
-            serializer = CommentSerializer(comments, many=True, context={"request": request})
-            logger.info("[SESSION COMMENTS] Trả về danh sách bình luận cho session id=%s", id)
+            # Lấy một trang bình luận theo index (session_id, created_day, id)
+            comments = Comment.objects.filter(session_id=id)
+            try:
+                since = request.query_params.get("since")
+                if since:
+                    return with_validators(self.get_changes(request, id, since), etag, last_modified)
+                bbox = request.query_params.get("bbox")
+                if bbox:
+                    comments = self.filter_bbox(comments, bbox)
+                page, next_cursor = self.pagination.paginate(comments, request)
+            except ValueError as e:
+                logger.warning("[SESSION COMMENTS] Tham số phân trang không hợp lệ: %s", str(e))
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = CommentSerializer(page, many=True, context={"request": request})
+            logger.info("[SESSION COMMENTS] Trả về %s bình luận cho session id=%s (next_cursor=%s)",
+                        len(page), id, next_cursor)
 
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(
+                Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK),
+                etag, last_modified
+            )
 
         except Exception as e:
             logger.exception("[SESSION COMMENTS] Lỗi khi lấy bình luận của session id=%s: %s", id, str(e))
             return Response(
                 {"error": f"Lỗi khi lấy bình luận: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+# Luồng sự kiện bình luận trực tiếp của một phiên (Server-Sent Events).
+# View bất đồng bộ chạy dưới ASGI: mỗi kết nối giữ một subscription trên broker,
+# một lần ghi bình luận được phát tới mọi tab đang xem thay vì mỗi tab tự polling
+class SessionCommentStreamView(View):
+    HEARTBEAT_SECONDS = 15
+
+    async def get(self, request, id):
+        logger.info("[COMMENT STREAM] Mở luồng sự kiện cho session id=%s", id)
+        # Dưới WSGI, Django phải đọc hết iterator async trước khi trả response: luồng không bao
+        # giờ kết thúc sẽ giữ worker mãi mãi, nên chỉ phục vụ khi chạy bằng ASGI
+        if not isinstance(request, ASGIRequest):
+            logger.warning("[COMMENT STREAM] Server không chạy ASGI, từ chối luồng session id=%s", id)
+            return JsonResponse({"error": "Luồng sự kiện cần server ASGI"}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        # Xác thực trước khi tra session để người chưa đăng nhập không dò được id nào tồn tại
+        if get_request_user_id(request) is None:
+            return JsonResponse({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+        workspace_id = await sync_to_async(session_workspace_id)(id)
+        if workspace_id is None:
+            logger.warning("[COMMENT STREAM] Không tìm thấy session id=%s", id)
+            return JsonResponse({"error": "Không tìm thấy phiên phản hồi"}, status=status.HTTP_404_NOT_FOUND)
+        if await sync_to_async(get_workspace_role)(request, workspace_id) is None:
+            return JsonResponse({"error": "Không có quyền truy cập workspace này"}, status=status.HTTP_403_FORBIDDEN)
+
+        response = StreamingHttpResponse(self.stream(id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, id):
+        broker = get_broker()
+        subscription = broker.subscribe(session_channel(id))
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=self.HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Dòng chú thích SSE giữ kết nối sống qua proxy
+                    yield ": keep-alive\n\n"
+                    continue
+                data = json.dumps(message, cls=DjangoJSONEncoder)
+                yield f"event: {message['type']}\ndata: {data}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+            logger.info("[COMMENT STREAM] Đóng luồng sự kiện của session id=%s", id)
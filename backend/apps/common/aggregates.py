@@ -0,0 +1,14 @@
+from django.db.models import OuterRef, Subquery
+
+
+# Một giá trị tổng hợp (Count/Sum/Max...) trên các dòng con, dưới dạng subquery tương quan
+# với dòng cha. Dùng trong annotate() để lấy nhiều số liệu trong một câu SQL mà không JOIN
+# nhân bản các dòng con với nhau
+def subquery_aggregate(queryset, parent_field, aggregate):
+    return Subquery(
+        queryset.filter(**{parent_field: OuterRef("pk")})
+        .order_by()
+        .values(parent_field)
+        .annotate(value=aggregate)
+        .values("value")[:1]
+    )
@@ -0,0 +1,22 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+# Người gọi API: id của apps.users.User trong access token (header Authorization: Bearer ...).
+# Token được cấp bằng RefreshToken.for_user(User), còn AUTH_USER_MODEL vẫn là user mặc định
+# của Django, nên đọc thẳng claim thay vì qua request.user. Kết quả được nhớ trên request
+def get_request_user_id(request):
+    if hasattr(request, "_caller_user_id"):
+        return request._caller_user_id
+
+    user_id = None
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    parts = header.split()
+    if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+        try:
+            user_id = AccessToken(parts[1]).get(api_settings.USER_ID_CLAIM)
+        except TokenError:
+            user_id = None
+    request._caller_user_id = int(user_id) if user_id is not None else None
+    return request._caller_user_id
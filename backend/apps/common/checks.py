@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backend chỉ sống trong một process: xoá/tăng version ở worker này không tới được worker khác
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+# Phân quyền (apps.common.permissions), tập thành viên (apps.workspacemembers.membership) và
+# bảng định tuyến webhook dựa vào việc vô hiệu hoá cache được mọi process nhìn thấy
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [Error(
+            f"CACHES['default'] dùng {backend}, không chia sẻ giữa các process",
+            hint="Dùng Redis (REDIS_URL), Memcached hoặc DatabaseCache",
+            id='common.E001',
+        )]
+    return []
@@ -0,0 +1,44 @@
+import hashlib
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# GET có điều kiện (ETag / Last-Modified) dùng chung cho các view chi tiết và danh sách.
+# Validator được tính từ updated_day (hoặc max updated_day của danh sách) trước khi
+# serialize, nên request không đổi chỉ tốn một truy vấn nhỏ và trả về 304 rỗng
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _weak(tag):
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """Trả về Response 304 nếu bản client đang giữ còn mới, ngược lại None."""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match and etag:
+        # If-None-Match được ưu tiên hơn If-Modified-Since (RFC 9110)
+        tags = parse_etags(if_none_match)
+        if "*" in tags or _weak(etag) in {_weak(tag) for tag in tags}:
+            return with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        return None
+
+    if_modified_since = request.META.get("HTTP_IF_MODIFIED_SINCE")
+    if if_modified_since and last_modified:
+        since = parse_http_date_safe(if_modified_since)
+        if since is not None and int(last_modified.timestamp()) <= since:
+            return with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    return None
+
+
+def with_validators(response, etag=None, last_modified=None):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
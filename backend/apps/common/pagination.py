@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(values):
+    """Mã hoá danh sách giá trị (int/str/datetime) thành chuỗi con trỏ mờ."""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Giải mã con trỏ gồm đúng `size` giá trị; chuỗi được đọc lại thành datetime."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("cursor không hợp lệ")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("cursor không hợp lệ")
+
+    decoded = []
+    for value in values:
+        if isinstance(value, str):
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError("cursor không hợp lệ")
+            value = parsed
+        decoded.append(value)
+    return decoded
+
+
+def keyset_after(ordering, values):
+    """Điều kiện "đứng sau bộ giá trị `values`" theo thứ tự `ordering`.
+
+    (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y), mở rộng cho n cột.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+# Phân trang theo con trỏ (keyset): lọc theo giá trị của bản ghi cuối trang trước
+# thay vì OFFSET/COUNT(*), nên mỗi trang chỉ là một lần quét ngắn trên index
+class KeysetPagination:
+    def __init__(self, ordering=("-created_day", "-id"), default_limit=50, max_limit=200):
+        self.ordering = ordering
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+
+    def get_limit(self, request):
+        raw = request.query_params.get("limit")
+        if raw in (None, ""):
+            return self.default_limit
+        try:
+            limit = int(raw)
+        except (TypeError, ValueError):
+            raise ValueError("limit phải là số nguyên")
+        if limit < 1:
+            raise ValueError("limit phải lớn hơn 0")
+        return min(limit, self.max_limit)
+
+    def position(self, obj):
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, obj):
+        return encode_cursor(self.position(obj))
+
+    def decode_cursor(self, cursor):
+        return decode_cursor(cursor, len(self.ordering))
+
+    def filter_after(self, queryset, values):
+        return queryset.filter(keyset_after(self.ordering, values))
+
+    def paginate(self, queryset, request):
+        """Trả về (danh sách bản ghi của trang, next_cursor hoặc None)."""
+        limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            queryset = self.filter_after(queryset, self.decode_cursor(cursor))
+
+        # Lấy dư 1 bản ghi để biết còn trang sau hay không, không cần COUNT(*)
+        items = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.encode_cursor(items[-1])
+        return items, next_cursor
@@ -0,0 +1,99 @@
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from rest_framework import status
+from rest_framework.response import Response
+from apps.workspacemembers.models import WorkspaceMember
+from apps.workspaces.models import Workspace
+from .auth import get_request_user_id
+
+# Phân quyền theo workspace: (user, workspace) -> role.
+# Thứ tự tra: memo trên request -> cache dùng chung -> DB. Cache lưu theo user một dict
+# {workspace_id: (version, role)}; mỗi workspace có một version, đổi version là mọi role
+# đã cache của workspace đó hết hiệu lực mà không cần biết những user nào đang cache.
+# Version và dict của user được đọc bằng một lần get_many, nên khi cache trúng việc
+# phân quyền chỉ tốn một lượt tới cache cho mỗi request
+
+ROLE_OWNER = "owner"
+ROLE_ADMIN = "admin"
+ROLE_MEMBER = "member"
+MANAGER_ROLES = (ROLE_OWNER, ROLE_ADMIN)
+
+
+def workspace_version_key(workspace_id):
+    return f"workspaces:membership_version:{workspace_id}"
+
+
+def user_roles_key(user_id):
+    return f"workspaces:roles:{user_id}"
+
+
+def bump_workspace_versions(*workspace_ids):
+    cache.set_many({workspace_version_key(workspace_id): uuid.uuid4().hex for workspace_id in set(workspace_ids)},
+                   timeout=None)
+
+
+# Role của user trong workspace từ DB, một truy vấn: owner của workspace luôn là "owner",
+# còn lại theo dòng workspacemembers (None nếu không phải thành viên)
+def load_workspace_role(user_id, workspace_id):
+    member_role = WorkspaceMember.objects.filter(workspace=OuterRef("pk"), user_id=user_id).values("role")[:1]
+    row = (Workspace.objects.filter(pk=workspace_id)
+           .annotate(member_role=Subquery(member_role))
+           .values_list("owner_id", "member_role")
+           .first())
+    if row is None:
+        return None
+    owner_id, role = row
+    if owner_id == user_id:
+        return ROLE_OWNER
+    # WorkspaceMemberRoleUpdateView lưu "Owner"/"Admin"/"Member"
+    return role.lower() if role else None
+
+
+def get_workspace_role(request, workspace_id):
+    user_id = get_request_user_id(request)
+    if user_id is None or workspace_id is None:
+        return None
+
+    memo = getattr(request, "_workspace_roles", None)
+    if memo is None:
+        memo = {}
+        request._workspace_roles = memo
+    if workspace_id in memo:
+        return memo[workspace_id]
+
+    version_key, roles_key = workspace_version_key(workspace_id), user_roles_key(user_id)
+    cached = cache.get_many([version_key, roles_key])
+    version = cached.get(version_key)
+    roles = cached.get(roles_key) or {}
+    entry = roles.get(workspace_id)
+
+    if version is not None and entry is not None and entry[0] == version:
+        role = entry[1]
+    else:
+        if version is None:
+            # Chưa có (hoặc bị đẩy khỏi cache): tạo version mới, không bao giờ trùng bản cũ
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(version_key)
+        # Version được đọc trước khi truy vấn DB: nếu thành viên đổi trong lúc này thì
+        # version bị tăng và bản ghi vừa lưu tự hết hiệu lực ở lần đọc sau
+        role = load_workspace_role(user_id, workspace_id)
+        roles[workspace_id] = (version, role)
+        cache.set(roles_key, roles, settings.WORKSPACE_ROLE_CACHE_SECONDS)
+
+    memo[workspace_id] = role
+    return role
+
+
+def workspace_access_denied(request, workspace_id, roles=None):
+    """Trả về Response 401/403 nếu người gọi không có quyền trên workspace, ngược lại None.
+
+    `roles` giới hạn các role được phép (mặc định: mọi thành viên).
+    """
+    if get_request_user_id(request) is None:
+        return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+    role = get_workspace_role(request, workspace_id)
+    if role is None or (roles is not None and role not in roles):
+        return Response({"error": "Không có quyền truy cập workspace này"}, status=status.HTTP_403_FORBIDDEN)
+    return None
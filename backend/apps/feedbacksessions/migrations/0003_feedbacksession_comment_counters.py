@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counters(apps, schema_editor):
+    FeedbackSession = apps.get_model('feedbacksessions', 'FeedbackSession')
+    Comment = apps.get_model('comments', 'Comment')
+    comments = Comment.objects.filter(session_id=OuterRef('pk')).order_by().values('session_id')
+    FeedbackSession.objects.update(
+        comment_count=Coalesce(Subquery(comments.annotate(value=Count('id')).values('value'),
+                                        output_field=IntegerField()), 0),
+        commenter_count=Coalesce(Subquery(comments.annotate(value=Count('user_id', distinct=True))
+                                          .values('value'), output_field=IntegerField()), 0),
+        last_comment_day=Subquery(comments.annotate(value=Max('created_day')).values('value')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedbacksessions', '0002_feedbacksession_user'),
+        ('comments', '0009_commenttombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbacksession',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='feedbacksession',
+            name='commenter_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='feedbacksession',
+            name='last_comment_day',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_comment_counters, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,10 @@ class FeedbackSession(models.Model):
     session_type = models.CharField(max_length=20, choices=SESSION_TYPE_CHOICES, default='canvas')
     created_day = models.DateTimeField(auto_now_add=True)
     updated_day = models.DateTimeField(auto_now=True)
+    # Bộ đếm phi chuẩn hoá, cập nhật cùng transaction với bình luận (apps.comments.counters)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    commenter_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_day = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'feedbacksessions'
@@ -5,9 +5,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max, Sum
 from datetime import datetime
+from apps.common.conditional import make_etag, not_modified, with_validators
+from apps.common.permissions import workspace_access_denied
+from apps.projects.models import Project
 from .models import FeedbackSession
-from apps.canvas.models import Canvas
 from .serializers import FeedbackSessionSerializer
 
 # Create your views here
@@ -24,6 +27,11 @@ class FeedbackSessionCreateView(APIView):
         try:
             serializer = FeedbackSessionSerializer(data=request.data)
             if serializer.is_valid():
+                canvas = serializer.validated_data["canvas"]
+                workspace_id = Project.objects.filter(pk=canvas.project_id).values_list("workspace_id", flat=True).first()
+                denied = workspace_access_denied(request, workspace_id)
+                if denied is not None:
+                    return denied
                 session = serializer.save(created_day=datetime.now())
                 success_message = f"Phiên phản hồi id={session.id} đã được tạo thành công"
 
@@ -52,11 +60,24 @@ class FeedbackSessionDetailView(APIView):
     def get(self, request, id):
         logger.info("[SESSION DETAIL] Yêu cầu lấy thông tin phiên id=%s", id)
         try:
-            session = get_object_or_404(FeedbackSession, id=id)
+            # Lấy kèm canvas và project (cùng truy vấn) để biết workspace khi phân quyền
+            session = get_object_or_404(FeedbackSession.objects.select_related("canvas__project"), id=id)
+            denied = workspace_access_denied(request, session.canvas.project.workspace_id)
+            if denied is not None:
+                return denied
+            etag = make_etag("session", session.id, session.updated_day.isoformat(),
+                             session.comment_count, session.commenter_count, session.last_comment_day)
+            last_modified = max(filter(None, (session.updated_day, session.last_comment_day)))
+            cached = not_modified(request, etag, last_modified)
+            if cached is not None:
+                logger.info("[SESSION DETAIL] Phiên(id=%s) không đổi, trả về 304", session.id)
+                return cached
+
             serializer = FeedbackSessionSerializer(session)
             logger.info("[SESSION DETAIL] Phiên(id=%s, title='%s') lấy thành công",
                         session.id, getattr(session, "title", ""))
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK),
+                                   etag, last_modified)
         except Exception as e:
             logger.exception("[SESSION DETAIL] Lỗi khi lấy phiên id=%s: %s", id, str(e))
             return Response({"error": f"Lỗi khi lấy phiên phản hồi: {str(e)}"},
@@ -66,9 +87,19 @@ class FeedbackSessionDetailView(APIView):
     def put(self, request, id):
         logger.info("[SESSION UPDATE] Yêu cầu cập nhật phiên id=%s", id)
         try:
-            session = get_object_or_404(FeedbackSession, id=id)
+            session = get_object_or_404(FeedbackSession.objects.select_related("canvas__project"), id=id)
+            denied = workspace_access_denied(request, session.canvas.project.workspace_id)
+            if denied is not None:
+                return denied
             serializer = FeedbackSessionSerializer(session, data=request.data, partial=True)
             if serializer.is_valid():
+                target = serializer.validated_data.get("canvas")
+                if target is not None and target.project_id != session.canvas.project_id:
+                    workspace_id = (Project.objects.filter(pk=target.project_id)
+                                    .values_list("workspace_id", flat=True).first())
+                    denied = workspace_access_denied(request, workspace_id)
+                    if denied is not None:
+                        return denied
                 updated = serializer.save()
                 logger.info("[SESSION UPDATE] Phiên(id=%s, title='%s') đã cập nhật thành công",
                             updated.id, getattr(updated, "title", ""))
@@ -87,7 +118,10 @@ class FeedbackSessionDetailView(APIView):
     def delete(self, request, id):
         logger.info("[SESSION DELETE] Yêu cầu xóa phiên id=%s", id)
         try:
-            session = get_object_or_404(FeedbackSession, id=id)
+            session = get_object_or_404(FeedbackSession.objects.select_related("canvas__project"), id=id)
+            denied = workspace_access_denied(request, session.canvas.project.workspace_id)
+            if denied is not None:
+                return denied
             session_title = getattr(session, "title", "")
             session.delete()
             logger.info("[SESSION DELETE] Phiên(id=%s, title='%s') đã được xóa thành công",
@@ -105,19 +139,31 @@ class ProjectFeedbackSessionListView(APIView):
     def get(self, request, id):
         logger.info("[PROJECT SESSIONS] Yêu cầu lấy tất cả phiên phản hồi của project id=%s", id)
         try:
-            # Lấy tất cả canvas thuộc project
-            canvas_ids = Canvas.objects.filter(project_id=id).values_list("id", flat=True)
-            logger.info("[PROJECT SESSIONS] Tìm thấy %s canvas thuộc project id=%s",
-                        len(canvas_ids), id)
+            workspace_id = Project.objects.filter(pk=id).values_list("workspace_id", flat=True).first()
+            if workspace_id is None:
+                return Response({"error": f"Project id={id} không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
+            denied = workspace_access_denied(request, workspace_id)
+            if denied is not None:
+                return denied
+
+            # Lấy tất cả phiên phản hồi thuộc các canvas của project (một truy vấn JOIN)
+            sessions = FeedbackSession.objects.filter(canvas__project_id=id)
 
-            # Lấy tất cả phiên phản hồi thuộc các canvas này
-            sessions = FeedbackSession.objects.filter(canvas_id__in=canvas_ids)
-            logger.info("[PROJECT SESSIONS] Tìm thấy %s phiên phản hồi trong project id=%s",
-                        sessions.count(), id)
+            # Validator: số phiên, lần sửa gần nhất và bộ đếm bình luận, trong một truy vấn tổng hợp.
+            # Không gửi Last-Modified: xoá hoặc chuyển một phiên sang project khác không làm
+            # max(updated_day) thay đổi, chỉ ETag (có số phiên) mới nhận ra
+            summary = sessions.aggregate(total=Count("id"), last_updated=Max("updated_day"),
+                                         comments=Sum("comment_count"), last_comment=Max("last_comment_day"))
+            etag = make_etag("project-sessions", id, summary["total"], summary["last_updated"],
+                             summary["comments"], summary["last_comment"])
+            cached = not_modified(request, etag)
+            if cached is not None:
+                logger.info("[PROJECT SESSIONS] Phiên của project id=%s không đổi, trả về 304", id)
+                return cached
 
             serializer = FeedbackSessionSerializer(sessions, many=True)
-            logger.info("[PROJECT SESSIONS] Trả về danh sách phiên phản hồi cho project id=%s", id)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            logger.info("[PROJECT SESSIONS] Trả về %s phiên phản hồi cho project id=%s", summary["total"], id)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK), etag)
 
         except Exception as e:
             logger.exception("[PROJECT SESSIONS] Lỗi khi lấy phiên phản hồi của project id=%s: %s", id, str(e))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_updated_day'),
+        ('workspaces', '0003_workspace_updated_day'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['workspace', 'created_day', 'id'], name='projects_workspace_created_idx'),
+        ),
+    ]
@@ -14,9 +14,14 @@ class Project(models.Model):
     thumbnail_url = models.TextField(null=True, blank=True)
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='canvas')
     created_day = models.DateTimeField(auto_now_add=True)
+    updated_day = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'projects'
+        indexes = [
+            # Danh sách project của một workspace, mới nhất trước (lọc + sắp xếp + keyset)
+            models.Index(fields=['workspace', 'created_day', 'id'], name='projects_workspace_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
\ No newline at end of file
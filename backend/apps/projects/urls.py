@@ -10,11 +10,13 @@ from django.urls import path
 from .views import (
     ProjectCreateView,
     ProjectDetailView,
-    ProjectListView      
+    ProjectListView,
+    ProjectOverviewView
 )
 
 urlpatterns = [
     path('projects/', ProjectCreateView.as_view(), name='project-create'),
     path('projects/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),   
+    path('projects/<int:pk>/overview/', ProjectOverviewView.as_view(), name='project-overview'),
     path('projects/list/', ProjectListView.as_view(), name='project-list'),
 ]
@@ -6,7 +6,19 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Max, Q, Sum
+from django.db.models.functions import Coalesce
 from datetime import datetime
+from apps.common.conditional import make_etag, not_modified, with_validators
+from apps.common.aggregates import subquery_aggregate
+from apps.common.auth import get_request_user_id
+from apps.common.pagination import KeysetPagination
+from apps.common.permissions import MANAGER_ROLES, workspace_access_denied
+from apps.canvas.models import Canvas
+from apps.feedbacksessions.models import FeedbackSession
+from apps.workspacemembers.membership import member_workspace_ids
 from .models import Project
 from .serializers import ProjectSerializer
 
@@ -24,6 +36,9 @@ class ProjectCreateView(APIView):
         try:
             serializer = ProjectSerializer(data=request.data)
             if serializer.is_valid():
+                denied = workspace_access_denied(request, serializer.validated_data["workspace"].id)
+                if denied is not None:
+                    return denied
                 project = serializer.save(created_day=datetime.now())
                 logger.info("Project created successfully: id=%s, name=%s",
                             project.id, getattr(project, "name", None))
@@ -44,9 +59,19 @@ class ProjectDetailView(APIView):
         logger.info("[PROJECT DETAIL] Request received at %s for project_id=%s", request.path, pk)
         try:
             project = get_object_or_404(Project, pk=pk)
+            denied = workspace_access_denied(request, project.workspace_id)
+            if denied is not None:
+                return denied
             logger.info("Project found: id=%s, name=%s", project.id, project.name)
+            etag = make_etag("project", project.id, project.updated_day.isoformat())
+            cached = not_modified(request, etag, project.updated_day)
+            if cached is not None:
+                logger.info("Project not modified: id=%s", project.id)
+                return cached
+
             serializer = ProjectSerializer(project)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK),
+                                   etag, project.updated_day)
         except Exception as e:
             logger.exception("Error retrieving project id=%s", pk)
             return Response({"error": f"Lỗi khi lấy project: {str(e)}"},
@@ -57,10 +82,19 @@ class ProjectDetailView(APIView):
         logger.info("[PROJECT UPDATE] Request received at %s for project_id=%s", request.path, pk)
         try:
             project = get_object_or_404(Project, pk=pk)
+            denied = workspace_access_denied(request, project.workspace_id)
+            if denied is not None:
+                return denied
             logger.info("Project found: id=%s, name=%s", project.id, project.name)
 
             serializer = ProjectSerializer(project, data=request.data, partial=True)
             if serializer.is_valid():
+                # Chuyển project sang workspace khác cần quyền ở cả workspace đích
+                target = serializer.validated_data.get("workspace")
+                if target is not None and target.id != project.workspace_id:
+                    denied = workspace_access_denied(request, target.id)
+                    if denied is not None:
+                        return denied
                 updated = serializer.save()
                 logger.info("Project updated successfully: id=%s, new_data=%s",
                             updated.id, serializer.validated_data)
@@ -82,6 +116,9 @@ class ProjectDetailView(APIView):
         logger.info("[PROJECT DELETE] Request received at %s for project_id=%s", request.path, pk)
         try:
             project = get_object_or_404(Project, pk=pk)
+            denied = workspace_access_denied(request, project.workspace_id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
             project_name = project.name
             project.delete()
             logger.info("Project deleted successfully: id=%s, name=%s", pk, project_name)
@@ -94,26 +131,123 @@ class ProjectDetailView(APIView):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-# Phân trang
+# Danh sách project: lọc theo workspace/type/name, phân trang keyset theo (-created_day, -id).
+# Mỗi trang chỉ là một truy vấn, không COUNT(*) hay exists() trước đó
 class ProjectListView(APIView):
+    pagination = KeysetPagination(ordering=("-created_day", "-id"), default_limit=50, max_limit=200)
+
     def get(self, request):
         logger.info("[PROJECT LIST] Request received at %s", request.path)
         try:
-            projects = Project.objects.all().order_by("-created_day")
-            
-            # NẾU KHÔNG CÓ PROJECT → TRẢ VỀ ARRAY RỖNG
-            if not projects.exists():
-                logger.info("No projects found, returning empty array")
-                return Response([], status=status.HTTP_200_OK)  # ← SỬA ĐÂY!
-            
-            serializer = ProjectSerializer(projects, many=True)
-            logger.info("Returning %d projects", projects.count())
-            
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            user_id = get_request_user_id(request)
+            if user_id is None:
+                return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            workspace = request.query_params.get("workspace")
+            if workspace:
+                if not workspace.isdigit():
+                    return Response({"error": "workspace phải là số nguyên"}, status=status.HTTP_400_BAD_REQUEST)
+                denied = workspace_access_denied(request, int(workspace))
+                if denied is not None:
+                    return denied
+                projects = Project.objects.filter(workspace_id=workspace)
+            else:
+                # Không chỉ định workspace: mọi project trong các workspace của người gọi
+                projects = Project.objects.filter(Q(workspace__owner_id=user_id)
+                                                  | Q(workspace_id__in=member_workspace_ids(user_id)))
+            project_type = request.query_params.get("type")
+            if project_type:
+                projects = projects.filter(type=project_type)
+            name = (request.query_params.get("name") or "").strip()
+            if name:
+                projects = projects.filter(name__icontains=name)
+
+            try:
+                page, next_cursor = self.pagination.paginate(projects, request)
+            except ValueError as e:
+                logger.warning("Invalid pagination parameters: %s", str(e))
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # ETag tính từ chính trang vừa đọc (id + updated_day), không tốn thêm truy vấn.
+            # Không gửi Last-Modified: xoá một project không làm max(updated_day) thay đổi
+            etag = make_etag("projects", request.get_full_path(), next_cursor,
+                             *[f"{project.id}:{project.updated_day.isoformat()}" for project in page])
+            cached = not_modified(request, etag)
+            if cached is not None:
+                logger.info("Project list not modified")
+                return cached
+
+            serializer = ProjectSerializer(page, many=True)
+            logger.info("Returning %d projects", len(page))
+            return with_validators(
+                Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK),
+                etag
+            )
             
         except Exception as e:
             logger.exception("Error retrieving project list")
             return Response(
                 {"error": f"Lỗi khi lấy danh sách project: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+# Project kèm số canvas, số phiên, số bình luận và các mốc hoạt động, trong một câu SQL.
+# Số bình luận lấy từ bộ đếm comment_count của từng phiên nên không quét bảng comments
+def projects_with_overview():
+    sessions = FeedbackSession.objects.all()
+    return Project.objects.annotate(
+        canvas_count=Coalesce(subquery_aggregate(Canvas.objects.all(), "project", Count("id")), 0,
+                              output_field=IntegerField()),
+        session_count=Coalesce(subquery_aggregate(sessions, "canvas__project", Count("id")), 0,
+                               output_field=IntegerField()),
+        comment_count=Coalesce(subquery_aggregate(sessions, "canvas__project", Sum("comment_count")), 0,
+                               output_field=IntegerField()),
+        last_canvas_update=subquery_aggregate(Canvas.objects.all(), "project", Max("updated_day")),
+        last_session_update=subquery_aggregate(sessions, "canvas__project", Max("updated_day")),
+        last_comment_day=subquery_aggregate(sessions, "canvas__project", Max("last_comment_day")),
+    )
+
+
+# Tổng quan một project cho thẻ project ở frontend: thay cho chuỗi gọi
+# project -> danh sách phiên -> bình luận của từng phiên
+class ProjectOverviewView(APIView):
+    def get(self, request, pk):
+        logger.info("[PROJECT OVERVIEW] Request received at %s for project_id=%s", request.path, pk)
+        try:
+            cache_key = f"projects:overview:{pk}"
+            timeout = getattr(settings, "PROJECT_OVERVIEW_CACHE_SECONDS", 30)
+            data = cache.get(cache_key) if timeout else None
+            if data is not None:
+                denied = workspace_access_denied(request, data["workspace"])
+                if denied is not None:
+                    return denied
+                logger.info("Project overview served from cache: id=%s", pk)
+                return Response(data, status=status.HTTP_200_OK)
+
+            project = projects_with_overview().filter(pk=pk).first()
+            if project is None:
+                logger.warning("Project not found: id=%s", pk)
+                return Response({"error": f"Project id={pk} không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
+            denied = workspace_access_denied(request, project.workspace_id)
+            if denied is not None:
+                return denied
+            activity = [project.updated_day, project.last_canvas_update,
+                        project.last_session_update, project.last_comment_day]
+            data = {
+                **ProjectSerializer(project).data,
+                "canvas_count": project.canvas_count,
+                "session_count": project.session_count,
+                "comment_count": project.comment_count,
+                "last_comment_day": project.last_comment_day,
+                "latest_activity": max(moment for moment in activity if moment is not None),
+            }
+            if timeout:
+                cache.set(cache_key, data, timeout)
+            logger.info("Project overview computed: id=%s, sessions=%s, comments=%s",
+                        project.id, project.session_count, project.comment_count)
+            return Response(data, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("Error retrieving project overview id=%s", pk)
+            return Response({"error": f"Lỗi khi lấy tổng quan project: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
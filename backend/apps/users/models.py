@@ -16,6 +16,7 @@ class User(models.Model):
     auth_type = models.CharField(max_length=20, choices=AUTH_CHOICES, default='default')
     two_stept_auth = models.BooleanField(default=False)
     created_day = models.DateTimeField(auto_now_add=True)
+    updated_day = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'users'
@@ -43,7 +43,7 @@ class GoogleOAuthSerializer(serializers.Serializer):
 class UserDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'name', 'email', 'avatar_url', 'auth_type', 'two_step_auth', 'created_day']
+        fields = ['id', 'name', 'email', 'avatar_url', 'auth_type', 'two_stept_auth', 'created_day']
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -14,9 +14,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from apps.common.conditional import make_etag, not_modified, with_validators
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from .models import User
+from .models import User as AccountUser
 from .serializers import UserRegisterSerializer
 from .serializers import UserDetailSerializer
 from .serializers import LoginSerializer
@@ -267,14 +269,22 @@ class UserDetailView(APIView):
         logger.info("[USER DETAIL] Nhận yêu cầu lấy thông tin người dùng id=%s", id)
 
         try:
-            user = User.objects.filter(id=id).first()
+            # Validator dựa trên updated_day của model users của app (User ở trên là user của auth)
+            user = AccountUser.objects.filter(id=id).first()
             if not user:
                 logger.warning("[USER DETAIL] Không tìm thấy người dùng với id=%s", id)
                 return Response({"error": "Không tìm thấy người dùng"}, status=status.HTTP_404_NOT_FOUND)
 
+            etag = make_etag("user", user.id, user.updated_day.isoformat())
+            cached = not_modified(request, etag, user.updated_day)
+            if cached is not None:
+                logger.info("[USER DETAIL] Người dùng id=%s không đổi, trả về 304", user.id)
+                return cached
+
             serializer = UserDetailSerializer(user)
             logger.info("[USER DETAIL] Tìm thấy người dùng: id=%s, email=%s", user.id, user.email)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK),
+                                   etag, user.updated_day)
 
         except Exception as e:
             logger.exception("[USER DETAIL] Lỗi hệ thống khi lấy thông tin người dùng id=%s: %s", id, str(e))
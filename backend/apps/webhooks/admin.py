@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Webhook
+from .models import EndpointHealth, Webhook, WebhookDelivery, WebhookDeliveryLog, WebhookReplay
 
 # Register your models here.
 @admin.register(Webhook)
@@ -7,4 +7,35 @@ class WebhookAdmin(admin.ModelAdmin):
     list_display = ('id', 'workspace', 'model', 'event_type', 'endpoint_url', 'created_day')
     list_filter = ('workspace', 'model', 'event_type', 'created_day')
     search_fields = ('endpoint_url', 'workspace__name', 'model')
-    ordering = ('-created_day',)
\ No newline at end of file
+    ordering = ('-created_day',)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_id', 'webhook', 'status', 'attempts', 'last_status_code', 'next_attempt_at', 'created_day')
+    list_filter = ('status', 'created_day')
+    search_fields = ('event_id', 'webhook__endpoint_url')
+    ordering = ('-created_day',)
+
+
+@admin.register(EndpointHealth)
+class EndpointHealthAdmin(admin.ModelAdmin):
+    list_display = ('id', 'endpoint_url', 'state', 'consecutive_failures', 'retry_at', 'updated_day')
+    list_filter = ('state',)
+    search_fields = ('endpoint_url',)
+    ordering = ('-updated_day',)
+
+
+@admin.register(WebhookDeliveryLog)
+class WebhookDeliveryLogAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_id', 'webhook_id', 'status_code', 'succeeded', 'latency_ms', 'attempt', 'created_day')
+    list_filter = ('succeeded', 'created_day')
+    search_fields = ('event_id',)
+    ordering = ('-created_day',)
+
+
+@admin.register(WebhookReplay)
+class WebhookReplayAdmin(admin.ModelAdmin):
+    list_display = ('id', 'webhook', 'start', 'end', 'rate_per_second', 'status', 'enqueued', 'created_day')
+    list_filter = ('status', 'created_day')
+    ordering = ('-created_day',)
@@ -0,0 +1,257 @@
+import logging
+import random
+import uuid
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .dispatch import dispatch_concurrently
+from .encoding import EncodedBody
+from .health import BreakerGate
+from .logs import build_log
+from .models import Webhook, WebhookDelivery, WebhookDeliveryLog, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+LEASE_SECONDS = 60
+MAX_ERROR_LENGTH = 1000
+
+
+def new_event_id():
+    return uuid.uuid4().hex
+
+
+# Ghi sự kiện vào outbox cho từng webhook; chỉ là một INSERT, không gọi mạng
+def enqueue_event(event_data, webhooks, event_id=None):
+    event_id = event_id or new_event_id()
+    return event_id, enqueue_events([(event_data, webhooks)], [event_id])
+
+
+# Lưu sự kiện vào kho (webhook_events) để còn phát lại về sau
+def store_events(events):
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(event_id=event_id, workspace_id=event_data['workspace'], model=event_data['model'],
+                     event_type=event_data['event_type'], payload=event_data)
+        for event_id, event_data in events
+    ])
+
+
+# Ghi nhiều sự kiện (mỗi sự kiện kèm danh sách webhook nhận, có thể rỗng) vào kho và
+# outbox: một bulk INSERT cho kho, một cho outbox, trong cùng transaction để không có sự
+# kiện nằm trong kho mà không có delivery (hoặc ngược lại). Danh sách webhook có thể lấy từ
+# bảng định tuyến đã cũ, nên webhook đã bị xoá được bỏ qua thay vì làm hỏng cả lô vì lỗi FK
+def enqueue_events(batch, event_ids=None):
+    event_ids = event_ids or [new_event_id() for _ in batch]
+    now = timezone.now()
+    with transaction.atomic():
+        store_events([(event_id, event_data) for event_id, (event_data, _) in zip(event_ids, batch)])
+        existing = existing_webhook_ids({webhook.id for _, webhooks in batch for webhook in webhooks})
+        # Webhook gửi theo lô: hoãn sự kiện tối đa batch_linger_seconds để chờ gom thêm
+        deliveries = [
+            WebhookDelivery(webhook=webhook, event_id=event_id, payload=event_data,
+                            next_attempt_at=now + timedelta(seconds=webhook.batch_linger_seconds))
+            for event_id, (event_data, webhooks) in zip(event_ids, batch)
+            for webhook in webhooks
+            if webhook.id in existing
+        ]
+        WebhookDelivery.objects.bulk_create(deliveries)
+        release_full_batches({delivery.webhook_id: delivery.webhook for delivery in deliveries}.values(), now)
+    return len(deliveries)
+
+
+# Sự kiện trực tiếp chưa gửi lần nào và chỉ còn đang chờ batch_linger_seconds của webhook
+def lingering_deliveries(webhook_id, linger_seconds, now):
+    return (
+        WebhookDelivery.objects
+        .filter(webhook_id=webhook_id, status=WebhookDelivery.STATUS_PENDING,
+                priority=WebhookDelivery.PRIORITY_LIVE, attempts=0,
+                next_attempt_at__gt=now,
+                next_attempt_at__lte=F('created_day') + timedelta(seconds=linger_seconds))
+        .order_by('next_attempt_at')
+    )
+
+
+# Lô đã gom đủ batch_max_size thì không chờ hết linger nữa: các lô đầy được đưa về đến
+# hạn ngay, phần lẻ còn lại tiếp tục chờ gom
+def release_full_batches(webhooks, now):
+    for webhook in webhooks:
+        if webhook.batch_max_size <= 1 or not webhook.batch_linger_seconds:
+            continue
+        ids = list(lingering_deliveries(webhook.id, webhook.batch_linger_seconds, now).values_list('id', flat=True))
+        full = len(ids) - len(ids) % webhook.batch_max_size
+        if full:
+            WebhookDelivery.objects.filter(id__in=ids[:full]).update(next_attempt_at=now, updated_day=now)
+
+
+def existing_webhook_ids(webhook_ids):
+    if not webhook_ids:
+        return set()
+    return set(Webhook.objects.filter(id__in=webhook_ids).values_list('id', flat=True))
+
+
+# Exponential backoff có jitter: 10s, 20s, 40s, ... tối đa 1 giờ
+def backoff_delay(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+# Lấy các delivery đến hạn và giữ chúng trong LEASE_SECONDS. skip_locked để nhiều worker
+# chạy song song không tranh cùng dòng (of=('self',): chỉ khoá dòng delivery, không khoá
+# webhook được JOIN); worker chết giữa chừng thì lease hết hạn và dòng in_flight được lấy
+# lại. Với webhook gửi theo lô, các sự kiện trực tiếp chưa gửi lần nào và chỉ còn đang chờ
+# batch_linger_seconds của cùng webhook được kéo theo cho đủ batch_max_size; dòng đang
+# backoff, bị breaker hoãn hay sự kiện phát lại thì đợi tới hạn của chính nó
+def claim_due_deliveries(limit, lease_seconds=LEASE_SECONDS):
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            WebhookDelivery.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(status__in=[WebhookDelivery.STATUS_PENDING, WebhookDelivery.STATUS_IN_FLIGHT],
+                    next_attempt_at__lte=now)
+            .order_by('priority', 'next_attempt_at')
+            .values_list('id', 'webhook_id', 'webhook__batch_max_size', 'webhook__batch_linger_seconds')[:limit]
+        )
+        if not due:
+            return []
+        ids = [delivery_id for delivery_id, _, _, _ in due]
+        batched = {}
+        for _, webhook_id, batch_max_size, linger_seconds in due:
+            if batch_max_size > 1:
+                count, _, _ = batched.get(webhook_id, (0, batch_max_size, linger_seconds))
+                batched[webhook_id] = (count + 1, batch_max_size, linger_seconds)
+        for webhook_id, (count, batch_max_size, linger_seconds) in batched.items():
+            # Số chỗ còn trống ở lô cuối cùng của webhook này
+            room = -count % batch_max_size
+            if room:
+                ids += list(
+                    lingering_deliveries(webhook_id, linger_seconds, now)
+                    .select_for_update(skip_locked=True, of=('self',))
+                    .values_list('id', flat=True)[:room]
+                )
+        WebhookDelivery.objects.filter(id__in=ids).update(
+            status=WebhookDelivery.STATUS_IN_FLIGHT,
+            next_attempt_at=now + timedelta(seconds=lease_seconds),
+            updated_day=now,
+        )
+    return list(WebhookDelivery.objects.filter(id__in=ids).select_related('webhook').order_by('id'))
+
+
+# Chia delivery đã nhận thành các lần gửi: mỗi delivery một lần, hoặc từng lô
+# batch_max_size delivery của cùng webhook. Sự kiện phát lại không chung lô với sự kiện
+# trực tiếp để cả lô mang header X-Webhook-Replay
+def group_deliveries(deliveries):
+    groups = []
+    batches = {}
+    for delivery in deliveries:
+        size = delivery.webhook.batch_max_size
+        if size <= 1:
+            groups.append([delivery])
+            continue
+        key = (delivery.webhook_id, delivery.priority)
+        batch = batches.get(key)
+        if batch is None or len(batch) >= size:
+            batch = batches[key] = []
+            groups.append(batch)
+        batch.append(delivery)
+    return groups
+
+
+# Lần gửi của một nhóm delivery. Thân request được mã hoá một lần cho mỗi sự kiện
+# (cache theo event_id trong lượt), các webhook nhận cùng sự kiện dùng lại cùng bytes
+def delivery_job(group, encoded_cache):
+    first = group[0]
+    if first.webhook.batch_max_size <= 1:
+        encoded = encoded_cache.get(first.event_id)
+        if encoded is None:
+            encoded = encoded_cache[first.event_id] = EncodedBody(first.payload)
+        extra = {'X-Webhook-Event-Id': first.event_id}
+    else:
+        encoded = EncodedBody([d.payload for d in group])
+        extra = {'X-Webhook-Event-Id': ','.join(d.event_id for d in group),
+                 'X-Webhook-Batch-Size': str(len(group))}
+    if first.priority == WebhookDelivery.PRIORITY_REPLAY:
+        extra['X-Webhook-Replay'] = 'true'
+    return first.webhook.endpoint_url, encoded.body, encoded.headers_for(first.webhook.secret, extra)
+
+
+# 4xx (trừ 408/429) là lỗi phía receiver, thử lại cũng không khác nên đưa thẳng vào dead-letter
+def is_permanent_failure(status_code):
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+# Ghi kết quả cho một lần gửi; cả lô thành công hoặc thất bại cùng nhau và được
+# hẹn thử lại cùng một thời điểm để lần sau vẫn đi chung
+def record_result(group, status_code, error):
+    now = timezone.now()
+    succeeded = status_code is not None and 200 <= status_code < 300
+    retry_at = now + backoff_delay(max(d.attempts for d in group) + 1)
+    for delivery in group:
+        delivery.attempts += 1
+        delivery.last_status_code = status_code
+        delivery.updated_day = now
+        if succeeded:
+            delivery.status = WebhookDelivery.STATUS_DELIVERED
+            delivery.delivered_day = now
+            delivery.last_error = ''
+            continue
+        delivery.last_error = (error or '')[:MAX_ERROR_LENGTH]
+        if is_permanent_failure(status_code) or delivery.attempts >= delivery.webhook.max_attempts:
+            delivery.status = WebhookDelivery.STATUS_DEAD
+            logger.warning("[WEBHOOK DELIVERY] Delivery id=%s (event=%s, webhook=%s) chuyển sang dead-letter "
+                           "sau %s lần thử: %s", delivery.id, delivery.event_id, delivery.webhook_id,
+                           delivery.attempts, delivery.last_error)
+        else:
+            delivery.status = WebhookDelivery.STATUS_PENDING
+            delivery.next_attempt_at = retry_at
+    WebhookDelivery.objects.bulk_update(group, ['attempts', 'last_status_code', 'last_error', 'status',
+                                                'delivered_day', 'next_attempt_at', 'updated_day'])
+
+
+# Receiver đang bị breaker chặn: trả delivery về pending tới khi được thử lại,
+# không tính vào số lần thử
+def postpone(group, until):
+    WebhookDelivery.objects.filter(id__in=[d.id for d in group]).update(
+        status=WebhookDelivery.STATUS_PENDING, next_attempt_at=until, updated_day=timezone.now()
+    )
+
+
+# Một vòng của worker: nhận tối đa `limit` delivery đến hạn, gửi đồng thời và ghi kết quả
+def process_due_deliveries(limit=100, lease_seconds=LEASE_SECONDS):
+    stats = {'claimed': 0, 'delivered': 0, 'retrying': 0, 'dead': 0, 'postponed': 0}
+    groups = group_deliveries(claim_due_deliveries(limit, lease_seconds))
+    gate = BreakerGate([group[0].webhook.endpoint_url for group in groups])
+    sending = []
+    for group in groups:
+        url = group[0].webhook.endpoint_url
+        if gate.allow(url):
+            sending.append(group)
+        else:
+            postpone(group, gate.postpone_until(url))
+            stats['claimed'] += len(group)
+            stats['postponed'] += len(group)
+
+    encoded_cache = {}
+    outcomes = dispatch_concurrently([delivery_job(group, encoded_cache) for group in sending])
+    logs = []
+    for group, (status_code, text, error, latency_ms) in zip(sending, outcomes):
+        gate.add(group[0].webhook.endpoint_url, status_code, error, latency_ms)
+        if error is None and not 200 <= status_code < 300:
+            error = text
+        record_result(group, status_code, error)
+        for delivery in group:
+            logs.append(build_log(delivery.event_id, delivery.webhook_id, status_code, text,
+                                  None if delivery.status == WebhookDelivery.STATUS_DELIVERED else error,
+                                  latency_ms, delivery.attempts))
+            stats['claimed'] += 1
+            if delivery.status == WebhookDelivery.STATUS_DELIVERED:
+                stats['delivered'] += 1
+            elif delivery.status == WebhookDelivery.STATUS_DEAD:
+                stats['dead'] += 1
+            else:
+                stats['retrying'] += 1
+    gate.save()
+    WebhookDeliveryLog.objects.bulk_create(logs)
+    return stats
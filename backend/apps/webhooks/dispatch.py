@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from .encoding import EncodedBody
+from .health import BreakerGate
+from .logs import build_log
+from .models import WebhookDeliveryLog
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 5
+FAN_OUT_DEADLINE = 10
+MAX_WORKERS = 16
+POOL_HOSTS = 32
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+
+
+# Một requests.Session dùng chung cho cả tiến trình: urllib3 giữ pool keep-alive theo host,
+# các lần gửi tới cùng receiver dùng lại kết nối thay vì bắt tay TCP/TLS mỗi lần
+def get_http_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=MAX_WORKERS)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+# Thread pool có giới hạn, dùng chung giữa các request để không sinh thread theo số webhook
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='webhook-dispatch')
+    return _executor
+
+
+# Gửi một POST với thân đã mã hoá sẵn, trả về (status_code, response_text, error, latency_ms)
+def post(url, body, headers=None, timeout=REQUEST_TIMEOUT):
+    started = time.monotonic()
+    try:
+        r = get_http_session().post(url, data=body, headers=headers, timeout=timeout)
+        return r.status_code, r.text, None, elapsed_ms(started)
+    except requests.RequestException as e:
+        return None, '', str(e), elapsed_ms(started)
+
+
+def elapsed_ms(started):
+    return int((time.monotonic() - started) * 1000)
+
+
+# Gửi đồng thời danh sách (url, body, headers); kết quả theo đúng thứ tự đầu vào.
+# Cả lượt không vượt quá `deadline` giây: timeout của từng request bị cắt theo thời gian
+# còn lại, request chưa kịp chạy thì bị huỷ và trả lỗi
+def dispatch_concurrently(jobs, deadline=FAN_OUT_DEADLINE):
+    if not jobs:
+        return []
+    expires_at = time.monotonic() + deadline
+
+    def run(url, body, headers):
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            return None, '', 'deadline exceeded', None
+        return post(url, body, headers, timeout=min(REQUEST_TIMEOUT, remaining))
+
+    executor = get_executor()
+    futures = [executor.submit(run, url, body, headers) for url, body, headers in jobs]
+    wait(futures, timeout=max(expires_at - time.monotonic(), 0))
+
+    results = []
+    for future in futures:
+        if future.done() and not future.cancelled():
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append((None, '', 'deadline exceeded', None))
+    return results
+
+
+# Fan-out đồng bộ một sự kiện tới các webhook, cùng cấu trúc kết quả với EventSendView cũ.
+# Receiver đang bị circuit breaker chặn thì trả lỗi ngay, không gửi
+def fan_out(event_data, webhooks, deadline=FAN_OUT_DEADLINE, event_id=''):
+    webhooks = list(webhooks)
+    gate = BreakerGate([w.endpoint_url for w in webhooks])
+    allowed = [w for w in webhooks if gate.allow(w.endpoint_url)]
+    # Mã hoá (và nén) sự kiện một lần; mỗi receiver chỉ tốn thêm một chữ ký HMAC
+    encoded = EncodedBody(event_data)
+    extra = {'X-Webhook-Event-Id': event_id} if event_id else None
+    jobs = [(w.endpoint_url, encoded.body, encoded.headers_for(w.secret, extra)) for w in allowed]
+    outcomes = dict(zip((w.id for w in allowed), dispatch_concurrently(jobs, deadline)))
+
+    results = []
+    logs = []
+    for webhook in webhooks:
+        if webhook.id not in outcomes:
+            results.append({"webhook_id": webhook.id, "url": webhook.endpoint_url, "error": "circuit open"})
+            logger.warning("[EVENT SEND] Bỏ qua webhook id=%s (%s): circuit breaker đang mở",
+                           webhook.id, webhook.endpoint_url)
+            continue
+        status_code, text, error, latency_ms = outcomes[webhook.id]
+        gate.add(webhook.endpoint_url, status_code, error, latency_ms)
+        logs.append(build_log(event_id, webhook.id, status_code, text, error, latency_ms))
+        if error is None:
+            results.append({"webhook_id": webhook.id, "url": webhook.endpoint_url, "status_code": status_code})
+            logger.info("[EVENT SEND] Gửi sự kiện tới webhook id=%s (%s) thành công, status=%s",
+                        webhook.id, webhook.endpoint_url, status_code)
+        else:
+            results.append({"webhook_id": webhook.id, "url": webhook.endpoint_url, "error": error})
+            logger.error("[EVENT SEND] Lỗi khi gửi sự kiện tới webhook id=%s (%s): %s",
+                         webhook.id, webhook.endpoint_url, error)
+    gate.save()
+    WebhookDeliveryLog.objects.bulk_create(logs)
+    return results
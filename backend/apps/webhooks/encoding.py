@@ -0,0 +1,50 @@
+import gzip
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from django.core.serializers.json import DjangoJSONEncoder
+
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+
+def generate_secret():
+    return secrets.token_hex(32)
+
+
+# Thân request đã mã hoá một lần, dùng lại cho mọi receiver của cùng sự kiện.
+# `raw` là JSON gốc (dùng để ký), `body` là bytes gửi đi (có thể đã gzip)
+class EncodedBody:
+    def __init__(self, payload):
+        self.raw = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False,
+                              separators=(',', ':')).encode('utf-8')
+        self.headers = {'Content-Type': 'application/json'}
+        if len(self.raw) >= GZIP_MIN_BYTES:
+            self.body = gzip.compress(self.raw, compresslevel=GZIP_LEVEL)
+            self.headers['Content-Encoding'] = 'gzip'
+        else:
+            self.body = self.raw
+
+    # Header cho một receiver: chữ ký HMAC-SHA256 bằng secret của webhook trên
+    # "<timestamp>.<JSON gốc>" (receiver giải nén Content-Encoding trước khi kiểm tra)
+    def headers_for(self, secret, extra=None):
+        headers = dict(self.headers)
+        if secret:
+            timestamp = str(int(time.time()))
+            headers['X-Webhook-Timestamp'] = timestamp
+            headers['X-Webhook-Signature'] = 'sha256=' + sign(secret, timestamp, self.raw)
+        if extra:
+            headers.update(extra)
+        return headers
+
+
+def sign(secret, timestamp, raw):
+    message = timestamp.encode('utf-8') + b'.' + raw
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def verify(secret, timestamp, raw, signature):
+    expected = 'sha256=' + sign(secret, timestamp, raw)
+    return hmac.compare_digest(expected, signature)
@@ -0,0 +1,151 @@
+import contextvars
+import json
+import logging
+from contextlib import contextmanager
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Trường đưa vào payload của từng model; không bao giờ gửi password hay file upload ra ngoài
+EVENT_FIELDS = {
+    'project': ('id', 'name', 'workspace', 'domain_url', 'thumbnail_url', 'type', 'created_day', 'updated_day'),
+    'comment': ('id', 'session', 'user', 'parent', 'content', 'position_x', 'position_y', 'tag_user',
+                'mention_user', 'attachment_url', 'created_day', 'updated_day'),
+    'user': ('id', 'name', 'email', 'auth_type', 'created_day', 'updated_day'),
+}
+
+
+# Gom sự kiện của một request (hoặc một khối collect_events): ghi đè theo (workspace, model, id) để
+# nhiều lần save cùng một dòng chỉ thành một sự kiện, và nhớ workspace đã tra để không
+# truy vấn lại cho từng dòng
+class EventScope:
+    def __init__(self):
+        self.events = {}
+        self.workspaces = {}
+
+    def add(self, event):
+        if event['object_id'] is None:
+            # Dòng bulk insert không có id (MySQL): không gộp được, giữ nguyên từng sự kiện
+            self.events[object()] = event
+            return
+        key = (event['workspace'], event['model'], event['object_id'])
+        previous = self.events.pop(key, None)
+        if previous is not None:
+            if previous['event_type'] == 'create' and event['event_type'] == 'delete':
+                # Tạo rồi xoá trong cùng request: receiver không cần biết
+                return
+            if previous['event_type'] == 'create':
+                event = {**event, 'event_type': 'create'}
+        self.events[key] = event
+
+    def drain(self):
+        events, self.events = list(self.events.values()), {}
+        return events
+
+
+_scope = contextvars.ContextVar('webhook_event_scope', default=None)
+
+
+@contextmanager
+def collect_events():
+    scope = EventScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        flush(scope.drain())
+
+
+# Trước khi xoá user, membership còn nguyên: nhớ sẵn danh sách workspace cho sự kiện delete
+def remember_user_workspaces(instance):
+    if _scope.get() is not None:
+        workspaces_for('user', instance)
+
+
+def _memo(key, resolve):
+    scope = _scope.get()
+    if scope is None:
+        return resolve()
+    if key not in scope.workspaces:
+        scope.workspaces[key] = resolve()
+    return scope.workspaces[key]
+
+
+# Workspace nhận sự kiện của từng loại đối tượng
+def workspaces_for(model, instance):
+    if model == 'project':
+        return [instance.workspace_id]
+    if model == 'comment':
+        from apps.feedbacksessions.models import FeedbackSession
+        return _memo(('session', instance.session_id), lambda: list(
+            FeedbackSession.objects.filter(id=instance.session_id)
+            .values_list('canvas__project__workspace_id', flat=True)
+        ))
+    if model == 'user':
+        from apps.workspaces.models import Workspace
+        return _memo(('user', instance.pk), lambda: list(
+            Workspace.objects.filter(Q(owner_id=instance.pk) | Q(members__user_id=instance.pk))
+            .distinct().values_list('id', flat=True)
+        ))
+    return []
+
+
+def snapshot(model, instance):
+    data = {}
+    for name in EVENT_FIELDS[model]:
+        field = instance._meta.get_field(name)
+        data[name] = field.value_from_object(instance)
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+# Gọi từ signal: chụp dữ liệu ngay (sau post_delete đối tượng không còn trong DB),
+# nhưng chỉ đưa vào hàng đợi sau khi transaction commit
+def emit(model, event_type, instance):
+    data = snapshot(model, instance)
+    occurred_at = timezone.now().isoformat()
+    events = [
+        {'workspace': workspace_id, 'model': model, 'event_type': event_type,
+         'object_id': instance.pk, 'occurred_at': occurred_at, 'data': data}
+        for workspace_id in workspaces_for(model, instance) if workspace_id is not None
+    ]
+    if events:
+        scope = _scope.get()
+        transaction.on_commit(lambda: _collect(scope, events))
+
+
+# Cho các đường ghi không phát signal (bulk_create)
+def emit_many(model, event_type, instances):
+    for instance in instances:
+        emit(model, event_type, instance)
+
+
+def _collect(scope, events):
+    if scope is not None and _scope.get() is scope:
+        for event in events:
+            scope.add(event)
+    else:
+        # Ngoài request (hoặc request đã kết thúc): đưa thẳng vào outbox
+        flush(events)
+
+
+# Ghi một lô sự kiện vào kho và outbox bằng bulk INSERT
+def flush(events):
+    if not events:
+        return
+    from .delivery import enqueue_events
+    from .routing import match_webhooks
+    # Sự kiện không có webhook nhận vẫn được lưu vào kho để phát lại sau này
+    batch = [
+        (event, match_webhooks(event['workspace'], event['model'], event['event_type']))
+        for event in events
+    ]
+    try:
+        queued = enqueue_events(batch)
+        logger.info("[WEBHOOK EVENTS] Đã đưa %s sự kiện (%s delivery) vào hàng đợi", len(batch), queued)
+    except Exception as e:
+        # Thao tác ghi gốc đã commit; lỗi outbox không được biến request thành 500
+        logger.exception("[WEBHOOK EVENTS] Lỗi khi đưa %s sự kiện vào hàng đợi: %s", len(batch), str(e))
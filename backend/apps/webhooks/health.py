@@ -0,0 +1,209 @@
+import hashlib
+import logging
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from .models import EndpointHealth
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SIZE = 50
+MIN_REQUESTS = 10
+FAILURE_RATE_THRESHOLD = 0.5
+CONSECUTIVE_FAILURE_THRESHOLD = 5
+OPEN_BASE_SECONDS = 30
+OPEN_MAX_SECONDS = 1800
+MAX_ERROR_LENGTH = 1000
+PROBE_WAIT_SECONDS = 5
+# Lần gửi thử ở half_open giữ "lease" trong khoảng này; worker chết hoặc không ghi được kết quả
+# thì hết lease là được thử lại, breaker không kẹt mãi ở half_open
+PROBE_LEASE_SECONDS = 60
+RECORD_ATTEMPTS = 3
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+# Nạp (hoặc tạo) bản ghi sức khoẻ cho các URL trong hai truy vấn
+def load_health(urls):
+    hashes = {url_hash(url): url for url in set(urls)}
+    EndpointHealth.objects.bulk_create(
+        [EndpointHealth(url_hash=h, endpoint_url=url) for h, url in hashes.items()],
+        ignore_conflicts=True,
+    )
+    return {health.endpoint_url: health for health in EndpointHealth.objects.filter(url_hash__in=hashes)}
+
+
+# Có được gửi tới receiver này không. open hết hạn (hoặc half_open hết lease) thì chuyển
+# half_open và cho một lần gửi thử. Cập nhật có điều kiện nên giữa nhiều worker chỉ một
+# worker giành được lượt thử
+def allow_request(health, now=None):
+    now = now or timezone.now()
+    if health.state == EndpointHealth.STATE_CLOSED:
+        return True
+    if health.retry_at is None or health.retry_at > now:
+        return False
+    lease_until = now + timedelta(seconds=PROBE_LEASE_SECONDS)
+    won = EndpointHealth.objects.filter(
+        pk=health.pk,
+        state__in=[EndpointHealth.STATE_OPEN, EndpointHealth.STATE_HALF_OPEN],
+        retry_at__lte=now,
+    ).update(state=EndpointHealth.STATE_HALF_OPEN, retry_at=lease_until, updated_day=now)
+    if not won:
+        return False
+    if health.state == EndpointHealth.STATE_HALF_OPEN:
+        logger.warning("[WEBHOOK HEALTH] Lần gửi thử tới %s không có kết quả, thử lại", health.endpoint_url)
+    health.state = EndpointHealth.STATE_HALF_OPEN
+    health.retry_at = lease_until
+    health.updated_day = now
+    return True
+
+
+# Với breaker, receiver "sống" nếu trả lời được và không phải 5xx/408/429; 4xx khác là lỗi
+# của chính sự kiện chứ không phải của receiver
+def is_healthy_response(status_code):
+    return status_code is not None and status_code < 500 and status_code not in (408, 429)
+
+
+def failure_rate(recent):
+    if not recent:
+        return 0.0
+    return sum(1 for ok, _ in recent if not ok) / len(recent)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+# Ghi kết quả các lần gửi tới một receiver rồi tính lại trạng thái breaker.
+# outcomes: danh sách (thành_công, latency_ms, status_code, error)
+def record_outcomes(health, outcomes):
+    if not outcomes:
+        return
+    now = timezone.now()
+    successes = sum(1 for ok, _, _, _ in outcomes if ok)
+    failures = len(outcomes) - successes
+    # Số lỗi liên tiếp ở cuối lượt, sau lần thành công cuối cùng
+    trailing_failures = 0
+    for ok, _, _, _ in reversed(outcomes):
+        if ok:
+            break
+        trailing_failures += 1
+
+    # Bộ đếm cộng dồn bằng F() ngay trong DB, không mất cập nhật khi nhiều worker cùng ghi
+    counters = {
+        'total_successes': F('total_successes') + successes,
+        'total_failures': F('total_failures') + failures,
+        'last_status_code': outcomes[-1][2],
+        'updated_day': now,
+    }
+    if successes:
+        counters['consecutive_failures'] = trailing_failures
+        counters['last_success_day'] = now
+    else:
+        counters['consecutive_failures'] = F('consecutive_failures') + failures
+    if failures:
+        last_error = next(error for ok, _, _, error in reversed(outcomes) if not ok)
+        counters['last_failure_day'] = now
+        counters['last_error'] = (last_error or '')[:MAX_ERROR_LENGTH]
+    EndpointHealth.objects.filter(pk=health.pk).update(**counters)
+
+    # Cửa sổ gần nhất (JSON) và trạng thái breaker: compare-and-set theo updated_day,
+    # worker khác vừa ghi thì đọc lại rồi tính lại
+    window = [[ok, latency_ms] for ok, latency_ms, _, _ in outcomes]
+    last_ok = outcomes[-1][0]
+    for _ in range(RECORD_ATTEMPTS):
+        health.refresh_from_db()
+        changes = {'recent': (health.recent + window)[-WINDOW_SIZE:]}
+        if health.state == EndpointHealth.STATE_HALF_OPEN:
+            changes.update(close(changes['recent']) if last_ok else trip(health, now))
+        elif health.state == EndpointHealth.STATE_CLOSED and (
+                health.consecutive_failures >= CONSECUTIVE_FAILURE_THRESHOLD
+                or (len(changes['recent']) >= MIN_REQUESTS
+                    and failure_rate(changes['recent']) >= FAILURE_RATE_THRESHOLD)):
+            changes.update(trip(health, now))
+        changes['updated_day'] = timezone.now()
+        if EndpointHealth.objects.filter(pk=health.pk, updated_day=health.updated_day).update(**changes):
+            for field, value in changes.items():
+                setattr(health, field, value)
+            if changes.get('state') == EndpointHealth.STATE_OPEN:
+                logger.warning("[WEBHOOK HEALTH] Mở circuit breaker cho %s tới %s (lỗi gần nhất: %s)",
+                               health.endpoint_url, health.retry_at, health.last_error)
+            elif changes.get('state') == EndpointHealth.STATE_CLOSED:
+                logger.info("[WEBHOOK HEALTH] Receiver %s đã hồi phục, đóng circuit breaker", health.endpoint_url)
+            return
+    logger.warning("[WEBHOOK HEALTH] Không cập nhật được trạng thái breaker cho %s sau %d lần thử",
+                   health.endpoint_url, RECORD_ATTEMPTS)
+
+
+# Mở breaker; mỗi lần mở liên tiếp thời gian chờ gấp đôi
+def trip(health, now):
+    open_count = health.open_count + 1
+    delay = min(OPEN_BASE_SECONDS * (2 ** (open_count - 1)), OPEN_MAX_SECONDS)
+    return {
+        'state': EndpointHealth.STATE_OPEN,
+        'open_count': open_count,
+        'retry_at': now + timedelta(seconds=delay),
+    }
+
+
+def close(recent):
+    return {
+        'state': EndpointHealth.STATE_CLOSED,
+        'open_count': 0,
+        'retry_at': None,
+        'recent': recent[-1:],
+    }
+
+
+
+# Cổng breaker cho một lượt gửi: nạp sức khoẻ các URL một lần, mỗi receiver half_open
+# chỉ nhận một lần gửi thử trong lượt, kết quả được ghi gộp theo URL
+class BreakerGate:
+    def __init__(self, urls):
+        self.health = load_health(urls)
+        self.probing = set()
+        self.outcomes = {}
+
+    def allow(self, url):
+        if url in self.probing:
+            return False
+        health = self.health[url]
+        allowed = allow_request(health)
+        if allowed and health.state == EndpointHealth.STATE_HALF_OPEN:
+            self.probing.add(url)
+        return allowed
+
+    # Thời điểm nên thử lại những lần gửi bị breaker chặn
+    def postpone_until(self, url, now=None):
+        now = now or timezone.now()
+        health = self.health[url]
+        if health.state == EndpointHealth.STATE_OPEN and health.retry_at and health.retry_at > now:
+            return health.retry_at
+        return now + timedelta(seconds=PROBE_WAIT_SECONDS)
+
+    def add(self, url, status_code, error, latency_ms):
+        # Không có latency nghĩa là chưa kịp gửi (hết deadline), không tính cho receiver
+        if latency_ms is not None:
+            ok = error is None and is_healthy_response(status_code)
+            self.outcomes.setdefault(url, []).append((ok, latency_ms, status_code, error))
+
+    def save(self):
+        for url, outcomes in self.outcomes.items():
+            record_outcomes(self.health[url], outcomes)
+        self.outcomes = {}
+
+
+def health_summary(health):
+    latencies = [latency for _, latency in health.recent]
+    total = len(health.recent)
+    return {
+        "success_rate": round(1 - failure_rate(health.recent), 4) if total else None,
+        "window_size": total,
+        "p50_latency_ms": percentile(latencies, 0.5),
+        "p95_latency_ms": percentile(latencies, 0.95),
+    }
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from .models import WebhookDeliveryLog, WebhookDeliveryStat
+
+
+def build_log(event_id, webhook_id, status_code, text, error, latency_ms, attempt=1):
+    succeeded = error is None and status_code is not None and 200 <= status_code < 300
+    return WebhookDeliveryLog(
+        event_id=event_id,
+        webhook_id=webhook_id,
+        status_code=status_code,
+        succeeded=succeeded,
+        latency_ms=latency_ms,
+        attempt=attempt,
+        response=(error if error is not None else text or '')[:WebhookDeliveryLog.MAX_RESPONSE_LENGTH],
+    )
+
+
+# Cộng một khối nhật ký vào bảng thống kê theo ngày rồi xoá khối đó, trong cùng transaction
+def compact_chunk(ids, rollup=True):
+    with transaction.atomic():
+        if rollup:
+            rows = (
+                WebhookDeliveryLog.objects.filter(id__in=ids)
+                .annotate(day=TruncDate('created_day'))
+                .values('webhook_id', 'day')
+                .annotate(
+                    total=Count('id'),
+                    succeeded_count=Count('id', filter=Q(succeeded=True)),
+                    latency_sum=Sum('latency_ms'),
+                    latency_max=Max('latency_ms'),
+                )
+            )
+            for row in rows:
+                WebhookDeliveryStat.objects.get_or_create(webhook_id=row['webhook_id'], day=row['day'])
+                stats = WebhookDeliveryStat.objects.filter(webhook_id=row['webhook_id'], day=row['day'])
+                stats.update(
+                    total=F('total') + row['total'],
+                    succeeded=F('succeeded') + row['succeeded_count'],
+                    failed=F('failed') + row['total'] - row['succeeded_count'],
+                    latency_sum_ms=F('latency_sum_ms') + (row['latency_sum'] or 0),
+                )
+                stats.filter(latency_max_ms__lt=row['latency_max'] or 0).update(latency_max_ms=row['latency_max'])
+        deleted, _ = WebhookDeliveryLog.objects.filter(id__in=ids).delete()
+    return deleted
+
+
+# Compact các dòng cũ hơn `before` theo từng khối `chunk_size` dòng để không khoá bảng lâu
+def compact_logs(before, chunk_size=1000, rollup=True):
+    total = 0
+    while True:
+        ids = list(
+            WebhookDeliveryLog.objects.filter(created_day__lt=before)
+            .order_by('created_day', 'id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return total
+        total += compact_chunk(ids, rollup)
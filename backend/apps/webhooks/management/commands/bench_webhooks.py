@@ -0,0 +1,167 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.users.models import User
+from apps.workspaces.models import Workspace
+from apps.webhooks.delivery import process_due_deliveries
+from apps.webhooks.health import percentile
+from apps.webhooks.models import Webhook
+from apps.webhooks.routing import routing_table
+from apps.webhooks.views import EventSendView
+
+
+# Receiver giả chạy trên localhost: trễ và lỗi được bơm vào theo cấu hình,
+# đếm số request và số kết nối TCP mở tới nó
+class StandInReceiver:
+    def __init__(self, latency_ms=0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Keep-alive: header và body được ghi thành hai lần, để Nagle bật thì mỗi request
+            # trên kết nối dùng lại phải chờ delayed ACK (~40ms) của client
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with receiver.lock:
+                    receiver.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with receiver.lock:
+                    receiver.requests += 1
+                if receiver.latency_ms:
+                    time.sleep(receiver.latency_ms / 1000)
+                code = 500 if random.random() < receiver.error_rate else 200
+                self.send_response(code)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot(self):
+        with self.lock:
+            return self.requests, self.connections
+
+
+# Đo thông lượng gửi webhook: N webhook, M sự kiện qua EventSendView, đồng bộ (?sync=true)
+# và qua outbox + worker. Mọi dữ liệu tạo ra được rollback khi kết thúc
+class Command(BaseCommand):
+    help = "Benchmark gửi webhook với receiver giả trên localhost"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--webhooks", type=int, default=10)
+        parser.add_argument("--events", type=int, default=100)
+        parser.add_argument("--latency-ms", type=int, default=20, help="Độ trễ receiver giả cho mỗi request")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Tỉ lệ trả 500, từ 0 đến 1")
+        parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+
+    def handle(self, *args, **options):
+        with StandInReceiver(options["latency_ms"], options["error_rate"]) as receiver:
+            try:
+                with transaction.atomic():
+                    workspace_id = self.setup_webhooks(receiver.url, options["webhooks"])
+                    if options["mode"] in ("sync", "both"):
+                        self.bench_sync(receiver, workspace_id, options["events"])
+                    if options["mode"] in ("async", "both"):
+                        self.bench_async(receiver, workspace_id, options["events"])
+                    transaction.set_rollback(True)
+            finally:
+                routing_table.invalidate()
+
+    def setup_webhooks(self, url, count):
+        owner = User.objects.create(name="bench", email=f"bench-{uuid.uuid4().hex}@example.invalid")
+        workspace = Workspace.objects.create(name="webhook bench", owner=owner)
+        # EventSendView chỉ nhận sự kiện từ owner/admin của workspace
+        self.authorization = f"Bearer {RefreshToken.for_user(owner).access_token}"
+        Webhook.objects.bulk_create([
+            Webhook(workspace=workspace, endpoint_url=f"{url}/{i}", event_type="create", model="comment")
+            for i in range(count)
+        ])
+        # Signal không chạy với bulk_create và on_commit không chạy khi rollback
+        routing_table.invalidate()
+        return workspace.id
+
+    def post_events(self, workspace_id, count, path):
+        factory = APIRequestFactory()
+        view = EventSendView.as_view()
+        latencies = []
+        for i in range(count):
+            body = json.dumps({"workspace": workspace_id, "model": "comment", "event_type": "create", "seq": i})
+            started = time.perf_counter()
+            response = view(factory.post(path, body, content_type="application/json",
+                                         HTTP_AUTHORIZATION=self.authorization))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f"EventSendView trả {response.status_code}: {response.data}")
+        return latencies
+
+    def bench_sync(self, receiver, workspace_id, events):
+        requests_before, connections_before = receiver.snapshot()
+        started = time.perf_counter()
+        latencies = self.post_events(workspace_id, events, "/api/events/?sync=true")
+        elapsed = time.perf_counter() - started
+        requests_after, connections_after = receiver.snapshot()
+        self.report("sync", events, elapsed, latencies,
+                    requests_after - requests_before, connections_after - connections_before)
+
+    def bench_async(self, receiver, workspace_id, events):
+        requests_before, connections_before = receiver.snapshot()
+        started = time.perf_counter()
+        latencies = self.post_events(workspace_id, events, "/api/events/")
+        enqueued = time.perf_counter()
+        totals = {"claimed": 0, "delivered": 0, "retrying": 0, "dead": 0, "postponed": 0}
+        # Rút outbox tới khi không còn delivery đến hạn (lần thử lại nằm ở tương lai)
+        while True:
+            stats = process_due_deliveries(limit=500)
+            for key in totals:
+                totals[key] += stats[key]
+            if not stats["claimed"]:
+                break
+        finished = time.perf_counter()
+        requests_after, connections_after = receiver.snapshot()
+        self.report("async (enqueue)", events, enqueued - started, latencies, 0, 0)
+        self.report("async (drain)", totals["claimed"], finished - enqueued, [],
+                    requests_after - requests_before, connections_after - connections_before)
+        self.stdout.write(
+            f"  delivered={totals['delivered']} retrying={totals['retrying']} "
+            f"dead={totals['dead']} postponed={totals['postponed']}"
+        )
+
+    def report(self, label, count, elapsed, latencies, requests, connections):
+        rate = count / elapsed if elapsed else 0
+        line = f"[{label}] {count} trong {elapsed:.3f}s = {rate:.1f}/s"
+        if latencies:
+            line += (f" | latency ms p50={percentile(latencies, 0.5):.1f} "
+                     f"p95={percentile(latencies, 0.95):.1f} p99={percentile(latencies, 0.99):.1f}")
+        if requests:
+            line += f" | {requests} request qua {connections} kết nối"
+        self.stdout.write(line)
@@ -0,0 +1,18 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.webhooks.replay import purge_events
+
+
+# Dọn kho sự kiện webhook: sự kiện cũ hơn --days ngày không còn phát lại được thì xoá từng khối
+class Command(BaseCommand):
+    help = "Xoá webhook_events cũ hơn --days ngày (giữ lại phần các replay đang chạy chưa đọc tới)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Giữ sự kiện trong chừng ấy ngày gần nhất")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = purge_events(before, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Đã xoá {deleted} sự kiện webhook trước {before}"))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.webhooks.logs import compact_logs
+
+
+# Dọn nhật ký gửi webhook cũ: cộng dồn vào webhook_delivery_stats theo ngày rồi xoá từng khối
+class Command(BaseCommand):
+    help = "Compact webhook_delivery_logs cũ hơn --days ngày"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Giữ nguyên nhật ký trong chừng ấy ngày gần nhất")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--no-rollup", action="store_true", help="Chỉ xoá, không cộng vào bảng thống kê")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = compact_logs(before, options["chunk_size"], rollup=not options["no_rollup"])
+        self.stdout.write(self.style.SUCCESS(f"Đã compact {deleted} dòng nhật ký gửi webhook trước {before}"))
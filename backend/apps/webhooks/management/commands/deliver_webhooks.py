@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.webhooks.delivery import LEASE_SECONDS, process_due_deliveries
+from apps.webhooks.replay import advance_replays
+
+
+# Worker rút outbox webhook_deliveries: gửi, thử lại với backoff, dead-letter khi hết lượt;
+# đồng thời đọc dần các replay đang chạy vào outbox
+class Command(BaseCommand):
+    help = "Gửi các webhook delivery đến hạn trong outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Chạy một vòng rồi thoát")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Số giây chờ khi outbox không còn delivery đến hạn")
+        parser.add_argument("--lease", type=int, default=LEASE_SECONDS,
+                            help="Số giây giữ một delivery trước khi worker khác được lấy lại")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                replayed = advance_replays()
+                if replayed:
+                    self.stdout.write(f"Đã đưa {replayed} sự kiện phát lại vào hàng đợi")
+                stats = process_due_deliveries(options["batch_size"], options["lease"])
+                if stats["claimed"]:
+                    self.stdout.write(
+                        f"Đã xử lý {stats['claimed']} delivery: {stats['delivered']} thành công, "
+                        f"{stats['retrying']} thử lại, {stats['dead']} dead-letter, "
+                        f"{stats['postponed']} hoãn do circuit breaker"
+                    )
+                if options["once"]:
+                    break
+                if stats["claimed"] < options["batch_size"]:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Dừng worker")
@@ -0,0 +1,24 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .events import collect_events
+
+
+# Gom mọi sự kiện model phát sinh trong một request thành một lô, ghi vào outbox một lần
+# khi view trả về thay vì một INSERT cho mỗi dòng bị ghi
+class WebhookEventMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect_events():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with collect_events():
+            return await self.get_response(request)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='max_attempts',
+            field=models.PositiveSmallIntegerField(default=8),
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=32)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_flight', 'In flight'), ('delivered', 'Delivered'), ('dead', 'Dead')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('delivered_day', models.DateTimeField(blank=True, null=True)),
+                ('created_day', models.DateTimeField(auto_now_add=True)),
+                ('updated_day', models.DateTimeField(auto_now=True)),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='webhooks.webhook')),
+            ],
+            options={
+                'db_table': 'webhook_deliveries',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='webhook_deliv_due_idx')],
+            },
+        ),
+    ]
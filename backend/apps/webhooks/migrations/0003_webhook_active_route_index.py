@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0002_webhookdelivery'),
+        ('workspaces', '0003_workspace_updated_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='webhook',
+            index=models.Index(fields=['workspace', 'model', 'event_type', 'active'], name='webhooks_route_idx'),
+        ),
+    ]
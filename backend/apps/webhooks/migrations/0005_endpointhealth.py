@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0004_webhook_batching'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('endpoint_url', models.TextField()),
+                ('state', models.CharField(choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half open')], default='closed', max_length=10)),
+                ('consecutive_failures', models.PositiveIntegerField(default=0)),
+                ('open_count', models.PositiveIntegerField(default=0)),
+                ('retry_at', models.DateTimeField(blank=True, null=True)),
+                ('recent', models.JSONField(default=list)),
+                ('total_successes', models.PositiveBigIntegerField(default=0)),
+                ('total_failures', models.PositiveBigIntegerField(default=0)),
+                ('last_status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('last_success_day', models.DateTimeField(blank=True, null=True)),
+                ('last_failure_day', models.DateTimeField(blank=True, null=True)),
+                ('updated_day', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'webhook_endpoint_health',
+            },
+        ),
+    ]
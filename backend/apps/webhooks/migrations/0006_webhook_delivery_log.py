@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0005_endpointhealth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookDeliveryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=32)),
+                ('webhook_id', models.BigIntegerField()),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('succeeded', models.BooleanField(default=False)),
+                ('latency_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('attempt', models.PositiveSmallIntegerField(default=1)),
+                ('response', models.CharField(blank=True, default='', max_length=255)),
+                ('created_day', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'webhook_delivery_logs',
+                'indexes': [models.Index(fields=['created_day'], name='webhook_log_created_idx'), models.Index(fields=['webhook_id', 'created_day', 'id'], name='webhook_log_webhook_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDeliveryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('webhook_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('succeeded', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('latency_sum_ms', models.PositiveBigIntegerField(default=0)),
+                ('latency_max_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'webhook_delivery_stats',
+                'constraints': [models.UniqueConstraint(fields=('webhook_id', 'day'), name='webhook_stats_webhook_day_uniq')],
+            },
+        ),
+    ]
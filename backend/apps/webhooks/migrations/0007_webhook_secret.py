@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:09
+
+import apps.webhooks.encoding
+import secrets
+from django.db import migrations, models
+
+
+# AddField tính default một lần cho mọi dòng cũ; cấp secret riêng cho từng webhook
+def generate_secrets(apps, schema_editor):
+    Webhook = apps.get_model('webhooks', 'Webhook')
+    for webhook in Webhook.objects.only('id').iterator():
+        Webhook.objects.filter(pk=webhook.pk).update(secret=secrets.token_hex(32))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0006_webhook_delivery_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='secret',
+            field=models.CharField(blank=True, default=apps.webhooks.encoding.generate_secret, max_length=64),
+        ),
+        migrations.RunPython(generate_secrets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0007_webhook_secret'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=32, unique=True)),
+                ('workspace_id', models.BigIntegerField()),
+                ('model', models.CharField(choices=[('project', 'Project'), ('comment', 'Comment'), ('user', 'User')], max_length=20)),
+                ('event_type', models.CharField(choices=[('create', 'Create'), ('read', 'Read'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('payload', models.JSONField()),
+                ('created_day', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'webhook_events',
+                'indexes': [models.Index(fields=['workspace_id', 'model', 'event_type', 'created_day', 'id'], name='webhook_events_route_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookReplay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('rate_per_second', models.PositiveIntegerField(default=10)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=10)),
+                ('cursor_day', models.DateTimeField(blank=True, null=True)),
+                ('cursor_id', models.BigIntegerField(default=0)),
+                ('next_slot_at', models.DateTimeField(blank=True, null=True)),
+                ('enqueued', models.PositiveIntegerField(default=0)),
+                ('created_day', models.DateTimeField(auto_now_add=True)),
+                ('updated_day', models.DateTimeField(auto_now=True)),
+                ('finished_day', models.DateTimeField(blank=True, null=True)),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='replays', to='webhooks.webhook')),
+            ],
+            options={
+                'db_table': 'webhook_replays',
+            },
+        ),
+    ]
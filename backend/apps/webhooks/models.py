@@ -1,5 +1,6 @@
 from django.db import models
 from apps.workspaces.models import Workspace
+from .encoding import generate_secret
 
 # Create your models here.
 class Webhook(models.Model):
@@ -20,10 +21,188 @@ class Webhook(models.Model):
     endpoint_url = models.TextField()
     event_type = models.CharField(max_length=10, choices=EVENT_CHOICES)
     model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    active = models.BooleanField(default=True)
+    # Khoá ký HMAC-SHA256 cho header X-Webhook-Signature; để trống thì không ký
+    secret = models.CharField(max_length=64, blank=True, default=generate_secret)
+    # Số lần thử tối đa cho mỗi lần giao sự kiện trước khi chuyển sang dead-letter
+    max_attempts = models.PositiveSmallIntegerField(default=8)
+    # Gửi theo lô: 1 = mỗi sự kiện một POST; >1 thì gom tối đa chừng ấy sự kiện thành một
+    # mảng JSON, sự kiện đầu tiên chờ tối đa batch_linger_seconds để đợi các sự kiện khác
+    batch_max_size = models.PositiveSmallIntegerField(default=1)
+    batch_linger_seconds = models.PositiveIntegerField(default=0)
     created_day = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'webhooks'  
+        indexes = [
+            # Định tuyến sự kiện: WHERE workspace_id = ? AND model = ? AND event_type = ? AND active
+            models.Index(fields=['workspace', 'model', 'event_type', 'active'], name='webhooks_route_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.event_type.upper()} webhook for {self.model} in workspace {self.workspace.name}"
\ No newline at end of file
+        return f"{self.event_type.upper()} webhook for {self.model} in workspace {self.workspace.name}"
+
+
+# Outbox: mỗi dòng là một sự kiện chờ giao tới một webhook, worker deliver_webhooks rút dần
+class WebhookDelivery(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_IN_FLIGHT = 'in_flight'
+    STATUS_DELIVERED = 'delivered'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_IN_FLIGHT, 'In flight'),
+        (STATUS_DELIVERED, 'Delivered'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+
+    # Worker ưu tiên sự kiện trực tiếp trước sự kiện phát lại
+    PRIORITY_LIVE = 0
+    PRIORITY_REPLAY = 1
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries')
+    event_id = models.CharField(max_length=32)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_LIVE)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    delivered_day = models.DateTimeField(null=True, blank=True)
+    created_day = models.DateTimeField(auto_now_add=True)
+    updated_day = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'webhook_deliveries'
+        indexes = [
+            # Worker chỉ quét các dòng đến hạn: WHERE status IN (...) AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_deliv_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delivery {self.event_id} -> webhook {self.webhook_id} ({self.status})"
+
+
+# Sức khoẻ của một receiver (theo endpoint_url, dùng chung cho mọi webhook trỏ tới cùng URL)
+# và trạng thái circuit breaker: closed gửi bình thường, open bỏ qua tới retry_at,
+# half_open cho một lần gửi thử
+class EndpointHealth(models.Model):
+    STATE_CLOSED = 'closed'
+    STATE_OPEN = 'open'
+    STATE_HALF_OPEN = 'half_open'
+    STATE_CHOICES = [
+        (STATE_CLOSED, 'Closed'),
+        (STATE_OPEN, 'Open'),
+        (STATE_HALF_OPEN, 'Half open'),
+    ]
+
+    url_hash = models.CharField(max_length=64, unique=True)
+    endpoint_url = models.TextField()
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_CLOSED)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    open_count = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    # Cửa sổ trượt các lần gửi gần nhất: [[thành_công, latency_ms], ...]
+    recent = models.JSONField(default=list)
+    total_successes = models.PositiveBigIntegerField(default=0)
+    total_failures = models.PositiveBigIntegerField(default=0)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    last_success_day = models.DateTimeField(null=True, blank=True)
+    last_failure_day = models.DateTimeField(null=True, blank=True)
+    updated_day = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'webhook_endpoint_health'
+
+    def __str__(self):
+        return f"{self.endpoint_url} ({self.state})"
+
+
+# Nhật ký từng lần gửi. Không dùng FK để ghi nhanh và không kéo theo cascade khi xoá webhook;
+# phản hồi chỉ giữ 255 ký tự đầu. Index theo created_day để xoá/compact theo khoảng thời gian
+# (và tách partition theo ngày nếu cần)
+class WebhookDeliveryLog(models.Model):
+    MAX_RESPONSE_LENGTH = 255
+
+    event_id = models.CharField(max_length=32)
+    webhook_id = models.BigIntegerField()
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    succeeded = models.BooleanField(default=False)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    attempt = models.PositiveSmallIntegerField(default=1)
+    response = models.CharField(max_length=MAX_RESPONSE_LENGTH, blank=True, default='')
+    created_day = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'webhook_delivery_logs'
+        indexes = [
+            models.Index(fields=['created_day'], name='webhook_log_created_idx'),
+            models.Index(fields=['webhook_id', 'created_day', 'id'], name='webhook_log_webhook_idx'),
+        ]
+
+
+# Thống kê theo ngày của các dòng nhật ký đã được compact
+class WebhookDeliveryStat(models.Model):
+    webhook_id = models.BigIntegerField()
+    day = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    latency_sum_ms = models.PositiveBigIntegerField(default=0)
+    latency_max_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'webhook_delivery_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['webhook_id', 'day'], name='webhook_stats_webhook_day_uniq'),
+        ]
+
+
+
+# Kho sự kiện: mọi sự kiện đã phát, để phát lại cho webhook trong một khoảng thời gian
+class WebhookEvent(models.Model):
+    event_id = models.CharField(max_length=32, unique=True)
+    workspace_id = models.BigIntegerField()
+    model = models.CharField(max_length=20, choices=Webhook.MODEL_CHOICES)
+    event_type = models.CharField(max_length=10, choices=Webhook.EVENT_CHOICES)
+    payload = models.JSONField()
+    created_day = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'webhook_events'
+        indexes = [
+            models.Index(fields=['workspace_id', 'model', 'event_type', 'created_day', 'id'],
+                         name='webhook_events_route_idx'),
+        ]
+
+
+# Một yêu cầu phát lại: worker đọc kho sự kiện theo từng khối từ vị trí con trỏ và
+# đưa vào outbox với độ ưu tiên thấp, giãn đều theo rate_per_second
+class WebhookReplay(models.Model):
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+    ]
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='replays')
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    rate_per_second = models.PositiveIntegerField(default=10)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    cursor_day = models.DateTimeField(null=True, blank=True)
+    cursor_id = models.BigIntegerField(default=0)
+    next_slot_at = models.DateTimeField(null=True, blank=True)
+    enqueued = models.PositiveIntegerField(default=0)
+    created_day = models.DateTimeField(auto_now_add=True)
+    updated_day = models.DateTimeField(auto_now=True)
+    finished_day = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'webhook_replays'
+
+    def __str__(self):
+        return f"Replay webhook {self.webhook_id} {self.start} - {self.end} ({self.status})"
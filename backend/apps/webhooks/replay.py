@@ -0,0 +1,88 @@
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Min
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.common.pagination import keyset_after
+from .models import WebhookDelivery, WebhookEvent, WebhookReplay
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+
+
+# Đẩy tiếp các replay đang chạy, mỗi replay tối đa một khối mỗi lượt của worker
+def advance_replays(chunk_size=CHUNK_SIZE):
+    now = timezone.now()
+    enqueued = 0
+    with transaction.atomic():
+        replays = (WebhookReplay.objects.select_for_update(skip_locked=True)
+                   .filter(status=WebhookReplay.STATUS_RUNNING).select_related('webhook'))
+        for replay in replays:
+            enqueued += advance_replay(replay, now, chunk_size)
+    return enqueued
+
+
+def advance_replay(replay, now, chunk_size):
+    webhook = replay.webhook
+    # Khối trước chưa gửi hết thì chưa đọc thêm: outbox không phình ra vì một replay lớn
+    outstanding = WebhookDelivery.objects.filter(
+        webhook=webhook, priority=WebhookDelivery.PRIORITY_REPLAY,
+        status__in=[WebhookDelivery.STATUS_PENDING, WebhookDelivery.STATUS_IN_FLIGHT],
+    ).count()
+    if outstanding >= chunk_size:
+        return 0
+
+    events = WebhookEvent.objects.filter(
+        workspace_id=webhook.workspace_id, model=webhook.model, event_type=webhook.event_type,
+        created_day__gte=replay.start, created_day__lte=replay.end,
+    )
+    if replay.cursor_day is not None:
+        events = events.filter(keyset_after(("created_day", "id"), (replay.cursor_day, replay.cursor_id)))
+    chunk = list(events.order_by("created_day", "id")[:chunk_size])
+
+    # Giãn đều theo rate_per_second, nối tiếp lịch của khối trước. Delivery và con trỏ của
+    # replay được ghi cùng transaction để khối không bị đưa vào outbox hai lần
+    slot = max(now, replay.next_slot_at or now)
+    interval = 1 / replay.rate_per_second
+    with transaction.atomic():
+        WebhookDelivery.objects.bulk_create([
+            WebhookDelivery(webhook=webhook, event_id=event.event_id, payload=event.payload,
+                            priority=WebhookDelivery.PRIORITY_REPLAY,
+                            next_attempt_at=slot + timedelta(seconds=i * interval))
+            for i, event in enumerate(chunk)
+        ])
+
+        if chunk:
+            replay.cursor_day, replay.cursor_id = chunk[-1].created_day, chunk[-1].id
+            replay.next_slot_at = slot + timedelta(seconds=len(chunk) * interval)
+            replay.enqueued += len(chunk)
+        if len(chunk) < chunk_size:
+            replay.status = WebhookReplay.STATUS_DONE
+            replay.finished_day = now
+            logger.info("[WEBHOOK REPLAY] Replay id=%s cho webhook id=%s hoàn tất: %s sự kiện",
+                        replay.id, webhook.id, replay.enqueued)
+        replay.save()
+    return len(chunk)
+
+
+# Xoá sự kiện cũ hơn `before` khỏi kho theo từng khối `chunk_size` dòng. Sự kiện mà một
+# replay đang chạy chưa đọc tới (từ con trỏ, hoặc từ start nếu chưa bắt đầu) được giữ lại
+def purge_events(before, chunk_size=1000):
+    pending = (WebhookReplay.objects.filter(status=WebhookReplay.STATUS_RUNNING)
+               .annotate(position=Coalesce("cursor_day", "start"))
+               .aggregate(oldest=Min("position"))["oldest"])
+    if pending is not None:
+        before = min(before, pending)
+    total = 0
+    while True:
+        ids = list(
+            WebhookEvent.objects.filter(created_day__lt=before)
+            .order_by("created_day", "id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = WebhookEvent.objects.filter(id__in=ids).delete()
+        total += deleted
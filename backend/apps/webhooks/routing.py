@@ -0,0 +1,69 @@
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from .models import Webhook
+
+VERSION_KEY = 'webhooks:routing:version'
+
+
+# Bảng định tuyến trong tiến trình: (workspace_id, model, event_type) -> danh sách webhook active.
+# Mỗi khoá chỉ truy vấn DB một lần qua index webhooks_route_idx; khi webhook bị tạo/sửa/xoá,
+# version trong cache dùng chung đổi sang giá trị mới và mọi tiến trình bỏ bảng cũ ở lần đọc
+# version kế tiếp. Version chỉ được đọc lại sau mỗi WEBHOOK_ROUTING_VERSION_CHECK_SECONDS để
+# không tốn một lượt gọi cache (một truy vấn với DatabaseCache) cho mỗi sự kiện. Mỗi khoá còn hết hạn sau WEBHOOK_ROUTING_CACHE_SECONDS, phòng khi lỡ mất
+# một lần vô hiệu hoá (cache bị xoá, ghi thẳng vào DB không qua signal)
+class RoutingTable:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._routes = {}
+        self._checked = None
+
+    # Version dùng chung, đọc lại từ cache khi lần đọc trước đã quá WEBHOOK_ROUTING_VERSION_CHECK_SECONDS
+    def current_version(self, now):
+        with self._lock:
+            checked = self._checked
+        if checked is not None and now - checked[0] < settings.WEBHOOK_ROUTING_VERSION_CHECK_SECONDS:
+            return checked[1]
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Chưa có (hoặc bị đẩy khỏi cache): tạo version mới, không bao giờ trùng bản cũ
+            cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(VERSION_KEY)
+        with self._lock:
+            self._checked = (now, version)
+        return version
+
+    def match(self, workspace_id, model, event_type):
+        now = time.monotonic()
+        version = self.current_version(now)
+        key = (int(workspace_id), model, event_type)
+        with self._lock:
+            if self._version != version:
+                self._routes = {}
+                self._version = version
+            entry = self._routes.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        webhooks = list(Webhook.objects.filter(workspace_id=key[0], model=model,
+                                               event_type=event_type, active=True))
+        with self._lock:
+            if self._version == version:
+                self._routes[key] = (now + settings.WEBHOOK_ROUTING_CACHE_SECONDS, webhooks)
+        return webhooks
+
+    def invalidate(self):
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        with self._lock:
+            self._routes = {}
+            self._version = None
+            self._checked = None
+
+
+routing_table = RoutingTable()
+
+
+def match_webhooks(workspace_id, model, event_type):
+    return routing_table.match(workspace_id, model, event_type)
@@ -1,8 +1,44 @@
 from rest_framework import serializers
-from .models import Webhook
+from .models import EndpointHealth, Webhook, WebhookDeliveryLog, WebhookReplay
+from .health import health_summary
 
+# secret (khoá ký HMAC) không bao giờ được đọc hay ghi qua serializer: chỉ trả về một lần
+# lúc tạo webhook và lúc xoay khoá (WebhookSecretRotateView)
 class WebhookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Webhook
+        exclude = ('secret',)
+
+
+class EndpointHealthSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EndpointHealth
+        exclude = ('recent', 'url_hash')
+
+    # Thêm success_rate, window_size, p50/p95 latency tính từ cửa sổ gần nhất
+    def to_representation(self, instance):
+        return {**super().to_representation(instance), **health_summary(instance)}
+
+
+class WebhookDeliveryLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookDeliveryLog
         fields = '__all__'
-        
\ No newline at end of file
+
+
+class WebhookReplaySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookReplay
+        fields = '__all__'
+        read_only_fields = ('webhook', 'status', 'cursor_day', 'cursor_id', 'next_slot_at',
+                            'enqueued', 'finished_day')
+
+    def validate_rate_per_second(self, value):
+        if not 1 <= value <= 1000:
+            raise serializers.ValidationError("rate_per_second phải trong khoảng 1-1000")
+        return value
+
+    def validate(self, attrs):
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError({"end": "end phải sau start"})
+        return attrs
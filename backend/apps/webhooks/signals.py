@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .events import emit, remember_user_workspaces
+from .models import Webhook
+from .routing import routing_table
+
+
+# Webhook thay đổi thì bảng định tuyến phải nạp lại (sau khi transaction commit)
+@receiver(post_save, sender=Webhook)
+@receiver(post_delete, sender=Webhook)
+def invalidate_routing_table(sender, instance, **kwargs):
+    transaction.on_commit(routing_table.invalidate)
+
+
+# Phát sự kiện create/update/delete của Project, Comment, User cho các webhook đã đăng ký
+def emit_saved(model):
+    def handler(sender, instance, created, raw=False, **kwargs):
+        if not raw:
+            emit(model, 'create' if created else 'update', instance)
+    return handler
+
+
+def emit_deleted(model):
+    def handler(sender, instance, **kwargs):
+        emit(model, 'delete', instance)
+    return handler
+
+
+for sender, model in (('projects.Project', 'project'), ('comments.Comment', 'comment'), ('users.User', 'user')):
+    post_save.connect(emit_saved(model), sender=sender, weak=False, dispatch_uid=f'webhooks_emit_saved_{model}')
+    post_delete.connect(emit_deleted(model), sender=sender, weak=False, dispatch_uid=f'webhooks_emit_deleted_{model}')
+
+
+@receiver(pre_delete, sender='users.User')
+def remember_deleted_user_workspaces(sender, instance, **kwargs):
+    remember_user_workspaces(instance)
@@ -1,3 +1,258 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.workspacemembers.models import WorkspaceMember
+from apps.users.models import User
+from apps.workspaces.models import Workspace
+from .delivery import claim_due_deliveries, delivery_job, enqueue_events, group_deliveries
+from .health import BreakerGate, allow_request, load_health, record_outcomes
+from .models import EndpointHealth, Webhook, WebhookDelivery, WebhookEvent, WebhookReplay
+from .replay import purge_events
+from .routing import VERSION_KEY, RoutingTable
 
-# Create your tests here.
+URL = "https://receiver.example.com/hook"
+
+
+# Circuit breaker: lượt gửi thử half_open có lease, bộ đếm không mất cập nhật giữa các worker
+class BreakerTests(TestCase):
+    def setUp(self):
+        self.health = load_health([URL])[URL]
+
+    def open_breaker(self, retry_at):
+        EndpointHealth.objects.filter(pk=self.health.pk).update(
+            state=EndpointHealth.STATE_OPEN, open_count=1, retry_at=retry_at)
+
+    def test_only_one_worker_wins_the_probe(self):
+        self.open_breaker(timezone.now() - timedelta(seconds=1))
+        first, second = load_health([URL])[URL], load_health([URL])[URL]
+        self.assertTrue(allow_request(first))
+        self.assertFalse(allow_request(second))
+        self.assertEqual(EndpointHealth.objects.get().state, EndpointHealth.STATE_HALF_OPEN)
+
+    def test_unrecorded_probe_is_retried_after_lease(self):
+        self.open_breaker(timezone.now() - timedelta(seconds=1))
+        gate = BreakerGate([URL])
+        self.assertTrue(gate.allow(URL))
+        # Worker chết trước khi ghi kết quả: trong lease thì chặn, hết lease thì cho thử lại
+        self.assertFalse(allow_request(load_health([URL])[URL]))
+        lease_end = EndpointHealth.objects.get().retry_at
+        self.assertFalse(allow_request(load_health([URL])[URL], now=lease_end - timedelta(seconds=1)))
+        self.assertTrue(allow_request(load_health([URL])[URL], now=lease_end))
+
+        record_outcomes(load_health([URL])[URL], [(True, 12, 200, None)])
+        self.assertEqual(EndpointHealth.objects.get().state, EndpointHealth.STATE_CLOSED)
+
+    def test_concurrent_records_keep_all_counts(self):
+        first, second = load_health([URL])[URL], load_health([URL])[URL]
+        record_outcomes(first, [(False, 10, 503, "boom")] * 3)
+        record_outcomes(second, [(False, 10, 503, "boom")] * 2 + [(True, 10, 200, None)])
+        health = EndpointHealth.objects.get()
+        self.assertEqual((health.total_failures, health.total_successes), (5, 1))
+        self.assertEqual(health.consecutive_failures, 0)
+        self.assertEqual(len(health.recent), 6)
+
+    def test_consecutive_failures_trip_the_breaker(self):
+        record_outcomes(self.health, [(False, 10, 503, "boom")] * 3)
+        record_outcomes(load_health([URL])[URL], [(False, 10, 500, "down")] * 2)
+        health = EndpointHealth.objects.get()
+        self.assertEqual(health.state, EndpointHealth.STATE_OPEN)
+        self.assertEqual(health.consecutive_failures, 5)
+        self.assertEqual(health.last_error, "down")
+        self.assertGreater(health.retry_at, timezone.now())
+
+
+# Bảng định tuyến: version trong cache dùng chung, TTL trong tiến trình, webhook đã xoá không làm hỏng lô
+class RoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create(name="Owner", email="owner@example.com")
+        self.workspace = Workspace.objects.create(name="ws", owner=owner)
+        self.webhook = Webhook.objects.create(workspace=self.workspace, endpoint_url=URL,
+                                              event_type="create", model="comment")
+
+    def match(self, table):
+        return table.match(self.workspace.id, "comment", "create")
+
+    @override_settings(WEBHOOK_ROUTING_VERSION_CHECK_SECONDS=0)
+    def test_invalidation_reaches_other_tables(self):
+        first, second = RoutingTable(), RoutingTable()
+        self.assertEqual(self.match(first), [self.webhook])
+        self.assertEqual(self.match(second), [self.webhook])
+        Webhook.objects.filter(pk=self.webhook.pk).update(active=False)
+        # Tiến trình khác vô hiệu hoá: bảng này thấy version mới trong cache
+        first.invalidate()
+        self.assertEqual(self.match(second), [])
+
+    def test_version_is_read_once_per_interval(self):
+        table = RoutingTable()
+        self.match(table)
+        with mock.patch("apps.webhooks.routing.cache") as shared:
+            for _ in range(5):
+                self.assertEqual(self.match(table), [self.webhook])
+            shared.get.assert_not_called()
+
+    @override_settings(WEBHOOK_ROUTING_VERSION_CHECK_SECONDS=0)
+    def test_evicted_version_is_never_reused(self):
+        table = RoutingTable()
+        self.match(table)
+        cache.delete(VERSION_KEY)
+        Webhook.objects.filter(pk=self.webhook.pk).update(active=False)
+        self.assertEqual(self.match(table), [])
+
+    @override_settings(WEBHOOK_ROUTING_CACHE_SECONDS=0)
+    def test_routes_expire(self):
+        table = RoutingTable()
+        self.match(table)
+        Webhook.objects.filter(pk=self.webhook.pk).update(active=False)
+        self.assertEqual(self.match(table), [])
+
+    def test_deleted_webhook_is_skipped(self):
+        stale = RoutingTable()
+        webhooks = self.match(stale)
+        other = Webhook.objects.create(workspace=self.workspace, endpoint_url=URL,
+                                       event_type="create", model="comment")
+        Webhook.objects.filter(pk=self.webhook.pk).delete()
+        event = {"workspace": self.workspace.id, "model": "comment", "event_type": "create"}
+        queued = enqueue_events([(event, webhooks + [other])])
+        self.assertEqual(queued, 1)
+        self.assertEqual(list(WebhookDelivery.objects.values_list("webhook_id", flat=True)), [other.id])
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+
+# Webhook gửi theo lô: chỉ kéo theo sự kiện trực tiếp đang chờ gom, header phát lại giữ nguyên
+class BatchClaimTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create(name="Owner", email="owner@example.com")
+        workspace = Workspace.objects.create(name="ws", owner=owner)
+        self.webhook = Webhook.objects.create(workspace=workspace, endpoint_url=URL, event_type="create",
+                                              model="comment", batch_max_size=10, batch_linger_seconds=30)
+        self.now = timezone.now()
+
+    def add(self, event_id, delay=0, **fields):
+        return WebhookDelivery.objects.create(webhook=self.webhook, event_id=event_id, payload={"id": event_id},
+                                              next_attempt_at=self.now + timedelta(seconds=delay), **fields)
+
+    def test_only_lingering_live_rows_join_the_batch(self):
+        self.add("due", delay=-1)
+        self.add("lingering", delay=20)
+        self.add("backoff", delay=20, attempts=1)
+        self.add("replay", delay=20, priority=WebhookDelivery.PRIORITY_REPLAY)
+        postponed = self.add("postponed")
+        WebhookDelivery.objects.filter(pk=postponed.pk).update(next_attempt_at=self.now + timedelta(minutes=5))
+        claimed = {delivery.event_id for delivery in claim_due_deliveries(100)}
+        self.assertEqual(claimed, {"due", "lingering"})
+
+    def test_full_batch_is_due_without_waiting_for_the_linger(self):
+        self.webhook.batch_max_size = 3
+        self.webhook.save()
+        event = {"workspace": self.webhook.workspace_id, "model": "comment", "event_type": "create"}
+        enqueue_events([(event, [self.webhook])] * 2)
+        self.assertEqual(claim_due_deliveries(100), [])
+        enqueue_events([(event, [self.webhook])] * 2)
+        claimed = claim_due_deliveries(100)
+        self.assertEqual(len(claimed), 3)
+        self.assertEqual(len(group_deliveries(claimed)), 1)
+        # Phần lẻ vẫn chờ gom tiếp
+        self.assertEqual(WebhookDelivery.objects.filter(status=WebhookDelivery.STATUS_PENDING).count(), 1)
+
+    def test_replay_batches_keep_the_header(self):
+        self.add("live", delay=-1)
+        self.add("replay-1", delay=-1, priority=WebhookDelivery.PRIORITY_REPLAY)
+        self.add("replay-2", delay=-1, priority=WebhookDelivery.PRIORITY_REPLAY)
+        groups = group_deliveries(claim_due_deliveries(100))
+        headers = {}
+        for group in groups:
+            _, _, request_headers = delivery_job(group, {})
+            headers[request_headers["X-Webhook-Event-Id"]] = request_headers.get("X-Webhook-Replay")
+        self.assertEqual(headers, {"live": None, "replay-1,replay-2": "true"})
+
+
+# Kho sự kiện: ghi cùng transaction với outbox, dọn theo thời gian nhưng giữ phần replay còn cần
+class EventStoreTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create(name="Owner", email="owner@example.com")
+        self.workspace = Workspace.objects.create(name="ws", owner=owner)
+        self.webhook = Webhook.objects.create(workspace=self.workspace, endpoint_url=URL,
+                                              event_type="create", model="comment")
+        self.event = {"workspace": self.workspace.id, "model": "comment", "event_type": "create"}
+
+    def test_failed_outbox_insert_rolls_back_the_store(self):
+        with mock.patch.object(WebhookDelivery.objects, "bulk_create", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                enqueue_events([(self.event, [self.webhook])])
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def add_event(self, event_id, days_ago):
+        event = WebhookEvent.objects.create(event_id=event_id, workspace_id=self.workspace.id, model="comment",
+                                            event_type="create", payload=self.event)
+        WebhookEvent.objects.filter(pk=event.pk).update(created_day=timezone.now() - timedelta(days=days_ago))
+
+    def test_purge_keeps_events_a_running_replay_still_needs(self):
+        for event_id, days_ago in (("old", 60), ("replaying", 45), ("recent", 1)):
+            self.add_event(event_id, days_ago)
+        now = timezone.now()
+        WebhookReplay.objects.create(webhook=self.webhook, start=now - timedelta(days=50), end=now)
+        self.assertEqual(purge_events(now - timedelta(days=30), chunk_size=1), 1)
+        self.assertEqual(set(WebhookEvent.objects.values_list("event_id", flat=True)), {"replaying", "recent"})
+
+        WebhookReplay.objects.update(status=WebhookReplay.STATUS_DONE)
+        self.assertEqual(purge_events(now - timedelta(days=30)), 1)
+        self.assertEqual(list(WebhookEvent.objects.values_list("event_id", flat=True)), ["recent"])
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return client
+
+
+# Webhook chỉ được quản lý bởi owner/admin của workspace chứa nó; thành viên chỉ được xem
+class WebhookAccessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(name="Owner", email="owner@example.com")
+        self.member = User.objects.create(name="Member", email="member@example.com")
+        self.stranger = User.objects.create(name="Stranger", email="stranger@example.com")
+        self.workspace = Workspace.objects.create(name="ws", owner=self.owner)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.member, role="member")
+        self.webhook = Webhook.objects.create(workspace=self.workspace, endpoint_url=URL,
+                                              event_type="create", model="comment")
+        self.event = {"workspace": self.workspace.id, "model": "comment", "event_type": "create"}
+
+    def test_anonymous_and_strangers_are_rejected(self):
+        for client, expected in ((client_for(), 401), (client_for(self.stranger), 403)):
+            create = client.post("/api/webhooks/", {"workspace": self.workspace.id, "endpoint_url": URL,
+                                                    "event_type": "create", "model": "comment"}, format="json")
+            self.assertEqual(create.status_code, expected)
+            self.assertEqual(client.get(f"/api/webhooks/{self.webhook.id}/detail/").status_code, expected)
+            self.assertEqual(client.get(f"/api/webhooks/{self.webhook.id}/deliveries/").status_code, expected)
+            self.assertEqual(client.get(f"/api/webhooks/{self.webhook.id}/health/").status_code, expected)
+            self.assertEqual(client.post(f"/api/webhooks/{self.webhook.id}/replays/",
+                                         {"start": timezone.now(), "end": timezone.now()},
+                                         format="json").status_code, expected)
+            self.assertEqual(client.post("/api/events/", self.event, format="json").status_code, expected)
+        self.assertEqual(Webhook.objects.count(), 1)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_members_read_and_managers_write(self):
+        member = client_for(self.member)
+        self.assertEqual(member.get(f"/api/webhooks/{self.webhook.id}/detail/").status_code, 200)
+        self.assertEqual(member.put(f"/api/webhooks/{self.webhook.id}/detail/", {"active": False},
+                                    format="json").status_code, 403)
+        self.assertEqual(member.delete(f"/api/webhooks/{self.webhook.id}/detail/").status_code, 403)
+        self.assertEqual(member.post("/api/events/", self.event, format="json").status_code, 403)
+
+        owner = client_for(self.owner)
+        self.assertEqual(owner.post("/api/events/", self.event, format="json").status_code, 202)
+        self.assertEqual(owner.delete(f"/api/webhooks/{self.webhook.id}/detail/").status_code, 204)
+
+    def test_cannot_move_webhook_to_foreign_workspace(self):
+        foreign = Workspace.objects.create(name="foreign", owner=self.stranger)
+        response = client_for(self.owner).put(f"/api/webhooks/{self.webhook.id}/detail/",
+                                              {"workspace": foreign.id}, format="json")
+        self.assertEqual(response.status_code, 403)
@@ -3,11 +3,19 @@ from .views import (
 
     WebhookCreateView, 
     WebhookDetailView, 
+    WebhookHealthView,
+    WebhookDeliveryLogView,
+    WebhookReplayView,
+    WebhookSecretRotateView,
     EventSendView
 )
 
 urlpatterns = [
     path('webhooks/', WebhookCreateView.as_view(), name='webhook-create'),   
     path('webhooks/<int:id>/detail/', WebhookDetailView.as_view(), name='webhook-detail'),
+    path('webhooks/<int:id>/secret/rotate/', WebhookSecretRotateView.as_view(), name='webhook-secret-rotate'),
+    path('webhooks/<int:id>/health/', WebhookHealthView.as_view(), name='webhook-health'),
+    path('webhooks/<int:id>/deliveries/', WebhookDeliveryLogView.as_view(), name='webhook-deliveries'),
+    path('webhooks/<int:id>/replays/', WebhookReplayView.as_view(), name='webhook-replays'),
     path('events/', EventSendView.as_view(), name='event-send'),
 ]
@@ -4,11 +4,22 @@ import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.shortcuts import get_object_or_404
 from datetime import datetime
-from .models import Webhook
-from .serializers import WebhookSerializer
-import requests
+from apps.common.pagination import KeysetPagination
+from apps.common.auth import get_request_user_id
+from apps.common.permissions import MANAGER_ROLES, workspace_access_denied
+from .models import EndpointHealth, Webhook, WebhookDeliveryLog
+from .serializers import (
+    EndpointHealthSerializer,
+    WebhookDeliveryLogSerializer,
+    WebhookReplaySerializer,
+    WebhookSerializer,
+)
+from .delivery import enqueue_event, new_event_id, store_events
+from .dispatch import fan_out
+from .encoding import generate_secret
+from .health import url_hash
+from .routing import match_webhooks
 
 # Create your views here.
 # class WebhookViewSet(viewsets.ModelViewSet):
@@ -17,20 +28,42 @@ import requests
 
 logger = logging.getLogger(__name__)
 
+
+# Webhook theo id, kèm kiểm tra quyền trên workspace chứa nó. Trả về (webhook, None) hoặc
+# (None, Response 401/403/404); xác thực trước khi tra id để người lạ không dò được webhook
+def load_webhook(request, id, roles=None):
+    if get_request_user_id(request) is None:
+        return None, Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+    webhook = Webhook.objects.filter(id=id).first()
+    if webhook is None:
+        return None, Response({"error": f"Webhook id={id} không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
+    denied = workspace_access_denied(request, webhook.workspace_id, roles)
+    if denied is not None:
+        return None, denied
+    return webhook, None
+
+
 # Đăng ký webhook mới 
 class WebhookCreateView(APIView):
     def post(self, request):
         logger.info("[WEBHOOK CREATE] Bắt đầu đăng ký webhook mới")
+        if get_request_user_id(request) is None:
+            return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
         try:
             serializer = WebhookSerializer(data=request.data)
             if serializer.is_valid():
+                denied = workspace_access_denied(request, serializer.validated_data["workspace"].id, MANAGER_ROLES)
+                if denied is not None:
+                    return denied
                 webhook = serializer.save(created_day=datetime.now())
                 logger.info("[WEBHOOK CREATE] Webhook(id=%s, url='%s') đã được đăng ký thành công",
                             webhook.id, getattr(webhook, "url", ""))
+                # secret chỉ được trả về ở đây (và khi xoay khoá), receiver cần lưu lại ngay
                 return Response(
                     {
                         "message": f"Webhook id={webhook.id} đã được đăng ký thành công",
-                        **serializer.data
+                        **serializer.data,
+                        "secret": webhook.secret
                     },
                     status=status.HTTP_201_CREATED
                 )
@@ -50,7 +83,9 @@ class WebhookDetailView(APIView):
     def get(self, request, id):
         logger.info("[WEBHOOK DETAIL] Yêu cầu lấy thông tin webhook id=%s", id)
         try:
-            webhook = get_object_or_404(Webhook, id=id)
+            webhook, denied = load_webhook(request, id)
+            if denied is not None:
+                return denied
             serializer = WebhookSerializer(webhook, context={"request": request})
             logger.info("[WEBHOOK DETAIL] Webhook(id=%s, url='%s') lấy thành công",
                         webhook.id, getattr(webhook, "url", ""))
@@ -64,9 +99,17 @@ class WebhookDetailView(APIView):
     def put(self, request, id):
         logger.info("[WEBHOOK UPDATE] Yêu cầu cập nhật webhook id=%s", id)
         try:
-            webhook = get_object_or_404(Webhook, id=id)
+            webhook, denied = load_webhook(request, id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
             serializer = WebhookSerializer(webhook, data=request.data, partial=True)
             if serializer.is_valid():
+                target = serializer.validated_data.get("workspace")
+                if target is not None and target.id != webhook.workspace_id:
+                    # Chuyển webhook sang workspace khác: cũng phải quản lý được workspace đích
+                    denied = workspace_access_denied(request, target.id, MANAGER_ROLES)
+                    if denied is not None:
+                        return denied
                 updated = serializer.save(updated_day=datetime.now())
                 logger.info("[WEBHOOK UPDATE] Webhook(id=%s, url='%s') đã cập nhật thành công",
                             updated.id, getattr(updated, "url", ""))
@@ -85,7 +128,9 @@ class WebhookDetailView(APIView):
     def delete(self, request, id):
         logger.info("[WEBHOOK DELETE] Yêu cầu xóa webhook id=%s", id)
         try:
-            webhook = get_object_or_404(Webhook, id=id)
+            webhook, denied = load_webhook(request, id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
             webhook_url = getattr(webhook, "url", "")
             webhook.delete()
             logger.info("[WEBHOOK DELETE] Webhook(id=%s, url='%s') đã được xóa thành công",
@@ -98,6 +143,113 @@ class WebhookDetailView(APIView):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Xoay khoá ký HMAC của webhook: cấp secret mới và trả về một lần duy nhất.
+# Chỉ owner/admin của workspace chứa webhook được gọi
+class WebhookSecretRotateView(APIView):
+    def post(self, request, id):
+        logger.info("[WEBHOOK SECRET] Yêu cầu xoay secret của webhook id=%s", id)
+        try:
+            webhook, denied = load_webhook(request, id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
+
+            webhook.secret = generate_secret()
+            webhook.save(update_fields=["secret"])
+            logger.info("[WEBHOOK SECRET] Đã xoay secret của webhook id=%s", webhook.id)
+            return Response({"id": webhook.id, "secret": webhook.secret}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("[WEBHOOK SECRET] Lỗi khi xoay secret của webhook id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi xoay secret: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Sức khoẻ receiver của webhook: trạng thái circuit breaker, tỉ lệ thành công, latency p50/p95
+class WebhookHealthView(APIView):
+    def get(self, request, id):
+        logger.info("[WEBHOOK HEALTH] Yêu cầu lấy sức khoẻ webhook id=%s", id)
+        try:
+            webhook, denied = load_webhook(request, id)
+            if denied is not None:
+                return denied
+            health = (EndpointHealth.objects.filter(url_hash=url_hash(webhook.endpoint_url)).first()
+                      or EndpointHealth(endpoint_url=webhook.endpoint_url))
+            serializer = EndpointHealthSerializer(health)
+            return Response({"webhook_id": webhook.id, **serializer.data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("[WEBHOOK HEALTH] Lỗi khi lấy sức khoẻ webhook id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi lấy sức khoẻ webhook: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Nhật ký gửi của một webhook, mới nhất trước, phân trang theo cursor
+class WebhookDeliveryLogView(APIView):
+    pagination = KeysetPagination(ordering=("-created_day", "-id"))
+
+    def get(self, request, id):
+        logger.info("[WEBHOOK DELIVERIES] Yêu cầu lấy nhật ký gửi của webhook id=%s", id)
+        try:
+            _, denied = load_webhook(request, id)
+            if denied is not None:
+                return denied
+            logs = WebhookDeliveryLog.objects.filter(webhook_id=id)
+            event_id = request.query_params.get("event_id")
+            if event_id:
+                logs = logs.filter(event_id=event_id)
+            try:
+                page, next_cursor = self.pagination.paginate(logs, request)
+            except ValueError as e:
+                logger.warning("[WEBHOOK DELIVERIES] Tham số phân trang không hợp lệ: %s", str(e))
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = WebhookDeliveryLogSerializer(page, many=True)
+            logger.info("[WEBHOOK DELIVERIES] Trả về %s dòng nhật ký của webhook id=%s", len(page), id)
+            return Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("[WEBHOOK DELIVERIES] Lỗi khi lấy nhật ký gửi của webhook id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi lấy nhật ký gửi: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Phát lại sự kiện trong một khoảng thời gian cho webhook; worker đọc dần kho sự kiện
+# theo khối và gửi với độ ưu tiên thấp hơn sự kiện trực tiếp
+class WebhookReplayView(APIView):
+    def get(self, request, id):
+        logger.info("[WEBHOOK REPLAY] Yêu cầu lấy danh sách replay của webhook id=%s", id)
+        try:
+            webhook, denied = load_webhook(request, id)
+            if denied is not None:
+                return denied
+            replays = webhook.replays.order_by("-created_day")[:20]
+            serializer = WebhookReplaySerializer(replays, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.exception("[WEBHOOK REPLAY] Lỗi khi lấy replay của webhook id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi lấy danh sách replay: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def post(self, request, id):
+        logger.info("[WEBHOOK REPLAY] Yêu cầu phát lại sự kiện cho webhook id=%s", id)
+        try:
+            webhook, denied = load_webhook(request, id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
+            serializer = WebhookReplaySerializer(data=request.data)
+            if serializer.is_valid():
+                replay = serializer.save(webhook=webhook)
+                logger.info("[WEBHOOK REPLAY] Đã tạo replay id=%s cho webhook id=%s (%s - %s)",
+                            replay.id, webhook.id, replay.start, replay.end)
+                return Response(
+                    {"message": f"Replay id={replay.id} đã được đưa vào hàng đợi", **serializer.data},
+                    status=status.HTTP_202_ACCEPTED
+                )
+            logger.warning("[WEBHOOK REPLAY] Dữ liệu không hợp lệ: %s", serializer.errors)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("[WEBHOOK REPLAY] Lỗi khi tạo replay cho webhook id=%s: %s", id, str(e))
+            return Response({"error": f"Lỗi khi tạo replay: {str(e)}"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # Gửi dữ liệu sự kiện đến endpoint đã đăng
 class EventSendView(APIView):
     # def post(self, request):
@@ -121,36 +273,41 @@ class EventSendView(APIView):
     #             })
     #     return Response({'results': results}, status=status.HTTP_200_OK)
 
+    # Mặc định chỉ ghi sự kiện vào outbox rồi trả về ngay; worker deliver_webhooks lo việc gửi
+    # và thử lại. ?sync=true gửi ngay, đồng thời tới mọi webhook, và trả kết quả từng webhook
     def post(self, request):
         event_data = request.data
         logger.info("[EVENT SEND] Nhận yêu cầu gửi sự kiện: %s", event_data)
 
-        results = []
         try:
-            # Lấy tất cả webhook đang active
-            webhooks = Webhook.objects.filter(active=True)
-            logger.info("[EVENT SEND] Tìm thấy %s webhook đang active", webhooks.count())
-
-            for webhook in webhooks:
-                try:
-                    r = requests.post(webhook.endpoint_url, json=event_data, timeout=5)
-                    results.append({
-                        "webhook_id": webhook.id,
-                        "url": webhook.endpoint_url,
-                        "status_code": r.status_code
-                    })
-                    logger.info("[EVENT SEND] Gửi sự kiện tới webhook id=%s (%s) thành công, status=%s",
-                                webhook.id, webhook.endpoint_url, r.status_code)
-                except Exception as e:
-                    results.append({
-                        "webhook_id": webhook.id,
-                        "url": webhook.endpoint_url,
-                        "error": str(e)
-                    })
-                    logger.error("[EVENT SEND] Lỗi khi gửi sự kiện tới webhook id=%s (%s): %s",
-                                 webhook.id, webhook.endpoint_url, str(e))
-
-            return Response({"results": results}, status=status.HTTP_200_OK)
+            workspace_id = event_data.get("workspace")
+            model = event_data.get("model")
+            event_type = event_data.get("event_type")
+            if (not str(workspace_id).isdigit()
+                    or model not in dict(Webhook.MODEL_CHOICES)
+                    or event_type not in dict(Webhook.EVENT_CHOICES)):
+                logger.warning("[EVENT SEND] Thiếu hoặc sai workspace/model/event_type: %s", event_data)
+                return Response({"error": "Sự kiện phải có workspace, model và event_type hợp lệ"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            # Sự kiện được ký bằng secret của webhook: chỉ owner/admin của workspace được phát
+            denied = workspace_access_denied(request, int(workspace_id), MANAGER_ROLES)
+            if denied is not None:
+                return denied
+
+            # Chỉ các webhook active đăng ký đúng (workspace, model, event_type)
+            webhooks = match_webhooks(workspace_id, model, event_type)
+            if request.query_params.get("sync") == "true":
+                event_id = new_event_id()
+                store_events([(event_id, event_data)])
+                results = fan_out(event_data, webhooks, event_id=event_id)
+                return Response({"event_id": event_id, "results": results}, status=status.HTTP_200_OK)
+
+            event_id, queued = enqueue_event(event_data, webhooks)
+            logger.info("[EVENT SEND] Sự kiện %s đã được đưa vào hàng đợi cho %s webhook", event_id, queued)
+            return Response(
+                {"message": "Sự kiện đã được đưa vào hàng đợi", "event_id": event_id, "queued": queued},
+                status=status.HTTP_202_ACCEPTED
+            )
 
         except Exception as e:
             logger.exception("[EVENT SEND] Lỗi hệ thống khi gửi sự kiện: %s", str(e))
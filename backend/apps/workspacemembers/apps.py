@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WorkspacemembersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.workspacemembers'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from apps.common import checks  # noqa: F401
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import cache
+from .models import WorkspaceMember
+
+
+def membership_cache_key(user_id):
+    return f"workspacemembers:user:{user_id}"
+
+
+# Tập id các workspace mà user là thành viên, đọc qua cache dùng chung.
+# Trượt cache thì chỉ quét index (user_id, workspace_id) của bảng workspacemembers
+def member_workspace_ids(user_id):
+    key = membership_cache_key(user_id)
+    workspace_ids = cache.get(key)
+    if workspace_ids is None:
+        workspace_ids = frozenset(
+            WorkspaceMember.objects.filter(user_id=user_id).values_list("workspace_id", flat=True)
+        )
+        cache.set(key, workspace_ids, settings.WORKSPACE_MEMBERSHIP_CACHE_SECONDS)
+    return workspace_ids
+
+
+def invalidate_memberships(*user_ids):
+    cache.delete_many([membership_cache_key(user_id) for user_id in set(user_ids)])
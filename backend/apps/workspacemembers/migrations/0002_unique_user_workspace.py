@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:15
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# Trước khi thêm ràng buộc unique: giữ dòng thành viên cũ nhất của mỗi cặp (user, workspace)
+def remove_duplicate_members(apps, schema_editor):
+    WorkspaceMember = apps.get_model('workspacemembers', 'WorkspaceMember')
+    duplicates = (WorkspaceMember.objects.values('user_id', 'workspace_id')
+                  .annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1))
+    for row in duplicates:
+        (WorkspaceMember.objects.filter(user_id=row['user_id'], workspace_id=row['workspace_id'])
+         .exclude(id=row['keep']).delete())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_updated_day'),
+        ('workspacemembers', '0001_initial'),
+        ('workspaces', '0003_workspace_updated_day'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_members, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='workspacemember',
+            constraint=models.UniqueConstraint(fields=('user', 'workspace'), name='workspacemembers_user_ws_uniq'),
+        ),
+    ]
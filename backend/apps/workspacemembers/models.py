@@ -17,6 +17,11 @@ class WorkspaceMember(models.Model):
 
     class Meta:
         db_table = 'workspacemembers'
+        constraints = [
+            # Một user chỉ có một dòng thành viên mỗi workspace; index (user_id, workspace_id)
+            # cũng phục vụ việc tra các workspace của một user
+            models.UniqueConstraint(fields=['user', 'workspace'], name='workspacemembers_user_ws_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} in {self.workspace.name} as {self.role}"
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from apps.common.permissions import bump_workspace_versions
+from apps.workspaces.models import Workspace
+from .membership import invalidate_memberships
+from .models import WorkspaceMember
+
+
+# Sửa một dòng thành viên có thể chuyển nó sang user/workspace khác: nhớ giá trị cũ
+# để xoá cache của cả hai phía
+@receiver(pre_save, sender=WorkspaceMember)
+def remember_previous_member(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None:
+        instance._previous = (
+            WorkspaceMember.objects.filter(pk=instance.pk).values_list("user_id", "workspace_id").first()
+        )
+
+
+# Thêm/xoá/đổi role thành viên thì tập workspace (đã cache) của user và các role đã cache
+# của workspace không còn đúng. Xoá ngay cho các lần đọc trong cùng transaction, và xoá
+# lại sau commit phòng khi request khác đã nạp lại cache từ dữ liệu cũ trong lúc chờ
+@receiver(post_save, sender=WorkspaceMember)
+@receiver(post_delete, sender=WorkspaceMember)
+def invalidate_member_cache(sender, instance, **kwargs):
+    previous_user_id, previous_workspace_id = getattr(instance, "_previous", None) or (None, None)
+    user_ids = {instance.user_id, previous_user_id} - {None}
+    workspace_ids = {instance.workspace_id, previous_workspace_id} - {None}
+
+    def invalidate():
+        invalidate_memberships(*user_ids)
+        bump_workspace_versions(*workspace_ids)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+# Đổi owner hoặc xoá workspace cũng đổi role của người gọi
+@receiver(post_save, sender=Workspace)
+@receiver(post_delete, sender=Workspace)
+def invalidate_workspace_roles(sender, instance, created=False, **kwargs):
+    if not created:
+        bump_workspace_versions(instance.pk)
+        transaction.on_commit(lambda: bump_workspace_versions(instance.pk))
@@ -1,3 +1,110 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.common.checks import check_shared_cache
+from apps.projects.models import Project
+from apps.users.models import User
+from apps.workspaces.models import Workspace
+from .models import WorkspaceMember
 
-# Create your tests here.
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return client
+
+
+# Chỉ owner mới trao/tước được vai trò owner; admin quản lý được thành viên thường
+class OwnerRoleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(name="Owner", email="owner@example.com")
+        self.admin = User.objects.create(name="Admin", email="admin@example.com")
+        self.member = User.objects.create(name="Member", email="member@example.com")
+        self.workspace = Workspace.objects.create(name="ws", owner=self.owner)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.admin, role="admin")
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.member, role="member")
+
+    def role_url(self, user):
+        return f"/api/workspaces/{self.workspace.id}/members/{user.id}/role/"
+
+    def test_admin_cannot_promote_self_to_owner(self):
+        response = client_for(self.admin).put(self.role_url(self.admin), {"role": "Owner"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(WorkspaceMember.objects.get(user=self.admin).role, "admin")
+        # Vẫn là admin nên không xoá được workspace
+        response = client_for(self.admin).delete(f"/api/workspaces/{self.workspace.id}/")
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Workspace.objects.filter(id=self.workspace.id).exists())
+
+    def test_admin_cannot_promote_others_to_owner(self):
+        response = client_for(self.admin).put(self.role_url(self.member), {"role": "Owner"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        newcomer = User.objects.create(name="New", email="new@example.com")
+        response = client_for(self.admin).post(f"/api/workspaces/{self.workspace.id}/members/",
+                                               {"user": newcomer.id, "role": "owner"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(WorkspaceMember.objects.filter(user=newcomer).exists())
+
+    def test_admin_cannot_revoke_owner(self):
+        co_owner = User.objects.create(name="Co", email="co@example.com")
+        WorkspaceMember.objects.create(workspace=self.workspace, user=co_owner, role="owner")
+        response = client_for(self.admin).put(self.role_url(co_owner), {"role": "Member"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        response = client_for(self.admin).delete(f"/api/workspaces/{self.workspace.id}/members/{co_owner.id}")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(WorkspaceMember.objects.get(user=co_owner).role, "owner")
+
+    def test_admin_can_manage_members(self):
+        response = client_for(self.admin).put(self.role_url(self.member), {"role": "Admin"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_owner_can_grant_owner(self):
+        response = client_for(self.owner).put(self.role_url(self.admin), {"role": "Owner"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WorkspaceMember.objects.get(user=self.admin).role, "Owner")
+
+
+# Role đã cache phải hết hiệu lực ngay khi thành viên bị xoá hoặc bị hạ quyền
+class RoleCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(name="Owner", email="owner@example.com")
+        self.admin = User.objects.create(name="Admin", email="admin@example.com")
+        self.workspace = Workspace.objects.create(name="ws", owner=self.owner)
+        self.project = Project.objects.create(workspace=self.workspace, name="p")
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.admin, role="admin")
+
+    def test_removed_member_loses_access(self):
+        client = client_for(self.admin)
+        self.assertEqual(client.get(f"/api/projects/{self.project.id}/").status_code, 200)
+        workspace_ids = {w["id"] for w in client.get("/api/workspaces/list/").data["results"]}
+        self.assertIn(self.workspace.id, workspace_ids)
+
+        response = client_for(self.owner).delete(f"/api/workspaces/{self.workspace.id}/members/{self.admin.id}")
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(client.get(f"/api/projects/{self.project.id}/").status_code, 403)
+        workspace_ids = {w["id"] for w in client.get("/api/workspaces/list/").data["results"]}
+        self.assertNotIn(self.workspace.id, workspace_ids)
+
+    def test_demoted_admin_loses_manager_rights(self):
+        client = client_for(self.admin)
+        upgrade_url = f"/api/workspaces/{self.workspace.id}/upgrade/"
+        self.assertEqual(client.put(upgrade_url, {"subscription_plan": "pro"}, format="json").status_code, 200)
+
+        response = client_for(self.owner).put(
+            f"/api/workspaces/{self.workspace.id}/members/{self.admin.id}/role/", {"role": "Member"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(client.put(upgrade_url, {"subscription_plan": "free"}, format="json").status_code, 403)
+        self.assertEqual(client.get(f"/api/projects/{self.project.id}/").status_code, 200)
+
+    def test_process_local_cache_is_rejected(self):
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["common.E001"])
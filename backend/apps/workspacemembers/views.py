@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from datetime import datetime
+from apps.common.auth import get_request_user_id
+from apps.common.permissions import MANAGER_ROLES, ROLE_OWNER, get_workspace_role, workspace_access_denied
 from .models import Workspace, WorkspaceMember, User
 from .serializers import WorkspaceMemberSerializer
 
@@ -16,10 +18,26 @@ from .serializers import WorkspaceMemberSerializer
 
 logger = logging.getLogger(__name__)
 
+
+# Trao hoặc tước vai trò owner (role cũ hay mới là owner) chỉ owner của workspace làm được;
+# admin không thể tự nâng mình hay người khác lên owner
+def owner_change_denied(request, workspace_id, *roles):
+    if any(str(role or "").lower() == ROLE_OWNER for role in roles) \
+            and get_workspace_role(request, workspace_id) != ROLE_OWNER:
+        logger.warning("Owner role change rejected in workspace_id=%s", workspace_id)
+        return Response({"error": "Chỉ owner mới được trao hoặc tước vai trò owner"},
+                        status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
 class WorkspaceMemberListCreateView(APIView):
     def get(self, request, id):
         logger.info("[WORKSPACE MEMBER LIST] Request received at %s for workspace_id=%s", request.path, id)
         try:
+            denied = workspace_access_denied(request, id)
+            if denied is not None:
+                return denied
+
             members = WorkspaceMember.objects.filter(workspace_id=id)
             logger.info("Found %s members in workspace_id=%s", members.count(), id)
 
@@ -34,6 +52,9 @@ class WorkspaceMemberListCreateView(APIView):
         logger.info("[WORKSPACE MEMBER CREATE] Request received at %s for workspace_id=%s", request.path, id)
         try:
             workspace = get_object_or_404(Workspace, pk=id)
+            denied = workspace_access_denied(request, workspace.id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
             logger.info("Workspace found: id=%s, name=%s", workspace.id, workspace.name)
 
             data = request.data.copy()
@@ -42,6 +63,9 @@ class WorkspaceMemberListCreateView(APIView):
 
             serializer = WorkspaceMemberSerializer(data=data)
             if serializer.is_valid():
+                denied = owner_change_denied(request, workspace.id, serializer.validated_data.get("role"))
+                if denied is not None:
+                    return denied
                 member = serializer.save()
                 logger.info("Member added: id=%s, user=%s, workspace_id=%s",
                             member.id, getattr(member, "user_id", None), workspace.id)
@@ -59,12 +83,19 @@ class WorkspaceMemberListCreateView(APIView):
         logger.info("[MEMBER UPDATE] Request received at %s for workspace_id=%s",
                     request.path, id)
         try:
+            denied = workspace_access_denied(request, id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
+
             member = get_object_or_404(WorkspaceMember, workspace_id=id)
             logger.info("Member found: id=%s, user_id=%s, current_role=%s",
                         member.id, member.user_id, member.role)
 
             serializer = WorkspaceMemberSerializer(member, data=request.data, partial=True)
             if serializer.is_valid():
+                denied = owner_change_denied(request, id, member.role, serializer.validated_data.get("role"))
+                if denied is not None:
+                    return denied
                 updated = serializer.save()
                 logger.info("Member updated successfully: id=%s, user_id=%s, new_data=%s",
                             updated.id, updated.user_id, serializer.validated_data)
@@ -86,6 +117,10 @@ class WorkspaceMemberRoleUpdateView(APIView):
         logger.info("[MEMBER ROLE UPDATE] Request received at %s for workspace_id=%s, user_id=%s",
                     request.path, id, userId)
         try:
+            denied = workspace_access_denied(request, id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
+
             member = get_object_or_404(WorkspaceMember, workspace_id=id, user_id=userId)
             logger.info("Member found: id=%s, user_id=%s, current_role=%s",
                         member.id, member.user_id, member.role)
@@ -98,6 +133,10 @@ class WorkspaceMemberRoleUpdateView(APIView):
                 logger.warning("Invalid role: %s", role)
                 return Response({"error": "Vai trò không hợp lệ"}, status=status.HTTP_400_BAD_REQUEST)
 
+            denied = owner_change_denied(request, id, member.role, role)
+            if denied is not None:
+                return denied
+
             if member.role == role:
                 logger.info("Role unchanged: already %s", role)
                 return Response({"message": f"Vai trò đã là {role}, không cần cập nhật"},
@@ -121,9 +160,19 @@ class WorkspaceMemberDeleteView(APIView):
         logger.info("[MEMBER DELETE] Request received at %s for workspace_id=%s, user_id=%s",
                     request.path, id, userId)
         try:
+            # Owner/admin xoá được thành viên; thành viên tự rời workspace được
+            if get_request_user_id(request) != userId:
+                denied = workspace_access_denied(request, id, MANAGER_ROLES)
+                if denied is not None:
+                    return denied
+
             member = get_object_or_404(WorkspaceMember, workspace_id=id, user_id=userId)
             logger.info("Member found: id=%s, user_id=%s, role=%s",
                         member.id, member.user_id, member.role)
+            if get_request_user_id(request) != userId:
+                denied = owner_change_denied(request, id, member.role)
+                if denied is not None:
+                    return denied
 
             member.delete()
             logger.info("Member deleted successfully: user_id=%s from workspace_id=%s", userId, id)
@@ -14,6 +14,7 @@ class Workspace(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workspaces')
     subscription_plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default='free')
     created_day = models.DateTimeField(auto_now_add=True)
+    updated_day = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'workspaces'
@@ -5,7 +5,8 @@ class WorkspaceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Workspace
         fields = '__all__'
-        # read_only_fields = ['owner']
+        # owner chỉ được gán khi tạo (WorkspaceCreateView truyền vào save()); PUT không đổi được owner
+        read_only_fields = ['owner']
 
     # def create(self, validated_data):
     #     validated_data['owner'] = self.context['request'].user
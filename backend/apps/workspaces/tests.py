@@ -1,3 +1,91 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.projects.models import Project
+from apps.users.models import User
+from apps.workspacemembers.models import WorkspaceMember
+from .models import Workspace
 
-# Create your tests here.
+
+# Tóm tắt workspace cho dashboard: số truy vấn không phụ thuộc số workspace
+class WorkspaceSummaryViewTests(TestCase):
+    url = "/api/workspaces/summary/"
+
+    def setUp(self):
+        self.user = User.objects.create(name="Owner", email="owner@example.com")
+        self.other = User.objects.create(name="Other", email="other@example.com")
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def add_workspaces(self, count):
+        for i in range(count):
+            workspace = Workspace.objects.create(name=f"ws {i}", owner=self.user)
+            WorkspaceMember.objects.create(workspace=workspace, user=self.user, role="owner")
+            WorkspaceMember.objects.create(workspace=workspace, user=self.other)
+            Project.objects.create(workspace=workspace, name=f"project {i}", domain_url="https://example.com")
+
+    def summary_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_query_count_is_constant(self):
+        self.add_workspaces(1)
+        small, data = self.summary_queries()
+        self.assertEqual(len(data), 1)
+
+        self.add_workspaces(9)
+        large, data = self.summary_queries()
+        self.assertEqual(len(data), 10)
+        self.assertEqual(small, large)
+        self.assertEqual(large, 1)
+
+    def test_summary_fields(self):
+        self.add_workspaces(1)
+        workspace = Workspace.objects.get()
+        Project.objects.create(workspace=workspace, name="second", domain_url="https://example.com")
+        # Workspace của người khác, người gọi là thành viên
+        shared = Workspace.objects.create(name="shared", owner=self.other)
+        WorkspaceMember.objects.create(workspace=shared, user=self.user)
+        Workspace.objects.create(name="unrelated", owner=self.other)
+
+        _, data = self.summary_queries()
+        rows = {row["id"]: row for row in data}
+        self.assertEqual(set(rows), {workspace.id, shared.id})
+        self.assertEqual(rows[workspace.id]["member_count"], 2)
+        self.assertEqual(rows[workspace.id]["project_count"], 2)
+        self.assertEqual(rows[workspace.id]["owner_name"], "Owner")
+        self.assertEqual(rows[shared.id]["member_count"], 1)
+        self.assertEqual(rows[shared.id]["project_count"], 0)
+        self.assertEqual(rows[shared.id]["owner_name"], "Other")
+        last_project = Project.objects.filter(workspace=workspace).latest("updated_day")
+        self.assertEqual(rows[workspace.id]["last_activity"],
+                         max(workspace.updated_day, last_project.updated_day))
+
+    def test_requires_token(self):
+        self.client.credentials()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+
+# Admin sửa được workspace nhưng không tự chuyển mình thành owner
+class WorkspaceOwnerTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(name="Owner", email="owner@example.com")
+        self.admin = User.objects.create(name="Admin", email="admin@example.com")
+        self.workspace = Workspace.objects.create(name="ws", owner=self.owner)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.admin, role="admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.admin).access_token}")
+
+    def test_put_cannot_change_owner(self):
+        url = f"/api/workspaces/{self.workspace.id}/"
+        response = self.client.put(url, {"name": "renamed", "owner": self.admin.id}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.workspace.refresh_from_db()
+        self.assertEqual((self.workspace.name, self.workspace.owner_id), ("renamed", self.owner.id))
+        self.assertEqual(self.client.delete(url).status_code, 403)
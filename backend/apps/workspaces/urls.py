@@ -4,6 +4,7 @@ from django.urls import path
 from .views import (
     WorkspaceCreateView,
     WorkspaceListView,
+    WorkspaceSummaryView,
     WorkspaceDetailView,
     WorkspaceUpgradeView
 )
@@ -18,6 +19,7 @@ from .views import (
 urlpatterns = [
     path('workspaces/', WorkspaceCreateView.as_view(), name='workspace-create'),
     path('workspaces/list/', WorkspaceListView.as_view(), name='workspace-list'),
+    path('workspaces/summary/', WorkspaceSummaryView.as_view(), name='workspace-summary'),
     path("workspaces/<int:id>/", WorkspaceDetailView.as_view(), name="workspace-detail"),
     path('workspaces/<int:id>/upgrade/', WorkspaceUpgradeView.as_view(), name='workspace-upgrade'),
 ]
\ No newline at end of file
@@ -4,7 +4,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Coalesce
 from datetime import datetime
+from apps.common.aggregates import subquery_aggregate
+from apps.common.auth import get_request_user_id
+from apps.common.conditional import make_etag, not_modified, with_validators
+from apps.common.pagination import KeysetPagination
+from apps.common.permissions import MANAGER_ROLES, ROLE_OWNER, workspace_access_denied
+from apps.projects.models import Project
+from apps.workspacemembers.membership import member_workspace_ids
+from apps.workspacemembers.models import WorkspaceMember
 from .models import Workspace
 from apps.users.models import User 
 from .serializers import WorkspaceSerializer
@@ -79,18 +89,41 @@ class WorkspaceCreateView(APIView):
             )
 
 
-# Lấy danh sách workspaces của user
+# Lấy danh sách workspaces của user (sở hữu hoặc là thành viên), phân trang theo con trỏ
 class WorkspaceListView(APIView):
+    pagination = KeysetPagination(ordering=("-created_day", "-id"), default_limit=50, max_limit=200)
+
     def get(self, request):
         logger.info("[WORKSPACE LIST] Request received at %s", request.path)
         try:
-            # LẤY TẤT CẢ WORKSPACES (không filter theo user)
-            workspaces = Workspace.objects.all()
-            
-            logger.info("Found %d workspaces total", workspaces.count())
-            
-            serializer = WorkspaceSerializer(workspaces, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            user_id = get_request_user_id(request)
+            if user_id is None:
+                return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            # Tập workspace thành viên lấy từ cache nên chỉ còn một truy vấn trên bảng workspaces
+            workspaces = Workspace.objects.filter(Q(owner_id=user_id) | Q(id__in=member_workspace_ids(user_id)))
+
+            try:
+                page, next_cursor = self.pagination.paginate(workspaces, request)
+            except ValueError as e:
+                logger.warning("Invalid pagination parameters: %s", str(e))
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # ETag tính từ chính trang vừa đọc, như danh sách project
+            etag = make_etag("workspaces", user_id, request.get_full_path(), next_cursor,
+                             *[f"{workspace.id}:{workspace.updated_day.isoformat()}" for workspace in page])
+            cached = not_modified(request, etag)
+            if cached is not None:
+                logger.info("Workspace list not modified")
+                return cached
+
+            logger.info("Returning %d workspaces for user id=%s", len(page), user_id)
+
+            serializer = WorkspaceSerializer(page, many=True)
+            return with_validators(
+                Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK),
+                etag
+            )
             
         except Exception as e:
             logger.exception("[WORKSPACE LIST] Error: %s", str(e))
@@ -100,16 +133,75 @@ class WorkspaceListView(APIView):
             )
 
 
+# Tóm tắt các workspace của người gọi (sở hữu hoặc là thành viên) cho dashboard:
+# số thành viên, số project, tên owner và lần hoạt động gần nhất. Mọi số liệu lấy bằng
+# subquery trong cùng một câu SQL nên số truy vấn không tăng theo số workspace
+class WorkspaceSummaryView(APIView):
+    def get(self, request):
+        logger.info("[WORKSPACE SUMMARY] Request received at %s", request.path)
+        try:
+            user_id = get_request_user_id(request)
+            if user_id is None:
+                return Response({"error": "Cần đăng nhập"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            memberships = WorkspaceMember.objects.filter(user_id=user_id).values("workspace_id")
+            workspaces = (
+                Workspace.objects.filter(Q(owner_id=user_id) | Q(id__in=memberships))
+                .select_related("owner")
+                .annotate(
+                    member_count=Coalesce(subquery_aggregate(WorkspaceMember.objects.all(), "workspace", Count("id")),
+                                          0, output_field=IntegerField()),
+                    project_count=Coalesce(subquery_aggregate(Project.objects.all(), "workspace", Count("id")),
+                                           0, output_field=IntegerField()),
+                    last_project_update=subquery_aggregate(Project.objects.all(), "workspace", Max("updated_day")),
+                )
+                .order_by("-updated_day", "-id")
+            )
+
+            results = [
+                {
+                    "id": workspace.id,
+                    "name": workspace.name,
+                    "subscription_plan": workspace.subscription_plan,
+                    "owner": workspace.owner_id,
+                    "owner_name": workspace.owner.name,
+                    "member_count": workspace.member_count,
+                    "project_count": workspace.project_count,
+                    "last_activity": max(filter(None, (workspace.updated_day, workspace.last_project_update))),
+                }
+                for workspace in workspaces
+            ]
+            logger.info("Found %d workspaces for user id=%s", len(results), user_id)
+            return Response(results, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.exception("[WORKSPACE SUMMARY] Error: %s", str(e))
+            return Response(
+                {"error": f"Lỗi khi lấy tóm tắt workspace: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 # Lấy, cập nhật, xóa workspace 
 class WorkspaceDetailView(APIView):
     def get(self, request, id):
         logger.info("[WORKSPACE DETAIL] Người dùng gửi yêu cầu tại %s với id=%s", request.path, id)
         try:
             workspace = get_object_or_404(Workspace, id=id)
+            denied = workspace_access_denied(request, workspace.id)
+            if denied is not None:
+                return denied
             logger.info("Tìm thấy workspace: id=%s, name=%s", workspace.id, workspace.name)
 
+            etag = make_etag("workspace", workspace.id, workspace.updated_day.isoformat())
+            cached = not_modified(request, etag, workspace.updated_day)
+            if cached is not None:
+                logger.info("Workspace không đổi: id=%s, trả về 304", workspace.id)
+                return cached
+
             serializer = WorkspaceSerializer(workspace)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK),
+                                   etag, workspace.updated_day)
 
         except Exception as e:
             logger.exception("Lỗi truy xuất workspace id=%s", id)
@@ -122,6 +214,9 @@ class WorkspaceDetailView(APIView):
         logger.info("[WORKSPACE UPDATE] Người dùng gửi yêu cầu tại %s với id=%s", request.path, id)
         try:
             workspace = get_object_or_404(Workspace, id=id)
+            denied = workspace_access_denied(request, workspace.id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
             logger.info("Tìm thấy workspace: id=%s, name=%s", workspace.id, workspace.name)
 
             serializer = WorkspaceSerializer(workspace, data=request.data, partial=True)
@@ -144,6 +239,9 @@ class WorkspaceDetailView(APIView):
         logger.info("[WORKSPACE DELETE] Người dùng gửi yêu cầu tại %s với id=%s", request.path, id)
         try:
             workspace = get_object_or_404(Workspace, id=id)
+            denied = workspace_access_denied(request, workspace.id, (ROLE_OWNER,))
+            if denied is not None:
+                return denied
             logger.info("Tìm thấy workspace: id=%s, name=%s", workspace.id, workspace.name)
 
             workspace_name = workspace.name
@@ -169,6 +267,9 @@ class WorkspaceUpgradeView(APIView):
         logger.info("[WORKSPACE UPGRADE] Người dùng gửi yêu cầu tại %s với id=%s", request.path, id)
         try:
             workspace = get_object_or_404(Workspace, id=id)
+            denied = workspace_access_denied(request, workspace.id, MANAGER_ROLES)
+            if denied is not None:
+                return denied
             logger.info("Tìm thấy workspace: id=%s, name=%s, current_plan=%s",
                         workspace.id, workspace.name, getattr(workspace, "subscription_plan", None))
 
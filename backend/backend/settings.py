@@ -189,6 +189,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
+    'apps.webhooks.middleware.WebhookEventMiddleware',
 ]
 
 # CORS_ALLOW_ALL_ORIGINS = True
@@ -200,12 +201,51 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # dùng để
 
 ROOT_URLCONF = 'backend.urls'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache phải dùng chung giữa các worker/process: role trong workspace, tập workspace của user
+# và bảng định tuyến webhook được vô hiệu hoá qua cache, LocMemCache chỉ xoá được ở process
+# hiện tại (apps/common/checks.py báo lỗi nếu cấu hình lại như vậy).
+# Có REDIS_URL thì dùng Redis, không thì dùng bảng cache trong MySQL
+# (tạo một lần bằng `python manage.py createcachetable`)
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+
+# Số giây cache kết quả GET /api/projects/<pk>/overview/ (0 = không cache)
+PROJECT_OVERVIEW_CACHE_SECONDS = 30
+
+# Số giây cache tập workspace mà một user là thành viên (xoá ngay khi thêm/xoá thành viên)
+WORKSPACE_MEMBERSHIP_CACHE_SECONDS = 300
+
+# Số giây cache role của user trong các workspace (hết hiệu lực sớm khi version thành viên của workspace đổi)
+WORKSPACE_ROLE_CACHE_SECONDS = 300
+
+# Số giây một tiến trình giữ bảng định tuyến webhook trong bộ nhớ (version trong cache dùng chung
+# vẫn làm bảng hết hiệu lực ngay khi webhook đổi; TTL chặn trên nếu lần vô hiệu hoá bị lỡ)
+WEBHOOK_ROUTING_CACHE_SECONDS = 60
+
+# Số giây giữa hai lần một tiến trình đọc version định tuyến trong cache dùng chung (với
+# DatabaseCache mỗi lần đọc là một truy vấn); webhook đổi ở tiến trình khác được thấy chậm nhất sau khoảng này
+WEBHOOK_ROUTING_VERSION_CHECK_SECONDS = 2
+
+# Số ngày giữ tombstone của bình luận đã xoá (lệnh purge_comment_tombstones); token ?since= cũ hơn
+# khoảng này không còn biết hết những gì đã bị xoá nên client phải đồng bộ lại từ đầu
+COMMENT_TOMBSTONE_RETENTION_DAYS = 30
+
+# Backend pub/sub cho luồng bình luận trực tiếp (apps.comments.pubsub)
+COMMENT_PUBSUB_BACKEND = 'apps.comments.pubsub.InMemoryBroker'
 
 AUTHENTICATION_BACKENDS = [
     'apps.users.backends.EmailBackend',
@@ -238,6 +278,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+# Luồng bình luận trực tiếp (GET /api/sessions/<id>/comments/stream/) là kết nối SSE không kết thúc,
+# chỉ phục vụ khi chạy bằng server ASGI, ví dụ `uvicorn backend.asgi:application`; dưới WSGI
+# endpoint này trả về 501
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useForm } from 'react-hook-form';
 import { projectService, workspaceService } from '@/services';
-import { handleApiError } from '@/services';
+import { handleApiError, fetchAllPages } from '@/services';
 import type { Project, Workspace } from '@/types/models';
 
 interface CreateProjectModalProps {
@@ -37,8 +37,8 @@ export default function CreateProjectModal({ onClose, onSuccess }: CreateProject
 
   const fetchWorkspaces = async () => {
     try {
-      const data = await workspaceService.getAllWorkspaces();
-      setWorkspaces(data);
+      const results = await fetchAllPages((cursor) => workspaceService.getAllWorkspaces({ limit: 200, cursor }));
+      setWorkspaces(results);
     } catch (err) {
       console.error('Failed to load workspaces:', err);
     } finally {
@@ -212,7 +212,7 @@ import DashboardLayout from '@/components/DashboardLayout';
 import CreateProjectModal from '@/components/CreateProjectModal';
 import EditProjectModal from '@/components/EditProjectModal';
 import { projectService } from '@/services';
-import { handleApiError } from '@/services';
+import { handleApiError, fetchAllPages } from '@/services';
 import type { Project } from '@/types/models';
 
 export default function Projects() {
@@ -231,9 +231,9 @@ export default function Projects() {
     setIsLoading(true);
     setError('');
     try {
-      const data = await projectService.listProjects();
-      setProjects(data);
-      console.log('Loaded projects:', data.length);
+      const results = await fetchAllPages((cursor) => projectService.listProjects({ limit: 200, cursor }));
+      setProjects(results);
+      console.log('Loaded projects:', results.length);
     } catch (err) {
       setError(handleApiError(err));
     } finally {
@@ -4,7 +4,7 @@ import DashboardLayout from '@/components/DashboardLayout';
 import CreateProjectModal from '@/components/CreateProjectModal';
 import EditWorkspaceModal from '@/components/EditWorkspaceModal';
 import { workspaceService, projectService } from '@/services';
-import { handleApiError } from '@/services';
+import { handleApiError, fetchAllPages } from '@/services';
 import type { Workspace, Project } from '@/types/models';
 
 export default function WorkspaceDetail() {
@@ -39,9 +39,10 @@ export default function WorkspaceDetail() {
 
   const fetchWorkspaceProjects = async () => {
     try {
-      const allProjects = await projectService.listProjects();
-      const workspaceProjects = allProjects.filter(p => p.workspace === Number(id));
-      setProjects(workspaceProjects);
+      const results = await fetchAllPages((cursor) =>
+        projectService.getProjectsByWorkspace(Number(id), { limit: 200, cursor })
+      );
+      setProjects(results);
     } catch (err) {
       console.error('Failed to load projects:', err);
     }
@@ -4,7 +4,7 @@ import DashboardLayout from '@/components/DashboardLayout';
 import CreateWorkspaceModal from '@/components/CreateWorkspaceModal';
 import EditWorkspaceModal from '@/components/EditWorkspaceModal';
 import { workspaceService } from '@/services';
-import { handleApiError } from '@/services';
+import { handleApiError, fetchAllPages } from '@/services';
 import type { Workspace } from '@/types/models';
 
 export default function Workspaces() {
@@ -24,9 +24,9 @@ export default function Workspaces() {
     setIsLoading(true);
     setError('');
     try {
-      const data = await workspaceService.getAllWorkspaces();
-      setWorkspaces(data);
-      console.log("Loaded workspaces:", data.length);
+      const results = await fetchAllPages((cursor) => workspaceService.getAllWorkspaces({ limit: 200, cursor }));
+      setWorkspaces(results);
+      console.log("Loaded workspaces:", results.length);
     } catch (err) {
       setError(handleApiError(err));
     } finally {
@@ -1,5 +1,6 @@
 
 import axios, { type AxiosInstance, type AxiosError, type InternalAxiosRequestConfig } from 'axios';
+import type { CursorPaginatedResponse } from '@/types/models';
 
 /**
  * Base API URL - Change this to your backend URL
@@ -103,4 +104,20 @@ export const handleApiError = (error: unknown): string => {
   return 'An unexpected error occurred';
 };
 
+/**
+ * Follow next_cursor from the first page until the last one and return every result
+ */
+export const fetchAllPages = async <T>(
+  fetchPage: (cursor?: string) => Promise<CursorPaginatedResponse<T>>
+): Promise<T[]> => {
+  const results: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const page = await fetchPage(cursor);
+    results.push(...page.results);
+    cursor = page.next_cursor ?? undefined;
+  } while (cursor);
+  return results;
+};
+
 export default api;
\ No newline at end of file
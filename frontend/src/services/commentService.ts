@@ -1,5 +1,10 @@
 import api from '@/services/api';
-import type { Comment, CommentCreateRequest } from '../types/models';
+import type {
+  Comment,
+  CommentCreateRequest,
+  CommentThreadNode,
+  CursorPaginatedResponse,
+} from '../types/models';
 
 /**
  * Comment Service
@@ -48,6 +53,30 @@ class CommentService {
     return response.data;
   }
 
+  /**
+   * Get comments created/updated and ids deleted since a previous sync token
+   * (or an ISO timestamp). reset=true means the token predates the deletion history:
+   * drop the local copy and rebuild it from the returned pages
+   */
+  async getSessionCommentChanges(
+    sessionId: number,
+    since: string,
+    limit?: number
+  ): Promise<{ changes: Comment[]; deleted: number[]; next_since: string; has_more: boolean; reset: boolean }> {
+    const response = await api.get(`/sessions/${sessionId}/comments/`, {
+      params: { since, limit },
+    });
+    return response.data;
+  }
+
+  /**
+   * Get the whole thread containing a comment, as a tree
+   */
+  async getThread(commentId: number): Promise<CommentThreadNode> {
+    const response = await api.get<CommentThreadNode>(`/comments/${commentId}/thread/`);
+    return response.data;
+  }
+
   /**
    * Mention users in comment
    */
@@ -59,10 +88,31 @@ class CommentService {
   }
 
   /**
-   * Get comments by session
+   * Get comments by session (cursor paginated, newest first)
+   */
+  async getSessionComments(
+    sessionId: number,
+    params?: { limit?: number; cursor?: string; bbox?: string }
+  ): Promise<CursorPaginatedResponse<Comment>> {
+    const response = await api.get<CursorPaginatedResponse<Comment>>(
+      `/sessions/${sessionId}/comments/`,
+      { params }
+    );
+    return response.data;
+  }
+
+  /**
+   * Search comments by keyword within a session, project or workspace
    */
-  async getSessionComments(sessionId: number): Promise<Comment[]> {
-    const response = await api.get<Comment[]>(`/sessions/${sessionId}/comments/`);
+  async searchComments(params: {
+    q: string;
+    session?: number;
+    project?: number;
+    workspace?: number;
+    limit?: number;
+    offset?: number;
+  }): Promise<{ results: { score: number; comment: Comment }[]; next_offset: number | null }> {
+    const response = await api.get('/comments/search/', { params });
     return response.data;
   }
 
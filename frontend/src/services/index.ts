@@ -5,4 +5,4 @@ export { default as canvasService } from './canvasService';
 export { default as commentService } from './commentService';
 export { default as sessionService } from './sessionService';
 export { default as webhookService } from './webhookService';
-export { default as api, handleApiError } from './api';
\ No newline at end of file
+export { default as api, handleApiError, fetchAllPages } from './api';
\ No newline at end of file
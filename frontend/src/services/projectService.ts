@@ -1,5 +1,10 @@
 import api from '@/services/api';
-import type { Project, ProjectCreateRequest } from '../types/models';
+import type {
+  CursorPaginatedResponse,
+  Project,
+  ProjectCreateRequest,
+  ProjectOverview,
+} from '../types/models';
 
 /**
  * Project Service
@@ -21,6 +26,14 @@ class ProjectService {
     return response.data;
   }
 
+  /**
+   * Get project with canvas/session/comment counts and latest activity
+   */
+  async getProjectOverview(projectId: number): Promise<ProjectOverview> {
+    const response = await api.get<ProjectOverview>(`/projects/${projectId}/overview/`);
+    return response.data;
+  }
+
   /**
    * Update project
    */
@@ -37,21 +50,27 @@ class ProjectService {
   }
 
   /**
-   * Get all projects
+   * List projects (newest first, cursor paginated)
    */
-  async listProjects(): Promise<Project[]> {
-    const response = await api.get<Project[]>('/projects/list/');
+  async listProjects(params?: {
+    workspace?: number;
+    type?: Project['type'];
+    name?: string;
+    limit?: number;
+    cursor?: string;
+  }): Promise<CursorPaginatedResponse<Project>> {
+    const response = await api.get<CursorPaginatedResponse<Project>>('/projects/list/', { params });
     return response.data;
   }
 
   /**
    * Get projects by workspace
    */
-  async getProjectsByWorkspace(workspaceId: number): Promise<Project[]> {
-    const response = await api.get<Project[]>('/projects/list/', {
-      params: { workspace: workspaceId },
-    });
-    return response.data;
+  async getProjectsByWorkspace(
+    workspaceId: number,
+    params?: { limit?: number; cursor?: string }
+  ): Promise<CursorPaginatedResponse<Project>> {
+    return this.listProjects({ workspace: workspaceId, ...params });
   }
 }
 
@@ -1,20 +1,27 @@
 import api from '@/services/api';
-import type { Webhook } from '../types/models';
+import type {
+  CursorPaginatedResponse,
+  Webhook,
+  WebhookDeliveryLog,
+  WebhookHealth,
+  WebhookReplay,
+  WebhookSecret,
+} from '../types/models';
 
 /**
  * Webhook Service
  */
 class WebhookService {
   /**
-   * Create new webhook
+   * Create new webhook (the response is the only time the signing secret is returned, besides rotation)
    */
   async createWebhook(
     workspaceId: number,
     endpointUrl: string,
     eventType: 'create' | 'read' | 'update' | 'delete',
     model: 'project' | 'comment' | 'user'
-  ): Promise<Webhook> {
-    const response = await api.post<Webhook>('/webhooks/', {
+  ): Promise<Webhook & WebhookSecret> {
+    const response = await api.post<Webhook & WebhookSecret>('/webhooks/', {
       workspace: workspaceId,
       endpoint_url: endpointUrl,
       event_type: eventType,
@@ -40,12 +47,24 @@ class WebhookService {
       endpoint_url: string;
       event_type: 'create' | 'read' | 'update' | 'delete';
       model: 'project' | 'comment' | 'user';
+      active: boolean;
+      max_attempts: number;
+      batch_max_size: number;
+      batch_linger_seconds: number;
     }>
   ): Promise<Webhook> {
     const response = await api.put<Webhook>(`/webhooks/${webhookId}/detail/`, data);
     return response.data;
   }
 
+  /**
+   * Issue a new signing secret for the webhook (owner/admin only); the old secret stops working
+   */
+  async rotateWebhookSecret(webhookId: number): Promise<WebhookSecret> {
+    const response = await api.post<WebhookSecret>(`/webhooks/${webhookId}/secret/rotate/`);
+    return response.data;
+  }
+
   /**
    * Delete webhook
    */
@@ -53,11 +72,68 @@ class WebhookService {
     await api.delete(`/webhooks/${webhookId}/detail/`);
   }
 
+  /**
+   * Get receiver health and circuit breaker state
+   */
+  async getWebhookHealth(webhookId: number): Promise<WebhookHealth> {
+    const response = await api.get<WebhookHealth>(`/webhooks/${webhookId}/health/`);
+    return response.data;
+  }
+
+  /**
+   * Get delivery log of a webhook (newest first, cursor paginated)
+   */
+  async getWebhookDeliveries(
+    webhookId: number,
+    params?: { limit?: number; cursor?: string; event_id?: string }
+  ): Promise<CursorPaginatedResponse<WebhookDeliveryLog>> {
+    const response = await api.get<CursorPaginatedResponse<WebhookDeliveryLog>>(
+      `/webhooks/${webhookId}/deliveries/`,
+      { params }
+    );
+    return response.data;
+  }
+
+  /**
+   * Re-deliver stored events of a time range to a webhook
+   */
+  async replayWebhook(
+    webhookId: number,
+    start: string,
+    end: string,
+    ratePerSecond?: number
+  ): Promise<WebhookReplay> {
+    const response = await api.post<WebhookReplay>(`/webhooks/${webhookId}/replays/`, {
+      start,
+      end,
+      ...(ratePerSecond !== undefined && { rate_per_second: ratePerSecond }),
+    });
+    return response.data;
+  }
+
+  /**
+   * Get recent replays of a webhook
+   */
+  async getWebhookReplays(webhookId: number): Promise<WebhookReplay[]> {
+    const response = await api.get<WebhookReplay[]>(`/webhooks/${webhookId}/replays/`);
+    return response.data;
+  }
+
   /**
    * Trigger event manually (for testing)
    */
-  async triggerEvent(eventData: unknown): Promise<{ message: string }> {
-    const response = await api.post<{ message: string }>('/events/', eventData);
+  async triggerEvent(
+    eventData: {
+      workspace: number;
+      model: 'project' | 'comment' | 'user';
+      event_type: 'create' | 'read' | 'update' | 'delete';
+      [key: string]: unknown;
+    }
+  ): Promise<{ message: string; event_id: string; queued: number }> {
+    const response = await api.post<{ message: string; event_id: string; queued: number }>(
+      '/events/',
+      eventData
+    );
     return response.data;
   }
 }
@@ -1,8 +1,10 @@
 import api from '@/services/api';
 import type {
+  CursorPaginatedResponse,
   Workspace,
   WorkspaceCreateRequest,
   WorkspaceMember,
+  WorkspaceSummary,
 } from '@/types/models';
 
 /**
@@ -10,10 +12,18 @@ import type {
  */
 class WorkspaceService {
   /**
-   * Get all workspaces (for current user)
+   * Get workspaces the current user owns or is a member of (newest first, cursor paginated)
    */
-  async getAllWorkspaces(): Promise<Workspace[]> {
-    const response = await api.get<Workspace[]>('/workspaces/list/');
+  async getAllWorkspaces(params?: { limit?: number; cursor?: string }): Promise<CursorPaginatedResponse<Workspace>> {
+    const response = await api.get<CursorPaginatedResponse<Workspace>>('/workspaces/list/', { params });
+    return response.data;
+  }
+
+  /**
+   * Get member/project counts, owner name and last activity for the current user's workspaces
+   */
+  async getWorkspaceSummaries(): Promise<WorkspaceSummary[]> {
+    const response = await api.get<WorkspaceSummary[]>('/workspaces/summary/');
     return response.data;
   }
 
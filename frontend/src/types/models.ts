@@ -24,6 +24,20 @@ export interface Workspace {
   created_day: string;
 }
 
+/**
+ * Workspace summary for the dashboard (GET /workspaces/summary/)
+ */
+export interface WorkspaceSummary {
+  id: number;
+  name: string;
+  subscription_plan: Workspace['subscription_plan'];
+  owner: number; // User ID
+  owner_name: string;
+  member_count: number;
+  project_count: number;
+  last_activity: string;
+}
+
 /**
  * Workspace Member Model
  */
@@ -48,6 +62,17 @@ export interface Project {
   created_day: string;
 }
 
+/**
+ * Project with aggregated activity (GET /projects/<pk>/overview/)
+ */
+export interface ProjectOverview extends Project {
+  canvas_count: number;
+  session_count: number;
+  comment_count: number;
+  last_comment_day: string | null;
+  latest_activity: string;
+}
+
 /**
  * Canvas Model
  */
@@ -67,6 +92,9 @@ export interface FeedbackSession {
   user?: number; // User ID (nullable)
   canvas: number; // Canvas ID
   session_type: 'canvas' | 'shoot';
+  comment_count: number;
+  commenter_count: number;
+  last_comment_day: string | null;
   created_day: string;
   updated_day: string;
 }
@@ -78,6 +106,9 @@ export interface Comment {
   id: number;
   session: number; // FeedbackSession ID
   user: number; // User ID
+  parent?: number | null; // Parent Comment ID (replies)
+  root?: number | null; // Thread root Comment ID
+  depth?: number;
   content: string;
   position_x?: number;
   position_y?: number;
@@ -97,9 +128,79 @@ export interface Webhook {
   endpoint_url: string;
   event_type: 'create' | 'read' | 'update' | 'delete';
   model: 'project' | 'comment' | 'user';
+  active: boolean;
+  max_attempts: number;
+  batch_max_size: number;
+  batch_linger_seconds: number;
   created_day: string;
 }
 
+/**
+ * Webhook HMAC signing key, returned only on create and on rotation
+ */
+export interface WebhookSecret {
+  id: number;
+  secret: string; // HMAC-SHA256 key for X-Webhook-Signature
+}
+
+/**
+ * Webhook receiver health (circuit breaker state and recent delivery stats)
+ */
+export interface WebhookHealth {
+  webhook_id: number;
+  id?: number;
+  endpoint_url: string;
+  state: 'closed' | 'open' | 'half_open';
+  consecutive_failures: number;
+  open_count: number;
+  retry_at: string | null;
+  total_successes: number;
+  total_failures: number;
+  last_status_code: number | null;
+  last_error: string;
+  last_success_day: string | null;
+  last_failure_day: string | null;
+  updated_day?: string;
+  success_rate: number | null;
+  window_size: number;
+  p50_latency_ms: number | null;
+  p95_latency_ms: number | null;
+}
+
+/**
+ * One webhook delivery attempt
+ */
+export interface WebhookDeliveryLog {
+  id: number;
+  event_id: string;
+  webhook_id: number;
+  status_code: number | null;
+  succeeded: boolean;
+  latency_ms: number | null;
+  attempt: number;
+  response: string;
+  created_day: string;
+}
+
+/**
+ * Replay of stored events to a webhook
+ */
+export interface WebhookReplay {
+  id: number;
+  webhook: number;
+  start: string;
+  end: string;
+  rate_per_second: number;
+  status: 'running' | 'done';
+  cursor_day: string | null;
+  cursor_id: number;
+  next_slot_at: string | null;
+  enqueued: number;
+  created_day: string;
+  updated_day: string;
+  finished_day: string | null;
+}
+
 /**
  * Auth Response Types
  */
@@ -171,4 +272,12 @@ export interface PaginatedResponse<T> {
   next?: string;
   previous?: string;
   results: T[];
-}
\ No newline at end of file
+}
+export interface CommentThreadNode extends Comment {
+  replies: CommentThreadNode[];
+}
+
+export interface CursorPaginatedResponse<T> {
+  results: T[];
+  next_cursor: string | null;
+}